@@ -1,317 +1,33 @@
 #!/usr/bin/env python3
 
-import re
 import os
-
-def time_to_seconds(time_str):
-    """Convert mm:ss to seconds"""
-    parts = time_str.split(':')
-    if len(parts) == 2:
-        mins = int(parts[0]) if parts[0] else 0
-        secs = int(parts[1]) if parts[1] else 0
-        return mins * 60 + secs
-    return 0
-
-def extract_youtube_id(url):
-    """Extract YouTube video ID from URL"""
-    patterns = [
-        r'(?:youtube\.com\/watch\?v=|youtu\.be\/|youtube\.com\/embed\/)([^&\?\/]+)',
-        r'^([a-zA-Z0-9_-]{11})$'
-    ]
-
-    for pattern in patterns:
-        match = re.search(pattern, url)
-        if match:
-            return match.group(1)
-    return None
-
-def generate_slug(artist, title):
-    """Generate filename slug from artist and title"""
-    slug = (artist + '-' + title).lower()
-    slug = re.sub(r'[^a-z0-9]+', '-', slug)
-    slug = re.sub(r'^-+|-+$', '', slug)
-    return slug
-
-def generate_html(data):
-    """Generate complete HTML page"""
-    title = data['title']
-    artist = data['artist']
-    video_id = data['videoId']
-    description = data['description']
-    markers = data['markers']
-    links = data['links']
-
-    # Generate markers HTML
-    markers_html = ''
-    for marker in markers:
-        markers_html += f"""
-                <div class="marker-item" data-time="{marker['seconds']}">
-                    <span class="marker-time">{marker['time']}</span>
-                    <span class="marker-text">{marker['text']}</span>
-                </div>"""
-
-    # Generate streaming links HTML
-    streaming_links_html = f"""
-                    <a href="https://www.youtube.com/watch?v={video_id}" target="_blank" class="stream-link">YouTube</a>"""
-
-    if links['spotify']:
-        streaming_links_html += f"""\n                    <a href="{links['spotify']}" target="_blank" class="stream-link">Spotify</a>"""
-    if links['appleMusic']:
-        streaming_links_html += f"""\n                    <a href="{links['appleMusic']}" target="_blank" class="stream-link">Apple Music</a>"""
-    if links['youtubeMusic']:
-        streaming_links_html += f"""\n                    <a href="{links['youtubeMusic']}" target="_blank" class="stream-link">YouTube Music</a>"""
-
-    # Generate color scheme based on artist name
-    colors = [
-        ['#8b0000', '#2d1b2e'],
-        ['#667eea', '#764ba2'],
-        ['#f093fb', '#f5576c'],
-        ['#4facfe', '#00f2fe'],
-        ['#43e97b', '#38f9d7']
-    ]
-    color_index = len(artist) % len(colors)
-    color1, color2 = colors[color_index]
-
-    return f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{title} - {artist}</title>
-    <style>
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
-
-        body {{
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            background: linear-gradient(135deg, #1a1a1a 0%, {color2} 100%);
-            min-height: 100vh;
-            padding: 40px 20px;
-        }}
-
-        .container {{
-            max-width: 1000px;
-            margin: 0 auto;
-            background: white;
-            border-radius: 20px;
-            box-shadow: 0 20px 60px rgba(0,0,0,0.5);
-            overflow: hidden;
-        }}
-
-        .header {{
-            background: linear-gradient(135deg, {color1} 0%, {color2} 100%);
-            color: white;
-            padding: 40px;
-            text-align: center;
-        }}
-
-        .header h1 {{
-            font-size: 2.8em;
-            margin-bottom: 10px;
-            text-shadow: 2px 2px 4px rgba(0,0,0,0.3);
-        }}
-
-        .header p {{
-            font-size: 1.3em;
-            opacity: 0.9;
-        }}
-
-        .content {{
-            padding: 40px;
-        }}
-
-        .description {{
-            font-size: 1.1em;
-            line-height: 1.8;
-            color: #333;
-            margin-bottom: 30px;
-            padding: 20px;
-            background: #f8f9fa;
-            border-radius: 10px;
-            border-left: 4px solid {color1};
-        }}
-
-        .video-container {{
-            margin: 30px 0;
-            background: #000;
-            border-radius: 10px;
-            overflow: hidden;
-            box-shadow: 0 8px 24px rgba(0,0,0,0.3);
-        }}
-
-        .video-wrapper {{
-            position: relative;
-            padding-bottom: 56.25%;
-            height: 0;
-            overflow: hidden;
-        }}
-
-        .video-wrapper iframe {{
-            position: absolute;
-            top: 0;
-            left: 0;
-            width: 100%;
-            height: 100%;
-        }}
-
-        .markers-section {{
-            margin: 40px 0;
-            background: #f8f9fa;
-            padding: 30px;
-            border-radius: 10px;
-        }}
-
-        .markers-section h2 {{
-            color: #333;
-            margin-bottom: 20px;
-            font-size: 1.4em;
-        }}
-
-        .marker-item {{
-            background: white;
-            padding: 18px;
-            margin-bottom: 12px;
-            border-radius: 8px;
-            border-left: 4px solid {color1};
-            cursor: pointer;
-            transition: all 0.3s;
-            display: flex;
-            align-items: flex-start;
-            gap: 15px;
-        }}
-
-        .marker-item:hover {{
-            transform: translateX(5px);
-            box-shadow: 0 4px 12px rgba(0,0,0,0.2);
-            background: #fffbfb;
-        }}
-
-        .marker-time {{
-            color: {color1};
-            font-weight: bold;
-            font-size: 1.1em;
-            min-width: 60px;
-            flex-shrink: 0;
-        }}
-
-        .marker-text {{
-            color: #555;
-            line-height: 1.6;
-        }}
-
-        .streaming-links {{
-            margin-top: 30px;
-            padding: 25px;
-            background: #f8f9fa;
-            border-radius: 10px;
-        }}
-
-        .streaming-links h3 {{
-            color: #333;
-            margin-bottom: 15px;
-            font-size: 1.2em;
-        }}
-
-        .links-container {{
-            display: flex;
-            gap: 15px;
-            flex-wrap: wrap;
-        }}
-
-        .stream-link {{
-            display: inline-block;
-            padding: 12px 24px;
-            background: white;
-            color: {color1};
-            text-decoration: none;
-            border-radius: 8px;
-            font-weight: 600;
-            transition: all 0.3s;
-            border: 2px solid {color1};
-        }}
-
-        .stream-link:hover {{
-            background: {color1};
-            color: white;
-            transform: translateY(-2px);
-            box-shadow: 0 4px 12px rgba(0,0,0,0.3);
-        }}
-
-        @media (max-width: 768px) {{
-            .header h1 {{
-                font-size: 2em;
-            }}
-
-            .content {{
-                padding: 20px;
-            }}
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>{title}</h1>
-            <p>{artist}</p>
-        </div>
-
-        <div class="content">
-            <div class="description">
-                {description}
-            </div>
-
-            <div class="video-container">
-                <div class="video-wrapper">
-                    <iframe id="youtube-player"
-                        src="https://www.youtube.com/embed/{video_id}?enablejsapi=1"
-                        frameborder="0"
-                        allow="accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture; web-share"
-                        allowfullscreen>
-                    </iframe>
-                </div>
-            </div>
-
-            <div class="markers-section">
-                <h2>Key Moments to Listen For:</h2>
-{markers_html}
-            </div>
-
-            <div class="streaming-links">
-                <h3>Listen On:</h3>
-                <div class="links-container">
-{streaming_links_html}
-                </div>
-            </div>
-        </div>
-    </div>
-
-    <script src="https://www.youtube.com/iframe_api"></script>
-    <script>
-        let player;
-
-        function onYouTubeIframeAPIReady() {{
-            player = new YT.Player('youtube-player', {{
-                events: {{
-                    'onReady': onPlayerReady
-                }}
-            }});
-        }}
-
-        function onPlayerReady(event) {{
-            document.querySelectorAll('.marker-item').forEach(item => {{
-                item.addEventListener('click', function() {{
-                    const time = parseInt(this.dataset.time);
-                    player.seekTo(time, true);
-                    player.playVideo();
-                }});
-            }});
-        }}
-    </script>
-</body>
-</html>"""
+import sys
+import csv
+import json
+import time
+import hashlib
+import argparse
+from collections.abc import Mapping
+
+import page_template
+import index_template
+import song_importer
+import song_catalog
+import precompress
+import search_index
+import dev_server
+import publish_queue
+import thumbnails
+import link_checker
+import submission_queue
+import song_model
+import build_profile
+import cache_headers
+from common import atomic_write, pool_map
+from song_core import (
+    time_to_seconds, extract_youtube_id, generate_slug, generate_html, write_html, parse_timestamps, slugify_many,
+    sort_markers
+)
 
 def main():
     print('\n🎵 Add New Song to Your Collection\n')
@@ -327,6 +43,19 @@ def main():
         print('❌ Invalid YouTube URL!')
         return
 
+    # Check the catalog before asking for the rest
+    slug = generate_slug(artist, title)
+    catalog = song_catalog.SongCatalog()
+    replace = False
+    try:
+        catalog.check_duplicate(slug, video_id)
+    except song_catalog.DuplicateSongError as e:
+        print(f'⚠️  {e}')
+        if input('Replace it? (y/N): ').strip().lower() != 'y':
+            print('❌ Cancelled')
+            return
+        replace = True
+
     description = input('Description (50-60 words): ')
 
     # Get markers
@@ -334,7 +63,7 @@ def main():
     markers = []
 
     while True:
-        time = input(f'Timestamp #{len(markers) + 1} (mm:ss or leave empty to finish): ')
+        time = input(f'Timestamp #{len(markers) + 1} (mm:ss, h:mm:ss or leave empty to finish): ')
 
         if not time:
             if len(markers) == 0:
@@ -356,38 +85,926 @@ def main():
     youtube_music_link = input('YouTube Music Link (or press Enter to skip): ')
 
     # Generate filename
-    filename = generate_slug(artist, title) + '.html'
+    filename = slug + '.html'
     filepath = os.path.join(os.path.dirname(__file__), filename)
 
-    # Generate HTML
-    html = generate_html({
+    record = {
         'title': title,
         'artist': artist,
         'videoId': video_id,
         'description': description,
-        'markers': markers,
+        'markers': sort_markers(markers),
         'links': {
             'spotify': spotify_link,
             'appleMusic': apple_music_link,
             'youtubeMusic': youtube_music_link
         }
-    })
+    }
 
-    # Save file
+    # Save file and record it in the catalog
     with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(html)
+        f.write(generate_html(record))
+    replaced = catalog.add(slug, record, replace=replace)
+    catalog.close()
+    pending = publish_queue.PublishQueue(os.path.dirname(os.path.abspath(__file__))).add(filepath, f'Add {title} by {artist}')
 
     print(f'\n✅ Song page created: {filename}')
+    for old_slug in replaced:
+        print(f'🗑  Replaced {old_slug} in the catalog; {old_slug}.html is left in place')
+    print(f'📦 Queued for publishing ({pending} song(s) waiting)')
     print('\nNext steps:')
-    print(f'1. Run: git add {filename}')
-    print(f'2. Run: git commit -m "Add {title} by {artist}"')
-    print('3. Run: git push')
-    print('4. Update index.html to add a link to this song')
+    print(f'1. Run: python add-song.py build {os.path.basename(song_catalog.DEFAULT_PATH)} to refresh index.html')
+    print('2. Run: python add-song.py publish to commit and push every queued song at once')
+
+def text_field(record, key, default=None):
+    """A string field of a record, or default when it is null or missing
+
+    Raises ValueError when the value (or a None default) is not a string.
+    """
+    value = record.get(key)
+    if value is None:
+        value = default
+    if not isinstance(value, str):
+        raise ValueError(f'{key} must be a string, not {type(value).__name__}')
+    return value
+
+def normalize_record(record):
+    """Fill in derived fields so a catalog record matches what generate_html takes
+
+    Raises ValueError for a record that is missing fields or has fields
+    of the wrong type.
+    """
+    for key in ('title', 'artist', 'videoId'):
+        if not text_field(record, key, ''):
+            raise ValueError(f'missing {key}')
+
+    video_id = extract_youtube_id(record['videoId'])
+    if not video_id:
+        raise ValueError(f"invalid YouTube URL or ID: {record['videoId']}")
+
+    raw_markers = record.get('markers') or []
+    if not isinstance(raw_markers, list) or not all(isinstance(marker, Mapping) for marker in raw_markers):
+        raise ValueError('markers must be a list of objects')
+    times = [text_field(marker, 'time') for marker in raw_markers]
+    markers = sort_markers([
+        {'time': time, 'seconds': int(marker.get('seconds', seconds)), 'text': text_field(marker, 'text')}
+        for marker, time, seconds in zip(raw_markers, times, parse_timestamps(times))
+    ])
+    if not markers:
+        raise ValueError('needs at least one marker')
+
+    links = record.get('links')
+    if links is None:
+        links = {}
+    if not isinstance(links, Mapping):
+        raise ValueError('links must be an object')
+    return {
+        'title': record['title'],
+        'artist': record['artist'],
+        'videoId': video_id,
+        'description': text_field(record, 'description', ''),
+        'markers': markers,
+        'links': {field: text_field(links, field, '') for field in ('spotify', 'appleMusic', 'youtubeMusic')}
+    }
+
+def parse_csv_row(row):
+    """Turn a CSV row into a catalog record
+
+    The markers column holds one "mm:ss annotation" or "h:mm:ss annotation"
+    per line, and the streaming links are flat
+    spotify/appleMusic/youtubeMusic columns.
+    """
+    markers = []
+    for line in (row.get('markers') or '').splitlines():
+        line = line.strip()
+        if line:
+            time, _, text = line.partition(' ')
+            markers.append({'time': time, 'text': text.strip()})
+
+    return {
+        'title': row.get('title', ''),
+        'artist': row.get('artist', ''),
+        'videoId': row.get('videoId', ''),
+        'description': row.get('description', ''),
+        'markers': markers,
+        'links': {
+            'spotify': row.get('spotify', ''),
+            'appleMusic': row.get('appleMusic', ''),
+            'youtubeMusic': row.get('youtubeMusic', '')
+        }
+    }
+
+def load_catalog(path):
+    """Load song records from a .json, .jsonl, .csv, SQLite (.db) or binary (.songs) catalog file"""
+    ext = os.path.splitext(path)[1].lower()
+
+    if ext in ('.db', '.sqlite'):
+        with song_catalog.SongCatalog(path) as catalog:
+            return catalog.records()
+    if ext == '.songs':
+        with song_model.BinaryCatalog(path) as catalog:
+            return list(catalog)
+
+    with open(path, encoding='utf-8', newline='') as f:
+        if ext == '.jsonl':
+            return [json.loads(line) for line in f if line.strip()]
+        if ext == '.csv':
+            return [parse_csv_row(row) for row in csv.DictReader(f)]
+        if ext == '.json':
+            data = json.load(f)
+            return data['songs'] if isinstance(data, dict) else data
+
+    raise ValueError(f'Unsupported catalog format: {path}')
+
+CSV_FIELDS = ['title', 'artist', 'videoId', 'description', 'markers', 'spotify', 'appleMusic', 'youtubeMusic']
+
+def save_catalog(path, records):
+    """Write song records to a .json, .jsonl, .csv, SQLite (.db) or binary (.songs) catalog file"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.songs':
+        song_model.write_catalog(path, records)
+        return
+    records = [record.record() if isinstance(record, song_model.Song) else record for record in records]
+    if ext in ('.db', '.sqlite'):
+        with song_catalog.SongCatalog(path) as catalog:
+            slugs = slugify_many((r['artist'], r['title']) for r in records)
+            catalog.replace_all(zip(slugs, records))
+        return
+    if ext not in ('.json', '.jsonl', '.csv'):
+        raise ValueError(f'Unsupported catalog format: {path}')
+
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        if ext == '.jsonl':
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        elif ext == '.json':
+            json.dump({'songs': records}, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        else:
+            writer = csv.DictWriter(f, CSV_FIELDS)
+            writer.writeheader()
+            for record in records:
+                writer.writerow({
+                    'title': record['title'],
+                    'artist': record['artist'],
+                    'videoId': record['videoId'],
+                    'description': record['description'],
+                    'markers': '\n'.join(f"{m['time']} {m['text']}" for m in record['markers']),
+                    **record['links']
+                })
+
+def render_options(external_assets=False, facade=False, minify=False):
+    """The page options render_song and profile_song read from each job"""
+    return {'external_assets': external_assets, 'facade': facade, 'minify': minify}
+
+def render_song(job):
+    """Render and write one song page, returning (label, filename, error)"""
+    label, data, filepath, options = job
+    try:
+        with open(filepath, 'w', encoding='utf-8') as f:
+            write_html(data, f, options['external_assets'], options['facade'], options['minify'])
+        return label, os.path.basename(filepath), None
+    except Exception as e:
+        return label, None, f'{type(e).__name__}: {e}'
+
+def profile_song(job):
+    """render_song, timed: returns (result, (pid, start, render seconds, write seconds))
+
+    The page is rendered to a string and then written, instead of being
+    streamed, so the two can be told apart.
+    """
+    label, data, filepath, options = job
+    start = time.perf_counter()
+    rendered = None
+    try:
+        html = generate_html(data, options['external_assets'], options['facade'], options['minify'])
+        rendered = time.perf_counter()
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write(html)
+        result = (label, os.path.basename(filepath), None)
+    except Exception as e:
+        result = (label, None, f'{type(e).__name__}: {e}')
+    end = time.perf_counter()
+    rendered = rendered or end
+    return result, (os.getpid(), start, rendered - start, end - rendered)
+
+def plan_song(record):
+    """Normalize a record and pick its page filename, returning (data, filename)"""
+    data = normalize_record(record)
+    return data, generate_slug(data['artist'], data['title']) + '.html'
+
+def plan_build(records, out_dir, options, plan=plan_song):
+    """Validate records and assign output files, returning (jobs, failures)
+
+    Two songs that slug to the same filename are reported instead of
+    silently overwriting each other.
+    """
+    jobs = []
+    failures = []
+    seen = {}
+    for index, record in enumerate(records):
+        if not isinstance(record, Mapping):
+            failures.append((f'#{index + 1}', f'not a song record: {record!r:.80}'))
+            continue
+        label = f"#{index + 1} {record.get('title', '?')} - {record.get('artist', '?')}"
+        try:
+            data, filename = plan(record)
+        except (ValueError, KeyError, TypeError) as e:
+            failures.append((label, f'{type(e).__name__}: {e}'))
+            continue
+
+        if filename in seen:
+            failures.append((label, f'{filename} already used by {seen[filename]}'))
+            continue
+        seen[filename] = label
+        jobs.append((label, data, os.path.join(out_dir, filename), options))
+    return jobs, failures
+
+MANIFEST_NAME = '.build-manifest.json'
+
+# Rendered once per build so any change to generate_html invalidates every page
+TEMPLATE_PROBE = {
+    'title': 'Probe',
+    'artist': 'Probe',
+    'videoId': 'aaaaaaaaaaa',
+    'description': 'Probe',
+    'markers': [{'time': '0:01', 'seconds': 1, 'text': 'Probe'}],
+    'links': {'spotify': 'x', 'appleMusic': 'x', 'youtubeMusic': 'x'}
+}
+
+def template_version(options):
+    """Hash of the page template, taken from a rendered probe page"""
+    html = generate_html(TEMPLATE_PROBE, options['external_assets'], options['facade'], options['minify'])
+    return hashlib.sha256(html.encode('utf-8')).hexdigest()[:16]
+
+def record_hash(data):
+    """Stable hash of a normalized song record"""
+    encoded = json.dumps(data, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+def load_manifest(out_dir):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {'template': None, 'songs': {}, 'assets': []}
+
+def save_manifest(out_dir, manifest):
+    with atomic_write(os.path.join(out_dir, MANIFEST_NAME)) as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+def write_if_changed(filepath, content):
+    """Write a file only when its content differs, returning whether it was written"""
+    try:
+        with open(filepath, encoding='utf-8', newline='') as f:
+            if f.read() == content:
+                return False
+    except FileNotFoundError:
+        pass
+    with open(filepath, 'w', encoding='utf-8', newline='') as f:
+        f.write(content)
+    return True
+
+def build_index(jobs, out_dir, shard_size, search=False, thumbnail=index_template.hotlinked_thumbnail):
+    """Regenerate the index pages and grid shards from the planned songs, in catalog order"""
+    cards = []
+    for rank, (label, data, filepath, options) in enumerate(jobs, 1):
+        cards.append({
+            'href': os.path.basename(filepath),
+            'videoId': data['videoId'],
+            'title': data['title'],
+            'artist': data['artist'],
+            'rank': rank
+        })
+    pages = index_template.render_index(cards, shard_size, search, thumbnail)
+    pages.update(index_template.render_grid(cards, shard_size, thumbnail))
+    if len(pages) > 1:
+        os.makedirs(os.path.join(out_dir, index_template.GRID_DIR), exist_ok=True)
+    for filename, content in pages.items():
+        write_if_changed(os.path.join(out_dir, filename), content)
+    return list(pages)
+
+def build(catalog_path, out_dir, workers=None, force=False, prune=False, external_assets=False,
+          facade=False, index=True, shard_size=index_template.DEFAULT_SHARD_SIZE, compress=False, search=False,
+          local_thumbnails=False, thumbnail_source=None, minify=False, headers=False, profiler=None):
+    """Render every changed song in a catalog across a process pool
+
+    Songs unchanged since the build manifest are skipped, failures are
+    collected per song, and the optional outputs match the build flags.
+    """
+    profiler = profiler or build_profile.NULL_PROFILER
+    options = render_options(external_assets, facade, minify)
+    with profiler.stage('load catalog'):
+        records = load_catalog(catalog_path)
+    with profiler.stage('plan'):
+        jobs, failures = plan_build(records, out_dir, options)
+
+    with profiler.stage('check manifest'):
+        manifest = load_manifest(out_dir)
+        version = template_version(options)
+        assets = page_template.write_assets(out_dir, facade, minify) if external_assets else []
+        previous = manifest['songs'] if manifest.get('template') == version and not force else {}
+
+        hashes = {}
+        pending = []
+        skipped = []
+        for job in jobs:
+            label, data, filepath, options = job
+            filename = os.path.basename(filepath)
+            hashes[filename] = record_hash(data)
+            if previous.get(filename) == hashes[filename] and os.path.exists(filepath):
+                skipped.append(filename)
+            else:
+                pending.append(job)
+
+    render = render_song if profiler is build_profile.NULL_PROFILER else profile_song
+    with profiler.stage('render and write'):
+        results = pool_map(render, pending, workers, initializer=build_profile.untrace)
+    if render is profile_song:
+        for result, timing in results:
+            profiler.song(result[0], *timing)
+        results = [result for result, timing in results]
+    profiler.count('songs', len(jobs))
+    profiler.count('rendered', len(pending))
+    profiler.count('unchanged', len(skipped))
+
+    built = []
+    for label, filename, error in results:
+        if error:
+            failures.append((label, error))
+        else:
+            built.append(filename)
+
+    minified = []
+    if minify and built:
+        built_names = set(built)
+        minified = [
+            (os.path.basename(filepath), page_template.minified_savings(data, external_assets, facade))
+            for label, data, filepath, options in pending if os.path.basename(filepath) in built_names
+        ]
+        profiler.count('minified bytes saved', sum(saved for filename, saved in minified))
+
+    thumbnail_files = []
+    thumbnail_failures = []
+    thumbnail = index_template.hotlinked_thumbnail
+    if index and local_thumbnails:
+        fetch = thumbnails.fetcher_for(thumbnail_source)
+        with profiler.stage('thumbnails'):
+            found, thumbnail_failures = thumbnails.build_thumbnails([job[1]['videoId'] for job in jobs], out_dir, fetch)
+        thumbnail_files = sorted(name for info in found.values() for name in info['files'])
+
+        def thumbnail(card):
+            info = found.get(card['videoId'])
+            return thumbnails.picture_html(card, info) if info else index_template.hotlinked_thumbnail(card)
+
+    index_files = []
+    if index:
+        with profiler.stage('index'):
+            index_files = build_index(jobs, out_dir, shard_size, search, thumbnail)
+    search_files = []
+    if search:
+        songs = [(os.path.splitext(os.path.basename(filepath))[0], data) for label, data, filepath, options in jobs]
+        with profiler.stage('search index'):
+            search_files = search_index.update_index(out_dir, songs, rebuild=force)
+
+    new_manifest = {
+        'template': version,
+        'songs': {filename: hashes[filename] for filename in built + skipped},
+        # Copies, since stale files are added to these below but are not this build's outputs.
+        # Without index the index pages and their thumbnails are left alone, so they carry over.
+        'assets': list(assets),
+        'index': list(index_files if index else manifest.get('index', [])),
+        'search': list(search_files),
+        'thumbnails': list(thumbnail_files if index else manifest.get('thumbnails', []))
+    }
+    stale = []
+    removed = []
+    for group, outputs in new_manifest.items():
+        if group == 'template':
+            continue
+        for filename in sorted(set(manifest.get(group, [])) - set(outputs)):
+            filepath = os.path.join(out_dir, filename)
+            if group == 'search' and search and not os.path.exists(filepath):
+                # Shards the search index emptied and deleted itself
+                precompress.remove_compressed(filepath)
+                removed.append(filename)
+                continue
+            stale.append(filename)
+            if prune and not failures:
+                if os.path.exists(filepath):
+                    os.remove(filepath)
+                precompress.remove_compressed(filepath)
+                removed.append(filename)
+            elif group == 'songs':
+                outputs[filename] = manifest['songs'][filename]
+            else:
+                outputs.append(filename)
+        if group != 'songs':
+            outputs.sort()
+
+    if new_manifest != manifest:
+        with profiler.stage('save manifest'):
+            save_manifest(out_dir, new_manifest)
+
+    header_files = 0
+    changed = []
+    if headers:
+        outputs = [filename for group, filenames in new_manifest.items() if group != 'template' for filename in filenames]
+        with profiler.stage('asset manifest'):
+            header_files, changed = cache_headers.write_headers(
+                out_dir, [filename for filename in outputs if os.path.exists(os.path.join(out_dir, filename))]
+            )
+        profiler.count('changed outputs', len(changed))
+
+    compressed = []
+    if compress:
+        outputs = list(new_manifest['songs']) + new_manifest['assets'] + new_manifest['index'] + new_manifest['search']
+        paths = [os.path.join(out_dir, filename) for filename in outputs]
+        with profiler.stage('compress'):
+            compressed = precompress.compress_files([path for path in paths if os.path.exists(path)], workers)
+        profiler.count('compressed', len(compressed))
+
+    return {
+        'built': built,
+        'skipped': skipped,
+        'index': index_files,
+        'search': search_files,
+        'thumbnails': thumbnail_files,
+        'thumbnail_failures': thumbnail_failures,
+        'compressed': compressed,
+        'minified': minified,
+        'assets': assets,
+        'headers': header_files,
+        'changed': changed,
+        'failed': failures,
+        'stale': stale,
+        'removed': removed
+    }
+
+def build_outputs(result, out_dir, headers=False):
+    """Paths of every file a build wrote or deleted, for queuing them to publish"""
+    outputs = (
+        result['built'] + result['index'] + result['search'] + result['thumbnails'] + result['assets'] + result['removed']
+    )
+    if headers:
+        outputs += [cache_headers.MANIFEST_NAME, cache_headers.HEADERS_NAME]
+    paths = [os.path.join(out_dir, filename) for filename in outputs]
+    # The .gz/.br copies written this build, and those deleted with removed files
+    paths += [path + ext for path, raw, gz, br, written in result['compressed'] if written
+              for ext in ('.gz', '.br') if ext == '.gz' or br is not None]
+    paths += [os.path.join(out_dir, filename + ext) for filename in result['removed'] for ext in ('.gz', '.br')]
+    return paths
+
+def build_command(args):
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    out_dir = args.out or repo_dir
+    os.makedirs(out_dir, exist_ok=True)
+    if args.thumbnails and not thumbnails.Image:
+        print('❌ --thumbnails needs Pillow: pip install pillow')
+        return 1
+
+    profiler = build_profile.Profiler(trace_memory=args.profile_memory) if args.profile else None
+    print(f'\n🎵 Building song pages from {args.catalog}\n')
+    result = build(
+        args.catalog, out_dir, args.workers,
+        force=args.force, prune=args.prune, external_assets=args.external_assets, facade=args.facade,
+        index=not args.no_index, shard_size=args.shard_size, compress=args.compress, search=args.search,
+        local_thumbnails=args.thumbnails, thumbnail_source=args.thumbnail_source, minify=args.minify,
+        headers=args.headers, profiler=profiler
+    )
+
+    for label, error in result['failed']:
+        print(f'❌ {label}: {error}')
+    for filename in result['stale']:
+        if filename in result['removed']:
+            print(f'🗑  Removed {filename} (no longer built)')
+        else:
+            print(f'⚠️  {filename} is no longer built')
+    if args.prune and result['failed'] and result['stale']:
+        print('⚠️  Not pruning while some songs failed')
+
+    print(f"\n✅ Built {len(result['built'])} page(s), {len(result['skipped'])} unchanged, in {out_dir}")
+    if result['index']:
+        print(f"📇 Index: {len(result['index'])} page(s)")
+    if result['search']:
+        print(f"🔎 Search index: {len(result['search'])} file(s)")
+    for video_id, error in result['thumbnail_failures']:
+        print(f'⚠️  Thumbnail for {video_id}: {error} (hotlinking it instead)')
+    if result['thumbnails']:
+        print(f"🖼  Thumbnails: {len(result['thumbnails'])} file(s)")
+    if result['minified']:
+        saved = [saved for filename, saved in result['minified']]
+        print(
+            f'✂️  Minifying saved {sum(saved):,} bytes over {len(saved)} page(s): '
+            f'{sum(saved) // len(saved):,} per page on average, {min(saved):,} to {max(saved):,}'
+        )
+    if result['compressed']:
+        print(f"🗜  {precompress.summarize(result['compressed'])}")
+    if args.headers:
+        print(
+            f"🏷  {cache_headers.MANIFEST_NAME}: {result['headers']} file(s), {len(result['changed'])} changed; "
+            f'cache rules in {cache_headers.HEADERS_NAME}'
+        )
+    if os.path.abspath(out_dir) == repo_dir:
+        # Building into the repository itself, so publish commits the rebuilt site with the songs
+        pending = publish_queue.PublishQueue(repo_dir).add_all(build_outputs(result, out_dir, args.headers), 'Rebuild site')
+        print(f'📦 Queued for publishing ({pending} file(s) waiting)')
+    if profiler:
+        profiler.write_trace(args.profile)
+        print(f'\n⏱  Profile (trace written to {args.profile})\n')
+        print(profiler.summary())
+    if result['failed']:
+        print(f"❌ {len(result['failed'])} song(s) failed")
+        return 1
+    return 0
+
+def import_command(args):
+    directory = args.directory or os.path.dirname(os.path.abspath(__file__))
+
+    print(f'\n🎵 Importing song pages from {directory}\n')
+    records, failures, skipped = song_importer.import_directory(directory, args.workers)
+
+    for filename, error in failures:
+        print(f'❌ {filename}: {error}')
+    if skipped:
+        print(f"⏭  Not song pages: {', '.join(skipped)}")
+
+    save_catalog(args.out, records)
+    print(f'\n✅ Imported {len(records)} song(s) into {args.out}')
+    if failures:
+        print(f'❌ {len(failures)} page(s) need attention')
+        return 1
+    return 0
+
+def convert_command(args):
+    records = load_catalog(args.catalog)
+    save_catalog(args.out, records)
+    print(f'✅ Wrote {len(records)} song(s) to {args.out}')
+    return 0
+
+def find_songs(catalog_path, slugs):
+    """{slug: record} for the wanted slugs, without loading a .songs catalog"""
+    if os.path.splitext(catalog_path)[1].lower() == '.songs':
+        with song_model.BinaryCatalog(catalog_path) as catalog:
+            found = {slug: catalog.find(slug) for slug in slugs}
+        return {slug: song for slug, song in found.items() if song}
+    wanted = set(slugs)
+    found = {}
+    for record in load_catalog(catalog_path):
+        slug = generate_slug(record.get('artist', ''), record.get('title', ''))
+        if slug in wanted:
+            found[slug] = record
+    return found
+
+def render_command(args):
+    out_dir = args.out or os.path.dirname(os.path.abspath(__file__))
+    os.makedirs(out_dir, exist_ok=True)
+    slugs = [slug[:-len('.html')] if slug.endswith('.html') else slug for slug in args.slugs]
+    found = find_songs(args.catalog, slugs)
+    options = render_options(args.external_assets, args.facade, args.minify)
+    if args.external_assets:
+        page_template.write_assets(out_dir, args.facade, args.minify)
+
+    failed = 0
+    for slug in slugs:
+        if slug not in found:
+            print(f'❌ {slug}: not in {args.catalog}')
+            failed += 1
+            continue
+        try:
+            data, filename = plan_song(found[slug])
+        except (ValueError, KeyError, TypeError) as e:
+            print(f'❌ {slug}: {type(e).__name__}: {e}')
+            failed += 1
+            continue
+        label, filename, error = render_song((slug, data, os.path.join(out_dir, filename), options))
+        if error:
+            print(f'❌ {slug}: {error}')
+            failed += 1
+        elif args.minify:
+            print(f'✅ {filename} ({page_template.minified_savings(data, args.external_assets, args.facade):,} bytes saved by minifying)')
+        else:
+            print(f'✅ {filename}')
+    return 1 if failed else 0
+
+def compress_command(args):
+    directory = args.directory or os.path.dirname(os.path.abspath(__file__))
+
+    print(f'\n🗜  Precompressing files in {directory}\n')
+    for path in precompress.remove_orphans(directory):
+        print(f'🗑  Removed {os.path.relpath(path, directory)} (source is gone)')
+    results = precompress.compress_files(precompress.find_compressible(directory), args.workers)
+
+    print(precompress.format_report(results, directory))
+    if not precompress.brotli:
+        print('\n⚠️  brotli is not installed, so only .gz files were written')
+    print(f'\n✅ {precompress.summarize(results)}')
+    return 0
+
+def song_loader(catalog_path):
+    """load_songs for the dev server, reusing work from the previous load
+
+    Records equal to last time are not planned again, and unchanged lines
+    of a .jsonl catalog are not even parsed again, so one edit in a large
+    catalog costs little more than reading the file.
+    """
+    lines = {}
+    planned = {}
+    loaded = {}
+
+    def plan(record):
+        key = (record.get('title'), record.get('artist'))
+        previous = planned.get(key)
+        if previous and (previous[0] is record or previous[0] == record):
+            result = previous[1]
+        else:
+            result = plan_song(record)
+        loaded[key] = (record, result)
+        return result
+
+    def load_records():
+        if os.path.splitext(catalog_path)[1].lower() != '.jsonl':
+            return load_catalog(catalog_path)
+        with open(catalog_path, encoding='utf-8') as f:
+            text = [line for line in f if line.strip()]
+        records = [lines[line] if line in lines else json.loads(line) for line in text]
+        lines.clear()
+        lines.update(zip(text, records))
+        return records
+
+    def load_songs():
+        records = load_records()
+        loaded.clear()
+        # Planned against an empty directory, so the job paths are bare filenames
+        jobs, failures = plan_build(records, '', {}, plan)
+        planned.clear()
+        planned.update(loaded)
+        return [(filename, data) for label, data, filename, options in jobs], failures
+
+    return load_songs
+
+def serve_command(args):
+    root = args.root or os.path.dirname(os.path.abspath(__file__))
+    load_songs = song_loader(args.catalog)
+
+    print(f'\n🎵 Serving song pages from {args.catalog}\n')
+    try:
+        dev_server.serve(args.catalog, root, load_songs, args.port, facade=args.facade, shard_size=args.shard_size)
+    except KeyboardInterrupt:
+        print('\n👋 Stopped')
+    return 0
+
+def publish_command(args):
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    queue = publish_queue.PublishQueue(repo_dir, push=not args.no_push)
+    pending = queue.pending()
+
+    if args.list:
+        for path, message in pending:
+            print(f'📄 {path}: {message}')
+        print(f'\n{len(pending)} song(s) waiting')
+        return 0
+
+    print(f'\n📦 Publishing {len(pending)} queued song(s)\n')
+    try:
+        result = queue.flush(lambda stage, detail=None: print(f'⏳ {stage.capitalize()}...'))
+    except publish_queue.PublishError as e:
+        print(f'❌ {e}')
+        return 1
+
+    if result['committed']:
+        print(f"\n✅ Committed {len(result['published'])} song(s) in one commit")
+    elif result['published']:
+        print('\n✅ Queued pages were already committed')
+    if result['pushed']:
+        print('🚀 Pushed to GitHub')
+    elif not result['published']:
+        print('✅ Nothing to publish')
+    return 0
+
+def check_links_command(args):
+    jobs, failures = plan_build(load_catalog(args.catalog), '', {})
+    for label, error in failures:
+        print(f'❌ {label}: {error}')
+    songs = [(label, data) for label, data, filename, options in jobs]
+    cache_path = args.cache or os.path.join(os.path.dirname(os.path.abspath(args.catalog)), link_checker.CACHE_NAME)
+
+    def progress(done, total):
+        if done == total or done % 50 == 0:
+            print(f'⏳ Checked {done}/{total} link(s)')
+
+    print(f'\n🔗 Checking links in {args.catalog}\n')
+    report = link_checker.validate(
+        songs, cache_path, video_url=args.video_url, ttl=args.ttl * 3600, refresh=args.refresh,
+        concurrency=args.concurrency, per_host=args.per_host, rate=args.rate, timeout=args.timeout,
+        progress=progress
+    )
+
+    for label, field, url, reason in report['dead']:
+        print(f'💀 {label} [{field}] {url}: {reason}')
+    for label, field, url, reason in report['errors']:
+        print(f'⚠️  {label} [{field}] {url}: {reason}')
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                kind: [{'song': label, 'field': field, 'url': url, 'reason': reason} for label, field, url, reason in report[kind]]
+                for kind in ('dead', 'errors')
+            }, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+
+    print(f"\n✅ Checked {report['checked']} URL(s) in {report['requests']} request(s), {report['cached']} from cache")
+    if report['errors']:
+        print(f"⚠️  {len(report['errors'])} link(s) could not be checked; they are retried next run")
+    if report['dead'] or failures:
+        print(f"❌ {len(report['dead'])} dead link(s)")
+        return 1
+    return 0
+
+def process_submissions(entries, repo_dir, catalog, queue, profiler=None):
+    """Render, catalog and queue one batch of submitted records
+
+    A record for a song already in the catalog updates it in place, but
+    one reusing another song's video is rejected. Any exception is
+    reported against its record, so one bad submission cannot stop the
+    batch. Returns (written filenames, [(label, error)]).
+    """
+    profiler = profiler or build_profile.NULL_PROFILER
+    written = []
+    failures = []
+    for line_offset, record, error in entries:
+        label = f"byte {line_offset}" + (f" {record.get('title', '?')} - {record.get('artist', '?')}" if record else '')
+        if error:
+            failures.append((label, error))
+            continue
+        try:
+            data, filename = plan_song(record)
+            slug = filename[:-len('.html')]
+            existing = catalog.find_video(data['videoId'])
+            if existing and existing['slug'] != slug:
+                failures.append((label, f"video {data['videoId']} is already used by {existing['title']} by {existing['artist']}"))
+                continue
+
+            filepath = os.path.join(repo_dir, filename)
+            job = (label, data, filepath, render_options())
+            if profiler is build_profile.NULL_PROFILER:
+                label, filename, error = render_song(job)
+            else:
+                (label, filename, error), timing = profile_song(job)
+                profiler.song(label, *timing)
+            if error:
+                failures.append((label, error))
+                continue
+            catalog.add(slug, data, replace=True)
+            queue.add(filepath, f"Add {data['title']} by {data['artist']}")
+        except Exception as e:
+            failures.append((label, f'{type(e).__name__}: {e}'))
+            continue
+        written.append(filename)
+    return written, failures
+
+def worker_command(args):
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    requests_path = args.requests or os.path.join(repo_dir, submission_queue.REQUESTS_NAME)
+    queue = publish_queue.PublishQueue(repo_dir, push=not args.no_push)
+    catalog = song_catalog.SongCatalog(args.catalog or song_catalog.DEFAULT_PATH)
+
+    profiler = build_profile.Profiler(trace_memory=args.profile_memory) if args.profile else build_profile.NULL_PROFILER
+
+    def process(entries):
+        with profiler.stage('render and write'):
+            written, failures = process_submissions(entries, repo_dir, catalog, queue, profiler)
+        profiler.count('submissions', len(entries))
+        profiler.count('rendered', len(written))
+        for label, error in failures:
+            print(f'❌ {label}: {error}')
+        for filename in written:
+            print(f'✅ {filename}')
+        if written and args.publish:
+            try:
+                with profiler.stage('git commit and push'):
+                    result = queue.flush()
+            except publish_queue.PublishError as e:
+                print(f'❌ {e} (pages stay queued)')
+                return
+            print(f"🚀 Published {len(result['published'])} song(s) in one commit" + ('' if result['pushed'] else ' (not pushed)'))
+        elif written:
+            print(f'📦 {len(queue.pending())} song(s) queued for publishing')
+
+    print(f'\n📥 Watching {requests_path} for submitted songs' + ('' if args.follow else ' (once)') + '\n')
+    try:
+        submission_queue.run(
+            requests_path, process, follow=args.follow, batch_window=args.batch_window,
+            report=lambda count: print(f'\n📥 {count} new submission(s)')
+        )
+    except KeyboardInterrupt:
+        print('\n👋 Stopped')
+    finally:
+        catalog.close()
+        if args.profile:
+            profiler.write_trace(args.profile)
+            print(f'\n⏱  Profile (trace written to {args.profile})\n')
+            print(profiler.summary())
+    return 0
+
+def cli(argv):
+    parser = argparse.ArgumentParser(prog='add-song.py', description='Add songs or rebuild the site')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = commands.add_parser('build', help='render every song in a catalog file')
+    build_parser.add_argument('catalog', help='catalog file (.json, .jsonl, .csv, .db or .songs)')
+    build_parser.add_argument('-o', '--out', help='output directory (default: next to this script)')
+    build_parser.add_argument('-j', '--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    build_parser.add_argument('--force', action='store_true', help='re-render every song, ignoring the build manifest')
+    build_parser.add_argument('--prune', action='store_true', help='delete pages whose songs were removed from the catalog')
+    build_parser.add_argument('--external-assets', action='store_true', help='link shared, content-hashed CSS/JS files instead of inlining them')
+    build_parser.add_argument('--facade', action='store_true', help='show a thumbnail and load the YouTube player on first click')
+    build_parser.add_argument('--minify', action='store_true', help='strip formatting whitespace from page markup, CSS and scripts')
+    build_parser.add_argument('--no-index', action='store_true', help='leave index.html alone')
+    build_parser.add_argument('--shard-size', type=int, default=index_template.DEFAULT_SHARD_SIZE, help='songs per index page (default: %(default)s)')
+    build_parser.add_argument('--compress', action='store_true', help='write .gz/.br copies of every output for static hosting')
+    build_parser.add_argument('--headers', action='store_true', help='write asset-manifest.json (content hashes) and a _headers file of cache policies for static hosts')
+    build_parser.add_argument('--search', action='store_true', help='write a client-side search index and add a search box to the index')
+    build_parser.add_argument('--thumbnails', action='store_true', help='serve cached, resized thumbnails instead of hotlinking YouTube (needs Pillow)')
+    build_parser.add_argument('--thumbnail-source', help='directory of <videoId>.jpg files or a URL template with {id} (default: YouTube)')
+    build_parser.add_argument('--profile', metavar='TRACE_JSON', help='time every stage and song, write a Chrome trace here and print the slowest')
+    build_parser.add_argument('--no-profile-memory', dest='profile_memory', action='store_false', help='with --profile, skip tracemalloc, which slows the main process down')
+    build_parser.set_defaults(func=build_command)
+
+    import_parser = commands.add_parser('import', help='parse existing song pages into a catalog file')
+    import_parser.add_argument('directory', nargs='?', help='directory of song pages (default: next to this script)')
+    import_parser.add_argument('-o', '--out', default='songs.json', help='catalog file to write (default: %(default)s)')
+    import_parser.add_argument('-j', '--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    import_parser.set_defaults(func=import_command)
+
+    render_parser = commands.add_parser('render', help='render only the given songs from a catalog file')
+    render_parser.add_argument('catalog', help='catalog file (.json, .jsonl, .csv, .db or .songs)')
+    render_parser.add_argument('slugs', nargs='+', help='slugs (or page filenames) of the songs to render')
+    render_parser.add_argument('-o', '--out', help='output directory (default: next to this script)')
+    render_parser.add_argument('--external-assets', action='store_true', help='link shared, content-hashed CSS/JS files instead of inlining them')
+    render_parser.add_argument('--facade', action='store_true', help='show a thumbnail and load the YouTube player on first click')
+    render_parser.add_argument('--minify', action='store_true', help='strip formatting whitespace from page markup, CSS and scripts')
+    render_parser.set_defaults(func=render_command)
+
+    convert_parser = commands.add_parser('convert', help='copy a catalog into another format, e.g. the memory-mapped .songs format')
+    convert_parser.add_argument('catalog', help='catalog file to read (.json, .jsonl, .csv, .db or .songs)')
+    convert_parser.add_argument('out', help='catalog file to write; the extension picks the format')
+    convert_parser.set_defaults(func=convert_command)
+
+    compress_parser = commands.add_parser('compress', help='write .gz/.br copies of every HTML/CSS/JS file in a directory')
+    compress_parser.add_argument('directory', nargs='?', help='site directory (default: next to this script)')
+    compress_parser.add_argument('-j', '--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    compress_parser.set_defaults(func=compress_command)
+
+    serve_parser = commands.add_parser('serve', help='serve the site from memory, re-rendering songs as the catalog changes')
+    serve_parser.add_argument('catalog', help='catalog file (.json, .jsonl, .csv, .db or .songs)')
+    serve_parser.add_argument('-p', '--port', type=int, default=8000, help='port to listen on (default: %(default)s)')
+    serve_parser.add_argument('--root', help='directory for everything else the pages link to (default: next to this script)')
+    serve_parser.add_argument('--facade', action='store_true', help='show a thumbnail and load the YouTube player on first click')
+    serve_parser.add_argument('--shard-size', type=int, default=index_template.DEFAULT_SHARD_SIZE, help='songs per index page (default: %(default)s)')
+    serve_parser.set_defaults(func=serve_command)
+
+    publish_parser = commands.add_parser('publish', help='commit every queued song page in one commit and push once')
+    publish_parser.add_argument('--no-push', action='store_true', help='commit without pushing')
+    publish_parser.add_argument('--list', action='store_true', help='show the queued pages without publishing')
+    publish_parser.set_defaults(func=publish_command)
+
+    check_parser = commands.add_parser('check-links', help='find dead YouTube videos and streaming links in a catalog')
+    check_parser.add_argument('catalog', help='catalog file (.json, .jsonl, .csv, .db or .songs)')
+    check_parser.add_argument('--json', help='also write the dead and unchecked links to this JSON file')
+    check_parser.add_argument('--cache', help=f'result cache file (default: {link_checker.CACHE_NAME} next to the catalog)')
+    check_parser.add_argument('--ttl', type=float, default=link_checker.DEFAULT_TTL / 3600, help='hours to trust a cached result (default: %(default)g)')
+    check_parser.add_argument('--refresh', action='store_true', help='ignore the cache and check everything again')
+    check_parser.add_argument('--concurrency', type=int, default=link_checker.DEFAULT_CONCURRENCY, help='checks in flight at once (default: %(default)s)')
+    check_parser.add_argument('--per-host', type=int, default=link_checker.DEFAULT_PER_HOST, help='open connections per host (default: %(default)s)')
+    check_parser.add_argument('--rate', type=float, default=link_checker.DEFAULT_RATE, help='requests per second per host (default: %(default)g)')
+    check_parser.add_argument('--timeout', type=float, default=link_checker.DEFAULT_TIMEOUT, help='seconds per request (default: %(default)g)')
+    check_parser.add_argument('--video-url', default=link_checker.VIDEO_URL, help='URL template with {id} used to check video IDs (default: YouTube oEmbed)')
+    check_parser.set_defaults(func=check_links_command)
+
+    worker_parser = commands.add_parser('worker', help='render songs appended to requests.jsonl as they arrive')
+    worker_parser.add_argument('requests', nargs='?', help=f'JSONL file of song records (default: {submission_queue.REQUESTS_NAME} next to this script)')
+    worker_parser.add_argument('--once', dest='follow', action='store_false', help='process what is already there and exit instead of waiting for more')
+    worker_parser.add_argument('--publish', action='store_true', help='commit and push every batch once it is written')
+    worker_parser.add_argument('--no-push', action='store_true', help='with --publish, commit without pushing')
+    worker_parser.add_argument('--catalog', help='SQLite catalog to record songs in (default: songs.db next to this script)')
+    worker_parser.add_argument('--batch-window', type=float, default=submission_queue.BATCH_WINDOW, help='seconds without new submissions that end a batch (default: %(default)g)')
+    worker_parser.add_argument('--profile', metavar='TRACE_JSON', help='time every batch, song and publish, and write a Chrome trace here on exit')
+    worker_parser.add_argument('--no-profile-memory', dest='profile_memory', action='store_false', help='with --profile, skip tracemalloc, which slows the worker down')
+    worker_parser.set_defaults(func=worker_command)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
 
 if __name__ == '__main__':
     try:
+        if len(sys.argv) > 1:
+            sys.exit(cli(sys.argv[1:]))
         main()
     except KeyboardInterrupt:
         print('\n\n❌ Cancelled')
+        sys.exit(130)
     except Exception as e:
         print(f'\n❌ Error: {e}')
+        sys.exit(1)
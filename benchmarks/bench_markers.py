@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark writing pages with 10 to 100,000 markers
+
+Compares the original f-string generate_html, page_template.render_page
+and the streaming page_template.write_page on time and peak memory.
+
+Usage: python benchmarks/bench_markers.py [--counts 10,100,1000]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import page_template
+import legacy_page
+from bench_template import sample_song
+
+def write_legacy(song, f):
+    f.write(legacy_page.generate_html(song))
+
+def write_rendered(song, f):
+    f.write(page_template.render_page(song))
+
+def write_streamed(song, f):
+    page_template.write_page(song, f)
+
+WRITERS = [
+    ('f-string generate_html', write_legacy),
+    ('render_page', write_rendered),
+    ('write_page (streaming)', write_streamed)
+]
+
+def measure(writer, song, path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    with open(path, 'w', encoding='utf-8') as f:
+        writer(song, f)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--counts', default='10,100,1000,10000,100000')
+    args = parser.parse_args()
+
+    print(f"{'markers':>8}  {'writer':<24} {'ms':>9} {'peak KB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'page.html')
+        # Write once with each writer first, so no row includes compiling the template
+        for name, writer in WRITERS:
+            measure(writer, sample_song(1, 1), path)
+        for count in [int(c) for c in args.counts.split(',')]:
+            song = sample_song(1, count)
+            for name, writer in WRITERS:
+                elapsed, peak = measure(writer, song, path)
+                print(f'{count:>8}  {name:<24} {elapsed * 1000:>9.2f} {peak / 1024:>9.0f}')
+
+if __name__ == '__main__':
+    main()
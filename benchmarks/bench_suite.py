@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Benchmark the page generation hot path on synthetic catalogs
+
+Measures generate_html, generate_slug, extract_youtube_id, time_to_seconds
+and the end-to-end render-and-write path on catalogs of 10 up to 1,000,000
+songs with varied marker counts and Unicode-heavy names. Each benchmark
+reports throughput, p50/p95/p99 latency and the peak memory allocated by a
+single call. Songs are generated lazily from a fixed seed, so large
+catalogs never sit in memory and every run sees the same input.
+
+Each benchmark runs --repeat times and every metric keeps its best
+value, since one slow run says more about the machine than the code.
+By default peak memory is compared against benchmarks/baseline.json,
+recorded at the default sizes, and the run fails on any regression beyond
+the threshold. Timings depend on the machine, so they are only compared
+against a baseline you record yourself: run with --save before.json, make
+the change, then run with --baseline before.json.
+
+Usage: python benchmarks/bench_suite.py [--sizes 10,1000] [--full] [--repeat N]
+           [--save baseline.json] [--baseline baseline.json --threshold 0.2]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import importlib.util
+from array import array
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import song_core
+
+spec = importlib.util.spec_from_file_location('add_song', os.path.join(ROOT, 'add-song.py'))
+add_song = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(add_song)
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+FULL_SIZES = [10, 100, 1000, 10000, 100000, 1000000]
+CHUNK_SIZE = 5000
+MEMORY_SAMPLE = 200
+WARMUP_CALLS = 20
+MIN_TIMED_CALLS = 1000
+OUTPUT_SLOTS = 1000
+SEED = 1234
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+NAME_PARTS = [
+    'Sigur Rós', 'Björk', 'Motörhead', 'Beyoncé', 'Mötley Crüe', 'Héroes del Silencio',
+    'Кино', 'Сплин', 'Ёлка', 'Ария', 'Μάνος Χατζιδάκις', 'Βαγγέλης',
+    '坂本龍一', '宇多田ヒカル', 'あいみょん', '周杰倫', '王菲', '방탄소년단', '아이유',
+    'فيروز', 'عمرو دياب', 'שלמה ארצי', 'ए. आर. रहमान', 'ลาบานูน',
+    'Queen', 'Radiohead', 'The Beatles', 'AC/DC', 'Guns N\' Roses', 'P!nk',
+    '🔥', '✨', '♥', '—', '&', 'feat.', 'Vol. 2', '(Live)', '[Remastered 2011]'
+]
+MARKER_TEXTS = [
+    'The riff kicks in', 'Écoute la basse ici', 'Припев', 'サビ', '副歌', '후렴',
+    'Guitar solo 🎸', 'Key change &mdash; up a step', 'Drums <em>drop out</em>',
+    'La voz sube una octava', 'Outro ✨', 'Bridge'
+]
+MARKER_COUNTS = [1, 2, 3, 5, 8, 12, 20, 40, 100, 400]
+MARKER_WEIGHTS = [10, 10, 15, 20, 15, 12, 9, 5, 3, 1]
+VIDEO_FORMATS = [
+    '{id}',
+    'https://www.youtube.com/watch?v={id}',
+    'https://youtube.com/watch?v={id}&t=42s',
+    'https://youtu.be/{id}',
+    'https://www.youtube.com/embed/{id}',
+    'https://m.youtube.com/watch?v={id}&list=PL123'
+]
+ID_CHARS = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_'
+
+def synthetic_songs(count, seed=SEED):
+    """Yield count catalog records, the same ones for the same seed"""
+    rng = random.Random(seed)
+    for index in range(count):
+        video_id = ''.join(rng.choice(ID_CHARS) for _ in range(11))
+        marker_count = rng.choices(MARKER_COUNTS, MARKER_WEIGHTS)[0]
+        seconds = sorted(rng.sample(range(marker_count * 20 + 60), marker_count))
+        yield {
+            'title': ' '.join(rng.sample(NAME_PARTS, rng.randint(1, 4))) + f' {index}',
+            'artist': ' '.join(rng.sample(NAME_PARTS, rng.randint(1, 3))),
+            'videoId': rng.choice(VIDEO_FORMATS).format(id=video_id),
+            'description': ' '.join(rng.choices(MARKER_TEXTS, k=rng.randint(0, 12))),
+            'markers': [
+                {'time': f'{s // 60}:{s % 60:02d}', 'text': rng.choice(MARKER_TEXTS)}
+                for s in seconds
+            ],
+            'links': {
+                'spotify': 'https://open.spotify.com/track/x' if index % 3 else '',
+                'appleMusic': 'https://music.apple.com/x' if index % 2 else '',
+                'youtubeMusic': f'https://music.youtube.com/watch?v={video_id}'
+            }
+        }
+
+# Each benchmark turns a record into the argument tuples it times, and
+# names the function that gets called with them
+
+def time_inputs(record):
+    return [(marker['time'],) for marker in record['markers']]
+
+def video_inputs(record):
+    return [(record['videoId'],)]
+
+def slug_inputs(record):
+    return [(record['artist'], record['title'])]
+
+def page_inputs(record):
+    return [(add_song.normalize_record(record),)]
+
+def write_inputs(record):
+    return [(record,)]
+
+def render_and_write(record):
+    """What build does for one song: plan it, then render and write the page"""
+    data, filename = add_song.plan_song(record)
+    slot = render_and_write.count % OUTPUT_SLOTS
+    render_and_write.count += 1
+    # A fixed pool of output files keeps million-song runs off the disk quota
+    label, filename, error = add_song.render_song(
+        (filename, data, os.path.join(render_and_write.out_dir, f'page-{slot}.html'), add_song.render_options())
+    )
+    if error:
+        raise RuntimeError(error)
+
+BENCHMARKS = {
+    'time_to_seconds': (time_inputs, song_core.time_to_seconds),
+    'extract_youtube_id': (video_inputs, song_core.extract_youtube_id),
+    'generate_slug': (slug_inputs, song_core.generate_slug),
+    'generate_html': (page_inputs, song_core.generate_html),
+    'render_and_write': (write_inputs, render_and_write)
+}
+
+def chunks(songs, size):
+    chunk = []
+    for song in songs:
+        chunk.append(song)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def peak_memory(function, calls):
+    """Largest peak allocation of a single call, in KB"""
+    tracemalloc.start()
+    peak = 0
+    for args in calls:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        function(*args)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+    return peak / 1024
+
+def run_benchmark(name, size, seed=SEED):
+    """Time every call of one benchmark over a catalog of size songs"""
+    make_inputs, function = BENCHMARKS[name]
+    timings = array('q')
+    sample = []
+    timer = time.perf_counter_ns
+
+    for chunk in chunks(synthetic_songs(size, seed), CHUNK_SIZE):
+        calls = [args for record in chunk for args in make_inputs(record)]
+        if not sample:
+            for args in calls[:WARMUP_CALLS]:
+                function(*args)
+        if len(sample) < MEMORY_SAMPLE:
+            sample += calls[:MEMORY_SAMPLE - len(sample)]
+        for args in calls:
+            start = timer()
+            function(*args)
+            timings.append(timer() - start)
+
+    ordered = sorted(timings)
+    total = sum(ordered)
+    return {
+        'calls': len(ordered),
+        'ops_per_sec': len(ordered) / (total / 1e9) if total else 0.0,
+        'p50_us': percentile(ordered, 0.50) / 1000,
+        'p95_us': percentile(ordered, 0.95) / 1000,
+        'p99_us': percentile(ordered, 0.99) / 1000,
+        'peak_kb': peak_memory(function, sample)
+    }
+
+def best_of(runs):
+    """The best value of every metric across repeated runs of one benchmark"""
+    best = dict(runs[0])
+    for run in runs[1:]:
+        for metric, value in run.items():
+            best[metric] = max(best[metric], value) if metric == 'ops_per_sec' else min(best[metric], value)
+    return best
+
+# For each metric, whether a bigger number is better. Timings from runs
+# with fewer than MIN_TIMED_CALLS calls are too noisy to compare.
+METRICS = {'ops_per_sec': True, 'p95_us': False, 'peak_kb': False}
+TIMED_METRICS = {'ops_per_sec', 'p95_us'}
+
+def regressions(results, baseline, threshold, metrics=METRICS):
+    """(key, metric, baseline value, new value) for every metric beyond threshold"""
+    found = []
+    for key, result in results.items():
+        previous = baseline.get(key)
+        if not previous:
+            continue
+        for metric, higher_is_better in metrics.items():
+            old, new = previous[metric], result[metric]
+            if not old or (metric in TIMED_METRICS and result['calls'] < MIN_TIMED_CALLS):
+                continue
+            change = (old - new) / old if higher_is_better else (new - old) / old
+            if change > threshold:
+                found.append((key, metric, old, new))
+    return found
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)), help='catalog sizes (default: %(default)s)')
+    parser.add_argument('--full', action='store_true', help='run every size from 10 to 1,000,000 songs')
+    parser.add_argument('--only', help='comma-separated benchmarks to run (default: all)')
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--repeat', type=int, default=3, help='runs per benchmark, keeping the best (default: %(default)s)')
+    parser.add_argument('--save', help='write the results to this JSON baseline file')
+    parser.add_argument('--baseline', default=BASELINE_PATH,
+                        help='compare against this JSON baseline and fail on regressions (default: %(default)s)')
+    parser.add_argument('--no-baseline', dest='baseline', action='store_const', const=None,
+                        help='do not compare against a baseline')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed regression as a fraction (default: %(default)s)')
+    args = parser.parse_args()
+
+    sizes = FULL_SIZES if args.full else [int(size) for size in args.sizes.split(',')]
+    names = args.only.split(',') if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        sys.exit(f"❌ Unknown benchmark(s): {', '.join(unknown)}")
+
+    results = {}
+    print(f"{'songs':>8}  {'benchmark':<20} {'calls':>9} {'ops/s':>11} {'p50 us':>9} {'p95 us':>9} {'p99 us':>9} {'peak KB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        render_and_write.out_dir = tmp
+        render_and_write.count = 0
+        for size in sizes:
+            for name in names:
+                result = best_of([run_benchmark(name, size, args.seed) for _ in range(args.repeat)])
+                results[f'{size}/{name}'] = result
+                print(f"{size:>8}  {name:<20} {result['calls']:>9} {result['ops_per_sec']:>11.0f} "
+                      f"{result['p50_us']:>9.2f} {result['p95_us']:>9.2f} {result['p99_us']:>9.2f} {result['peak_kb']:>9.1f}")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'seed': args.seed,
+                'results': results
+            }, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'\n💾 Saved baseline to {args.save}')
+
+    if args.baseline and not os.path.exists(args.baseline):
+        print(f'\n⚠️  No baseline at {args.baseline}; record one with --save {args.baseline}')
+    elif args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('seed') != args.seed:
+            print(f"⚠️  Baseline was recorded with seed {baseline.get('seed')}, not {args.seed}")
+        if baseline.get('python', '').rsplit('.', 1)[0] != platform.python_version().rsplit('.', 1)[0]:
+            print(f"⚠️  Baseline was recorded with Python {baseline.get('python')}, whose memory use may differ")
+        metrics = METRICS
+        if os.path.abspath(args.baseline) == BASELINE_PATH:
+            metrics = {metric: higher_is_better for metric, higher_is_better in METRICS.items() if metric not in TIMED_METRICS}
+            print('\nℹ️  Comparing peak memory only; compare timings against a baseline recorded on this machine')
+        found = regressions(results, baseline['results'], args.threshold, metrics)
+        for key, metric, old, new in found:
+            print(f'❌ {key} {metric}: {old:.2f} -> {new:.2f}')
+        if found:
+            sys.exit(f'\n❌ {len(found)} regression(s) beyond {args.threshold:.0%}')
+        print(f'\n✅ No regressions beyond {args.threshold:.0%} against {args.baseline}')
+
+if __name__ == '__main__':
+    main()
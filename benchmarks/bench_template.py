@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark page_template.render_page against the original f-string generate_html
+
+Each renderer is timed over the same pages --repeat times, alternating
+between them, and the best run of each is compared. Exits non-zero when
+page_template is slower than the f-string.
+
+Usage: python benchmarks/bench_template.py [--pages N] [--markers N] [--repeat N]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import page_template
+import song_importer
+import legacy_page
+
+def sample_song(index, marker_count):
+    return {
+        'title': f'Song {index}',
+        'artist': 'Artist ' + 'x' * (index % 7),
+        'videoId': 'MDBykpSXsSE',
+        'description': 'Beauty meets brutality. ' * 4,
+        'markers': [
+            {'time': f'{m // 60}:{m % 60:02d}', 'seconds': m, 'text': f'Listen for part {m}'}
+            for m in range(marker_count)
+        ],
+        'links': {
+            'spotify': 'https://open.spotify.com/track/x',
+            'appleMusic': '' if index % 2 else 'https://music.apple.com/x',
+            'youtubeMusic': 'https://music.youtube.com/watch?v=x'
+        }
+    }
+
+def pages_per_second(render, songs):
+    start = time.perf_counter()
+    for song in songs:
+        render(song)
+    return len(songs) / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pages', type=int, default=20000)
+    parser.add_argument('--markers', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=15)
+    args = parser.parse_args()
+
+    songs = [sample_song(i, args.markers) for i in range(args.pages)]
+    # The player script and marker timeline have changed since, so compare what the pages show
+    for song in songs[:50]:
+        if song_importer.parse_page(page_template.render_page(song)) != song_importer.parse_page(legacy_page.generate_html(song)):
+            sys.exit(f"❌ Output differs for {song['title']}")
+
+    legacy = compiled = 0
+    for _ in range(args.repeat):
+        legacy = max(legacy, pages_per_second(legacy_page.generate_html, songs))
+        compiled = max(compiled, pages_per_second(page_template.render_page, songs))
+
+    print(f'{args.pages} pages, {args.markers} markers each, best of {args.repeat}')
+    print(f'  f-string generate_html: {legacy:10.0f} pages/s')
+    print(f'  page_template:          {compiled:10.0f} pages/s  ({compiled / legacy:.2f}x)')
+    if compiled < legacy:
+        sys.exit('❌ page_template is slower than the f-string it replaced')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Build profile - per-stage and per-song timings, exported as a Chrome trace
+
+Each stage of a run is timed with perf_counter, and its peak memory is
+taken from tracemalloc, whose peak is reset as the stage starts. Songs
+rendered in worker processes are timed there and handed back with their
+results, split into rendering and writing. write_trace saves everything as
+Chrome trace-event JSON, with one track per process, to open in
+chrome://tracing or https://ui.perfetto.dev. summary gives a plain-text
+table of the stages and the slowest songs. tracemalloc slows the main
+process down a lot, so stage times are only comparable between runs
+made with the same setting. Worker processes stop tracing as they start,
+so song times are not affected.
+"""
+
+import os
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+from common import atomic_write
+
+SLOWEST_SONGS = 10
+
+def untrace():
+    """Process pool initializer: forked workers would otherwise keep tracing allocations"""
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+class Profiler:
+    def __init__(self, trace_memory=True):
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self.trace_memory = trace_memory
+        self.stages = []
+        self.songs = []
+        self.counts = {}
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name):
+        """Time the block as one stage; stages should not be nested"""
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] if self.trace_memory else None
+            self.stages.append((name, start, duration, peak))
+
+    def song(self, label, pid, start, render, write):
+        """Record one song's render and write times (seconds), measured in process pid"""
+        self.songs.append((label, pid, start, render, write))
+
+    def count(self, name, value):
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    def micros(self, seconds):
+        return round((seconds - self.origin) * 1e6, 1)
+
+    def trace_events(self):
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': self.pid, 'args': {'name': 'main'}}]
+        for pid in sorted({pid for label, pid, start, render, write in self.songs} - {self.pid}):
+            events.append({'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': f'worker {pid}'}})
+
+        for name, start, duration, peak in self.stages:
+            args = {'peak_memory_kb': peak // 1024} if peak is not None else {}
+            events.append({
+                'name': name, 'cat': 'stage', 'ph': 'X', 'pid': self.pid, 'tid': 0,
+                'ts': self.micros(start), 'dur': round(duration * 1e6, 1), 'args': args
+            })
+            if peak is not None:
+                events.append({
+                    'name': 'peak memory', 'ph': 'C', 'pid': self.pid, 'tid': 0,
+                    'ts': self.micros(start + duration), 'args': {'KB': peak // 1024}
+                })
+
+        for label, pid, start, render, write in self.songs:
+            tid = 1 if pid == self.pid else 0
+            events.append({
+                'name': label, 'cat': 'song', 'ph': 'X', 'pid': pid, 'tid': tid,
+                'ts': self.micros(start), 'dur': round((render + write) * 1e6, 1)
+            })
+            events.append({
+                'name': 'render', 'cat': 'song', 'ph': 'X', 'pid': pid, 'tid': tid,
+                'ts': self.micros(start), 'dur': round(render * 1e6, 1)
+            })
+            events.append({
+                'name': 'write', 'cat': 'song', 'ph': 'X', 'pid': pid, 'tid': tid,
+                'ts': self.micros(start + render), 'dur': round(write * 1e6, 1)
+            })
+        return events
+
+    def write_trace(self, path):
+        with atomic_write(path) as f:
+            json.dump({
+                'traceEvents': self.trace_events(),
+                'displayTimeUnit': 'ms',
+                'otherData': self.counts
+            }, f, ensure_ascii=False)
+
+    def summary(self, slowest=SLOWEST_SONGS):
+        """Stages in run order and the slowest songs, as a text table"""
+        total = sum(duration for name, start, duration, peak in self.stages)
+        lines = [f"{'stage':<24} {'ms':>10} {'share':>7} {'peak MB':>9}"]
+        for name, start, duration, peak in self.stages:
+            share = duration / total if total else 0
+            peak_mb = f'{peak / 2 ** 20:9.1f}' if peak is not None else f"{'-':>9}"
+            lines.append(f'{name:<24} {duration * 1e3:10.1f} {share:7.1%} {peak_mb}')
+        lines.append(f"{'total':<24} {total * 1e3:10.1f}")
+
+        if self.songs:
+            render_total = sum(song[3] for song in self.songs)
+            write_total = sum(song[4] for song in self.songs)
+            lines.append('')
+            lines.append(
+                f'{len(self.songs)} song(s): {render_total * 1e3:.1f} ms rendering, '
+                f'{write_total * 1e3:.1f} ms writing, across {len({song[1] for song in self.songs})} process(es)'
+            )
+            lines.append(f"{'slowest songs':<48} {'ms':>9} {'render':>9} {'write':>9}")
+            for label, pid, start, render, write in sorted(self.songs, key=lambda song: song[3] + song[4], reverse=True)[:slowest]:
+                lines.append(f'{label[:48]:<48} {(render + write) * 1e3:9.2f} {render * 1e3:9.2f} {write * 1e3:9.2f}')
+
+        if self.counts:
+            lines.append('')
+            lines.append(', '.join(f'{name}: {value}' for name, value in self.counts.items()))
+        return '\n'.join(lines)
+
+class NullProfiler:
+    """Stands in for Profiler when a run is not being profiled"""
+
+    def stage(self, name):
+        return nullcontext()
+
+    def song(self, label, pid, start, render, write):
+        pass
+
+    def count(self, name, value):
+        pass
+
+NULL_PROFILER = NullProfiler()
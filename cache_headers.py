@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Cache headers - a content-hash manifest of the site and a _headers file for static hosts
+
+asset-manifest.json maps every output path to its content hash, size and
+Cache-Control policy, so a deploy script can upload only what changed and
+use the hash as a strong ETag. _headers carries the same policies as URL
+rules in the format Netlify and Cloudflare Pages read:
+
+    assets/     content-hashed names, so cached for a year as immutable
+    thumbs/     one set per video, cached for a day and then revalidated
+                in the background
+    pages, index, grid and search shards
+                max-age=0, must-revalidate: the browser always asks, and
+                gets a 304 from the host's ETag when nothing changed
+
+Hosts apply every rule that matches a URL, so the rules must not overlap.
+A file whose size is unchanged and that has not been modified since the
+manifest was written keeps its previous hash instead of being read again.
+"""
+
+import os
+import json
+import hashlib
+from fnmatch import fnmatchcase
+
+from common import write_atomic
+
+MANIFEST_NAME = 'asset-manifest.json'
+HEADERS_NAME = '_headers'
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+THUMBNAIL = 'public, max-age=86400, stale-while-revalidate=604800'
+REVALIDATE = 'public, max-age=0, must-revalidate'
+
+# URL pattern -> Cache-Control; anything unmatched is revalidated
+CACHE_RULES = [
+    ('/', REVALIDATE),
+    ('/*.html', REVALIDATE),
+    ('/' + MANIFEST_NAME, REVALIDATE),
+    ('/assets/*', IMMUTABLE),
+    ('/thumbs/*', THUMBNAIL),
+    ('/grid/*', REVALIDATE),
+    ('/search/*', REVALIDATE)
+]
+
+def url_path(filename):
+    return '/' + filename.replace(os.sep, '/')
+
+def cache_policy(filename):
+    url = url_path(filename)
+    for pattern, policy in CACHE_RULES:
+        if fnmatchcase(url, pattern):
+            return policy
+    return REVALIDATE
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+def load_manifest(out_dir):
+    """The previous manifest's files and its modification time, in nanoseconds"""
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    try:
+        with open(path, encoding='utf-8') as f:
+            files = json.load(f)['files']
+        return files, os.stat(path).st_mtime_ns
+    except (FileNotFoundError, ValueError, KeyError):
+        return {}, 0
+
+def headers_text():
+    lines = [f'# Written by add-song.py build --headers; see {MANIFEST_NAME} for content hashes']
+    for pattern, policy in CACHE_RULES:
+        lines.append(pattern)
+        lines.append(f'  Cache-Control: {policy}')
+    return '\n'.join(lines) + '\n'
+
+def write_headers(out_dir, filenames):
+    """Write the manifest for filenames (relative to out_dir) and the _headers file
+
+    Returns (number of files, [filenames whose content changed since the
+    last manifest, including new ones]).
+    """
+    previous, written_at = load_manifest(out_dir)
+    files = {}
+    changed = []
+    rehashed = False
+    for filename in sorted(set(filenames)):
+        path = os.path.join(out_dir, filename)
+        stat = os.stat(path)
+        key = filename.replace(os.sep, '/')
+        entry = previous.get(key)
+        if not (entry and entry['size'] == stat.st_size and stat.st_mtime_ns < written_at):
+            entry = {'hash': file_hash(path), 'size': stat.st_size}
+            rehashed = True
+        files[key] = {'hash': entry['hash'], 'size': entry['size'], 'cacheControl': cache_policy(filename)}
+        if previous.get(key, {}).get('hash') != entry['hash']:
+            changed.append(key)
+
+    # Rewritten even when nothing changed, so rehashed files count as older next time
+    if rehashed or files != previous:
+        write_atomic(
+            os.path.join(out_dir, MANIFEST_NAME),
+            json.dumps({'files': files}, indent=2, sort_keys=True) + '\n'
+        )
+
+    headers_path = os.path.join(out_dir, HEADERS_NAME)
+    text = headers_text()
+    try:
+        with open(headers_path, encoding='utf-8') as f:
+            current = f.read()
+    except FileNotFoundError:
+        current = None
+    if current != text:
+        write_atomic(headers_path, text)
+    return len(files), changed
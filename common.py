@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Common - file and process pool helpers shared by the build modules
+
+Every file that another run reads back (manifests, caches, queues,
+catalogs, compressed copies) is written through atomic_write, so an
+interrupted run leaves the previous version in place instead of a
+truncated one. pool_map spreads CPU-bound work over worker processes.
+"""
+
+import os
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+
+@contextmanager
+def atomic_write(path, mode='w'):
+    """Open a temporary file next to path, moved over path once the block succeeds"""
+    tmp_path = path + '.tmp'
+    encoding = None if 'b' in mode else 'utf-8'
+    try:
+        with open(tmp_path, mode, encoding=encoding) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def write_atomic(path, data):
+    """Replace path with data (str or bytes) in one step"""
+    with atomic_write(path, 'wb' if isinstance(data, bytes) else 'w') as f:
+        f.write(data)
+
+def pool_map(function, items, workers=None, initializer=None):
+    """list(map(function, items)) across a process pool, in order
+
+    Runs in this process when workers is 1 or there is at most one item.
+    Items go out in chunks of about a quarter of each worker's share.
+    """
+    items = list(items)
+    if workers == 1 or len(items) < 2:
+        return list(map(function, items))
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer) as pool:
+        chunksize = max(1, len(items) // ((workers or os.cpu_count() or 1) * 4))
+        return list(pool.map(function, items, chunksize=chunksize))
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Dev server - serve the site from memory while editing the catalog
+
+The catalog and template modules are polled for changes. Only songs whose
+records changed are re-rendered (every song when a template changed), and
+pages are served from an in-memory cache, so nothing is written to disk.
+Each page gets a small script that reloads it when its content changes.
+Anything not in the cache is served from the site directory as usual.
+"""
+
+import os
+import json
+import time
+import threading
+import importlib
+from urllib.parse import unquote
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import page_template
+import index_template
+
+RELOAD_PATH = '/__reload'
+POLL_INTERVAL = 0.025
+KEEPALIVE_SECONDS = 15
+HISTORY_LENGTH = 100
+
+RELOAD_SCRIPT = '''<script>
+    new EventSource('/__reload').onmessage = event => {
+        const page = decodeURIComponent(location.pathname.slice(1)) || 'index.html';
+        if (JSON.parse(event.data).includes(page)) {
+            location.reload();
+        }
+    };
+</script>
+'''
+
+def with_reload_script(html):
+    head, body, tail = html.rpartition('</body>')
+    if not body:
+        return html + RELOAD_SCRIPT
+    return head + RELOAD_SCRIPT + body + tail
+
+def card_fields(data):
+    """The parts of a song the index cards show"""
+    if data is None:
+        return None
+    return {'videoId': data['videoId'], 'title': data['title'], 'artist': data['artist']}
+
+class SiteCache:
+    """Rendered pages keyed by filename, refreshed from load_songs
+
+    load_songs returns ([(filename, data)], [(label, error)]) in catalog
+    order. Every refresh that changes a page bumps the version, and
+    changes_since tells the reload stream which pages a browser missed.
+    """
+
+    def __init__(self, load_songs, facade=False, shard_size=index_template.DEFAULT_SHARD_SIZE):
+        self.load_songs = load_songs
+        self.facade = facade
+        self.shard_size = shard_size
+        self.records = {}
+        self.pages = {}
+        self.order = None
+        self.version = 0
+        self.history = []
+        self.condition = threading.Condition()
+
+    def render(self, data):
+        html = page_template.render_page(data, facade=self.facade)
+        return with_reload_script(html).encode('utf-8')
+
+    def refresh(self, template_changed=False):
+        """Re-render changed songs and the index, returning (changed, failures)"""
+        songs, failures = self.load_songs()
+        records = dict(songs)
+
+        pages = {}
+        cards_changed = template_changed
+        for filename, data in songs:
+            previous = self.records.get(filename)
+            if template_changed or (previous is not data and previous != data):
+                cards_changed = cards_changed or card_fields(previous) != card_fields(data)
+                try:
+                    pages[filename] = self.render(data)
+                except Exception as e:
+                    records.pop(filename)
+                    failures.append((filename, f'{type(e).__name__}: {e}'))
+        removed = [filename for filename in self.records if filename not in records]
+
+        order = list(records)
+        if cards_changed or order != self.order:
+            cards = [
+                {'href': filename, 'rank': rank, **card_fields(records[filename])}
+                for rank, filename in enumerate(order, 1)
+            ]
+            index_pages = index_template.render_index(cards, self.shard_size)
+            grid_shards = index_template.render_grid(cards, self.shard_size)
+            for filename, html in index_pages.items():
+                content = with_reload_script(html).encode('utf-8')
+                if self.pages.get(filename) != content:
+                    pages[filename] = content
+            for filename, shard in grid_shards.items():
+                content = shard.encode('utf-8')
+                if self.pages.get(filename) != content:
+                    pages[filename] = content
+            removed += [
+                filename for filename in self.pages
+                if filename.startswith(('index', index_template.GRID_DIR + '/'))
+                and filename not in index_pages and filename not in grid_shards
+            ]
+            self.order = order
+
+        changed = list(pages) + removed
+        with self.condition:
+            self.records = records
+            self.pages.update(pages)
+            for filename in removed:
+                self.pages.pop(filename, None)
+            if changed:
+                self.version += 1
+                self.history = self.history[-HISTORY_LENGTH:] + [(self.version, changed)]
+                self.condition.notify_all()
+        return changed, failures
+
+    def get(self, filename):
+        with self.condition:
+            return self.pages.get(filename)
+
+    def changes_since(self, version, timeout):
+        """Wait for a newer version, returning (version, changed filenames)"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != version, timeout)
+            changed = {filename for number, filenames in self.history if number > version for filename in filenames}
+            return self.version, sorted(changed)
+
+def file_state(path):
+    try:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+    except FileNotFoundError:
+        return None
+
+def reload_templates():
+    """Pick up edits to the template modules, keeping the old ones on errors"""
+    importlib.reload(page_template)
+    importlib.reload(index_template)
+
+def report(changed, failures, elapsed):
+    for label, error in failures:
+        print(f'❌ {label}: {error}')
+    if changed:
+        print(f'🔄 Rebuilt {len(changed)} page(s) in {elapsed * 1000:.0f} ms: {", ".join(changed[:5])}'
+              + (' ...' if len(changed) > 5 else ''))
+
+def watch(cache, catalog_path, stop):
+    """Poll the catalog and template files, refreshing the cache on changes
+
+    A change is acted on once the files look the same on two polls in a
+    row, so a catalog that is still being written is not read half way.
+    """
+    templates = [page_template.__file__, index_template.__file__]
+    states = {path: file_state(path) for path in [catalog_path] + templates}
+    pending = None
+    while not stop.wait(POLL_INTERVAL):
+        current = {path: file_state(path) for path in states}
+        if current == states or current != pending:
+            pending = current
+            continue
+        template_changed = any(current[path] != states[path] for path in templates)
+        states = pending = current
+
+        start = time.perf_counter()
+        try:
+            if template_changed:
+                reload_templates()
+            changed, failures = cache.refresh(template_changed)
+        except Exception as e:
+            print(f'❌ Not reloaded: {type(e).__name__}: {e}')
+            continue
+        report(changed, failures, time.perf_counter() - start)
+
+def make_handler(cache, root):
+    class Handler(SimpleHTTPRequestHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=root, **kwargs)
+
+        def do_GET(self):
+            path = self.path.split('?', 1)[0]
+            if path == RELOAD_PATH:
+                return self.send_events()
+            filename = unquote(path).lstrip('/') or 'index.html'
+            content = cache.get(filename)
+            if content is None:
+                return super().do_GET()
+            self.send_response(200)
+            content_type = 'application/json' if filename.endswith('.json') else 'text/html; charset=utf-8'
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(content)))
+            self.send_header('Cache-Control', 'no-store')
+            self.end_headers()
+            self.wfile.write(content)
+
+        def send_events(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-store')
+            self.end_headers()
+            version = cache.version
+            try:
+                while True:
+                    version, changed = cache.changes_since(version, KEEPALIVE_SECONDS)
+                    message = f'data: {json.dumps(changed)}\n\n' if changed else ': keepalive\n\n'
+                    self.wfile.write(message.encode('utf-8'))
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+def serve(catalog_path, root, load_songs, port=8000, facade=False, shard_size=index_template.DEFAULT_SHARD_SIZE):
+    """Serve root with catalog pages rendered in memory until interrupted"""
+    cache = SiteCache(load_songs, facade, shard_size)
+    start = time.perf_counter()
+    changed, failures = cache.refresh()
+    report(changed, failures, time.perf_counter() - start)
+
+    stop = threading.Event()
+    watcher = threading.Thread(target=watch, args=(cache, catalog_path, stop), daemon=True)
+    watcher.start()
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(cache, root))
+    server.daemon_threads = True
+    print(f'\n🌐 Serving http://127.0.0.1:{server.server_port}/ (Ctrl+C to stop)')
+    print(f'👀 Watching {catalog_path} and the page templates\n')
+    try:
+        server.serve_forever()
+    finally:
+        stop.set()
+        server.server_close()
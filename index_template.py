@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Index template - the landing page song grid, generated from the catalog
+
+Large catalogs are split into shards of shard_size cards: index.html,
+index-2.html, index-3.html and so on, linked by a page navigation bar.
+Every shard after the first is also written as grid/<n>.json. An index
+page renders only its own shard; as the visitor scrolls toward the end of
+the grid, its script fetches the following shards and appends their
+cards, so the landing page costs the same for 50 songs or 5,000.
+Thumbnails load lazily as their cards approach the viewport. Without
+JavaScript, or if a shard fails to load, the page navigation bar is
+still there.
+"""
+
+import json
+
+from page_template import Template
+
+INDEX_SOURCE = '''<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>My Top 50 Songs</title>
+    <style>
+        * {
+            margin: 0;
+            padding: 0;
+            box-sizing: border-box;
+        }
+
+        body {
+            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            min-height: 100vh;
+            padding: 40px 20px;
+        }
+
+        .container {
+            max-width: 1200px;
+            margin: 0 auto;
+        }
+
+        header {
+            text-align: center;
+            color: white;
+            margin-bottom: 60px;
+        }
+
+        header h1 {
+            font-size: 3.5em;
+            margin-bottom: 15px;
+            text-shadow: 2px 2px 4px rgba(0,0,0,0.3);
+        }
+
+        header p {
+            font-size: 1.3em;
+            opacity: 0.95;
+        }
+
+        .song-grid {
+            display: grid;
+            grid-template-columns: repeat(auto-fill, minmax(300px, 1fr));
+            gap: 25px;
+            margin-top: 40px;
+        }
+
+        .song-card {
+            background: white;
+            border-radius: 15px;
+            overflow: hidden;
+            box-shadow: 0 10px 30px rgba(0,0,0,0.2);
+            transition: transform 0.3s, box-shadow 0.3s;
+            text-decoration: none;
+            color: inherit;
+            display: block;
+        }
+
+        .song-thumbnail {
+            width: 100%;
+            height: 180px;
+            object-fit: cover;
+            display: block;
+        }
+
+        .song-info {
+            padding: 25px;
+        }
+
+        .song-card:hover {
+            transform: translateY(-5px);
+            box-shadow: 0 15px 40px rgba(0,0,0,0.3);
+        }
+
+        .song-number {
+            font-size: 2.5em;
+            font-weight: bold;
+            color: #667eea;
+            margin-bottom: 10px;
+        }
+
+        .song-title {
+            font-size: 1.5em;
+            font-weight: 600;
+            margin-bottom: 8px;
+            color: #333;
+        }
+
+        .song-artist {
+            font-size: 1.1em;
+            color: #666;
+        }
+
+        .coming-soon {
+            opacity: 0.6;
+            cursor: default;
+        }
+
+        .coming-soon:hover {
+            transform: none;
+            box-shadow: 0 10px 30px rgba(0,0,0,0.2);
+        }
+
+        .pagination {
+            display: flex;
+            justify-content: center;
+            flex-wrap: wrap;
+            gap: 10px;
+            margin-top: 40px;
+        }
+
+        .pagination a,
+        .pagination span {
+            padding: 10px 16px;
+            border-radius: 8px;
+            background: rgba(255,255,255,0.2);
+            color: white;
+            text-decoration: none;
+            font-weight: 600;
+        }
+
+        .pagination a:hover {
+            background: rgba(255,255,255,0.35);
+        }
+
+        .pagination .current {
+            background: white;
+            color: #667eea;
+        }
+
+        .pagination .gap {
+            background: none;
+        }
+
+        .search {
+            max-width: 600px;
+            margin: 0 auto;
+        }
+
+        .search input {
+            width: 100%;
+            padding: 14px 20px;
+            border: none;
+            border-radius: 30px;
+            font-size: 1.1em;
+            box-shadow: 0 10px 30px rgba(0,0,0,0.2);
+        }
+
+        .search-results {
+            list-style: none;
+            margin-top: 15px;
+            background: white;
+            border-radius: 15px;
+            overflow: hidden;
+        }
+
+        .search-results:empty {
+            display: none;
+        }
+
+        .search-results a {
+            display: block;
+            padding: 12px 20px;
+            color: #333;
+            text-decoration: none;
+        }
+
+        .search-results a:hover {
+            background: #f0f0ff;
+        }
+
+        .search-results .search-artist,
+        .search-results .search-times {
+            color: #666;
+            font-size: 0.9em;
+        }
+
+        @media (max-width: 768px) {
+            header h1 {
+                font-size: 2.5em;
+            }
+
+            .song-grid {
+                grid-template-columns: 1fr;
+            }
+        }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <header>
+            <h1>My Top 50 Songs of All Time</h1>
+            <p>A curated collection of the music that moves me</p>
+        </header>{{?search}}
+
+        <div class="search">
+            <input type="search" id="song-search" placeholder="Search songs, artists and moments..." autocomplete="off">
+            <ul class="search-results" id="search-results"></ul>
+        </div>
+        <script src="search/search.js" defer></script>
+        <script>
+            const searchInput = document.getElementById('song-search');
+            const searchResults = document.getElementById('search-results');
+            let searchQuery = '';
+
+            function formatTime(seconds) {
+                const minutes = Math.floor(seconds / 60);
+                return minutes + ':' + String(seconds % 60).padStart(2, '0');
+            }
+
+            searchInput.addEventListener('input', async () => {
+                const query = searchQuery = searchInput.value;
+                const results = await searchSongs(query);
+                if (query !== searchQuery) {
+                    return;
+                }
+                searchResults.innerHTML = results.slice(0, 20).map(result => {
+                    const times = result.markers.slice(0, 5).map(formatTime).join(', ');
+                    return '<li><a href="' + result.href + '">' + result.title
+                        + ' <span class="search-artist">' + result.artist + '</span>'
+                        + (times ? ' <span class="search-times">' + times + '</span>' : '')
+                        + '</a></li>';
+                }).join('');
+            });
+        </script>{{/search}}
+
+        <div class="song-grid" data-page="{{page:int}}" data-pages="{{page_count:int}}">{{#cards}}
+
+            <a href="{{href}}" class="song-card">
+                {{thumbnail}}
+                <div class="song-info">
+                    <div class="song-number">#{{rank:int}}</div>
+                    <div class="song-title">{{title}}</div>
+                    <div class="song-artist">{{artist}}</div>
+                </div>
+            </a>{{/cards}}
+        </div>{{?pagination}}
+
+        <nav class="pagination">{{pagination}}
+        </nav>
+        <script>
+            (() => {
+                const grid = document.querySelector('.song-grid');
+                const nav = document.querySelector('.pagination');
+                const pageCount = Number(grid.dataset.pages);
+                let page = Number(grid.dataset.page);
+                if (!('IntersectionObserver' in window) || page >= pageCount) {
+                    return;
+                }
+
+                function renderCard(card) {
+                    return '<a href="' + card.href + '" class="song-card">' + card.thumbnail
+                        + '<div class="song-info">'
+                        + '<div class="song-number">#' + card.rank + '</div>'
+                        + '<div class="song-title">' + card.title + '</div>'
+                        + '<div class="song-artist">' + card.artist + '</div>'
+                        + '</div></a>';
+                }
+
+                const sentinel = document.createElement('div');
+                grid.after(sentinel);
+                nav.hidden = true;
+                let loading = false;
+
+                const observer = new IntersectionObserver(async entries => {
+                    if (loading || !entries.some(entry => entry.isIntersecting)) {
+                        return;
+                    }
+                    loading = true;
+                    try {
+                        const response = await fetch('grid/' + (page + 1) + '.json');
+                        if (!response.ok) {
+                            throw new Error(response.status);
+                        }
+                        const shard = await response.json();
+                        grid.insertAdjacentHTML('beforeend', shard.cards.map(renderCard).join(''));
+                        page += 1;
+                    } catch (error) {
+                        page = pageCount;
+                        nav.hidden = false;
+                    }
+                    loading = false;
+                    // Observing again reports the sentinel at once if it is still in range
+                    observer.unobserve(sentinel);
+                    if (page < pageCount) {
+                        observer.observe(sentinel);
+                    } else {
+                        sentinel.remove();
+                    }
+                }, {rootMargin: '0px 0px 1500px 0px'});
+                observer.observe(sentinel);
+            })();
+        </script>{{/pagination}}
+    </div>
+</body>
+</html>
+'''
+
+INDEX_TEMPLATE = Template(INDEX_SOURCE)
+
+DEFAULT_SHARD_SIZE = 50
+GRID_DIR = 'grid'
+# Pages linked on each side of the current one, so the bar stays the same size however many there are
+PAGINATION_WINDOW = 2
+
+# The card fields a grid shard carries; the rest are only used to render them
+GRID_FIELDS = ('href', 'rank', 'title', 'artist', 'thumbnail')
+
+def index_filename(page):
+    """Filename of a 1-based index shard"""
+    return 'index.html' if page == 1 else f'index-{page}.html'
+
+def grid_filename(page):
+    """Path of a 1-based index shard's cards as JSON"""
+    return f'{GRID_DIR}/{page}.json'
+
+def page_window(page, page_count, around=PAGINATION_WINDOW):
+    """The page numbers the navigation bar links: the ends and those around page"""
+    return sorted({1, page_count} | set(range(max(1, page - around), min(page_count, page + around) + 1)))
+
+def render_pagination(page, page_count):
+    if page_count < 2:
+        return ''
+    links = []
+    if page > 1:
+        links.append(f'<a href="{index_filename(page - 1)}">&larr; Prev</a>')
+    previous = 0
+    for number in page_window(page, page_count):
+        if number > previous + 1:
+            links.append('<span class="gap">&hellip;</span>')
+        if number == page:
+            links.append(f'<span class="current">{number}</span>')
+        else:
+            links.append(f'<a href="{index_filename(number)}">{number}</a>')
+        previous = number
+    if page < page_count:
+        links.append(f'<a href="{index_filename(page + 1)}">Next &rarr;</a>')
+    return ''.join(f'\n            {link}' for link in links)
+
+def hotlinked_thumbnail(card):
+    """The full-size YouTube thumbnail, straight from img.youtube.com"""
+    return (
+        f'<img src="https://img.youtube.com/vi/{card["videoId"]}/maxresdefault.jpg" alt="{card["title"]}" '
+        f'class="song-thumbnail" loading="lazy" decoding="async">'
+    )
+
+def with_thumbnails(cards, thumbnail):
+    return [dict(card, thumbnail=thumbnail(card)) for card in cards]
+
+def shard_count(cards, shard_size):
+    return max(1, -(-len(cards) // max(1, shard_size)))
+
+def render_index(cards, shard_size=DEFAULT_SHARD_SIZE, search=False, thumbnail=hotlinked_thumbnail):
+    """Render the index shards, returning {filename: html}
+
+    cards are dicts with href, videoId, title, artist and rank, in the
+    order they should appear. thumbnail(card) returns each card's image
+    markup. With search every shard gets a search box backed by the
+    search/ index.
+    """
+    cards = with_thumbnails(cards, thumbnail)
+    shard_size = max(1, shard_size)
+    page_count = shard_count(cards, shard_size)
+    pages = {}
+    for page in range(1, page_count + 1):
+        pages[index_filename(page)] = INDEX_TEMPLATE.render({
+            'cards': cards[(page - 1) * shard_size:page * shard_size],
+            'pagination': render_pagination(page, page_count),
+            'page': page,
+            'page_count': page_count,
+            'search': search
+        })
+    return pages
+
+def render_grid(cards, shard_size=DEFAULT_SHARD_SIZE, thumbnail=hotlinked_thumbnail):
+    """Render the JSON shards the index pages fetch while scrolling, returning {path: json}
+
+    The first shard is never fetched, since index.html already shows it.
+    """
+    cards = with_thumbnails(cards, thumbnail)
+    shard_size = max(1, shard_size)
+    shards = {}
+    for page in range(2, shard_count(cards, shard_size) + 1):
+        shard = [{key: card[key] for key in GRID_FIELDS} for card in cards[(page - 1) * shard_size:page * shard_size]]
+        shards[grid_filename(page)] = json.dumps({'page': page, 'cards': shard}, ensure_ascii=False, separators=(',', ':'))
+    return shards
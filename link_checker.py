@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Link checker - find dead YouTube videos and streaming links in a catalog
+
+Every video ID and Spotify/Apple Music/YouTube Music link is checked at
+once on an asyncio event loop. Requests go through a small HTTP/1.1 client
+that keeps a few connections open per host and spaces requests to each
+host out to a fixed rate, so hundreds of songs take seconds without
+hammering anyone. Results are cached on disk with a TTL, so a rerun only
+checks what is new or has expired. Each URL is fetched once, however many
+songs share it.
+"""
+
+import ssl
+import json
+import time
+import asyncio
+from urllib.parse import urlsplit, urljoin
+
+from common import atomic_write
+
+CACHE_NAME = '.link-cache.json'
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_CONCURRENCY = 32
+DEFAULT_PER_HOST = 4
+DEFAULT_RATE = 10.0
+DEFAULT_TIMEOUT = 15.0
+MAX_REDIRECTS = 5
+USER_AGENT = 'Mozilla/5.0 (compatible; top50-link-checker)'
+
+# oEmbed answers 404 for deleted videos and 401 for ones that cannot be embedded
+VIDEO_URL = 'https://www.youtube.com/oembed?format=json&url=https://www.youtube.com/watch%3Fv%3D{id}'
+
+LINK_FIELDS = ['spotify', 'appleMusic', 'youtubeMusic']
+
+class HttpError(Exception):
+    """The server's response could not be read"""
+
+def is_dead(status):
+    """A status that means the link is gone, as opposed to a retryable failure"""
+    return 400 <= status < 500 and status not in (408, 429)
+
+class RateLimiter:
+    """Space calls out to at most rate per second"""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self.next_time = 0
+
+    async def wait(self):
+        now = asyncio.get_running_loop().time()
+        delay = self.next_time - now
+        self.next_time = max(now, self.next_time) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+class HostPool:
+    """Idle keep-alive connections to one host, at most limit in use at once"""
+
+    def __init__(self, scheme, host, port, limit, rate):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.slots = asyncio.Semaphore(limit)
+        self.limiter = RateLimiter(rate)
+        self.idle = []
+
+    async def connect(self):
+        if self.scheme == 'https':
+            return await asyncio.open_connection(
+                self.host, self.port, ssl=ssl.create_default_context(), server_hostname=self.host
+            )
+        return await asyncio.open_connection(self.host, self.port)
+
+    def close(self):
+        for reader, writer in self.idle:
+            writer.close()
+        self.idle.clear()
+
+async def read_body(reader, headers):
+    """Read and discard a response body, returning whether the connection can be reused"""
+    if 'chunked' in headers.get('transfer-encoding', '').lower():
+        while True:
+            size = int((await reader.readline()).split(b';')[0].strip() or b'0', 16)
+            if not size:
+                while (await reader.readline()).strip():
+                    pass
+                return True
+            await reader.readexactly(size + 2)
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+        return True
+    return False
+
+async def read_response(reader, method):
+    """Read one response, returning (status, headers, reusable)"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError('connection closed by server')
+    try:
+        version, status = status_line.decode('latin-1').split()[:2]
+        status = int(status)
+    except ValueError:
+        raise HttpError(f'bad status line {status_line[:60]!r}') from None
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if not line.strip():
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    reusable = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+    if method != 'HEAD' and status not in (204, 304) and status >= 200:
+        reusable = await read_body(reader, headers) and reusable
+    return status, headers, reusable
+
+class HttpClient:
+    """Minimal pooled HTTP/1.1 client; only status codes and headers are kept"""
+
+    def __init__(self, per_host=DEFAULT_PER_HOST, rate=DEFAULT_RATE, timeout=DEFAULT_TIMEOUT):
+        self.per_host = per_host
+        self.rate = rate
+        self.timeout = timeout
+        self.pools = {}
+        self.requests = 0
+
+    def pool(self, url):
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise ValueError(f'not an http(s) URL: {url}')
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        key = (parts.scheme, parts.hostname, port)
+        if key not in self.pools:
+            self.pools[key] = HostPool(*key, self.per_host, self.rate)
+        return self.pools[key]
+
+    async def send(self, pool, method, url):
+        parts = urlsplit(url)
+        target = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        request = (
+            f'{method} {target} HTTP/1.1\r\n'
+            f'Host: {parts.netloc}\r\n'
+            f'User-Agent: {USER_AGENT}\r\n'
+            f'Accept: */*\r\n'
+            f'\r\n'
+        ).encode('latin-1')
+
+        # An idle connection the server has since closed fails right away,
+        # so retry once on a fresh one
+        for attempt in range(2):
+            fresh = not pool.idle
+            reader, writer = pool.idle.pop() if pool.idle else await pool.connect()
+            try:
+                writer.write(request)
+                await writer.drain()
+                status, headers, reusable = await read_response(reader, method)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                writer.close()
+                if fresh or attempt:
+                    raise
+                continue
+            except BaseException:
+                writer.close()
+                raise
+            if reusable:
+                pool.idle.append((reader, writer))
+            else:
+                writer.close()
+            return status, headers
+
+    async def request(self, method, url):
+        """(status, headers) of one request, without following redirects"""
+        pool = self.pool(url)
+        async with pool.slots:
+            await pool.limiter.wait()
+            self.requests += 1
+            return await asyncio.wait_for(self.send(pool, method, url), self.timeout)
+
+    async def check(self, url):
+        """Final status of url, following redirects
+
+        HEAD is tried first; servers that refuse it get a GET.
+        """
+        method = 'HEAD'
+        for redirect in range(MAX_REDIRECTS + 1):
+            status, headers = await self.request(method, url)
+            if method == 'HEAD' and status in (403, 405, 501):
+                method = 'GET'
+                status, headers = await self.request(method, url)
+            if status in (301, 302, 303, 307, 308) and 'location' in headers:
+                url = urljoin(url, headers['location'])
+                continue
+            return status
+        raise HttpError(f'more than {MAX_REDIRECTS} redirects')
+
+    def close(self):
+        for pool in self.pools.values():
+            pool.close()
+
+class LinkCache:
+    """Checked URLs and their status, kept in a JSON file for ttl seconds"""
+
+    def __init__(self, path, ttl=DEFAULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        try:
+            with open(path, encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.entries = {}
+
+    def get(self, url, now=None):
+        """Cached status of url, or None when it is missing or expired"""
+        entry = self.entries.get(url)
+        if entry and (now or time.time()) - entry['checked'] < self.ttl:
+            return entry['status']
+        return None
+
+    def put(self, url, status, now=None):
+        self.entries[url] = {'status': status, 'checked': now or time.time()}
+
+    def save(self):
+        now = time.time()
+        entries = {url: entry for url, entry in self.entries.items() if now - entry['checked'] < self.ttl}
+        with atomic_write(self.path) as f:
+            json.dump(entries, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+def catalog_links(songs, video_url=VIDEO_URL):
+    """(label, field, url) for every video and non-empty link of (label, data) songs"""
+    links = []
+    for label, data in songs:
+        links.append((label, 'videoId', video_url.format(id=data['videoId'])))
+        for field in LINK_FIELDS:
+            url = (data.get('links') or {}).get(field, '').strip()
+            if url:
+                links.append((label, field, url))
+    return links
+
+async def check_all(urls, client, concurrency, progress=None):
+    """{url: status or error message} for every URL, checked concurrently"""
+    slots = asyncio.Semaphore(concurrency)
+    results = {}
+
+    async def check_one(url):
+        async with slots:
+            try:
+                results[url] = await client.check(url)
+            except asyncio.TimeoutError:
+                results[url] = f'timed out after {client.timeout:g}s'
+            except (OSError, ValueError, HttpError, asyncio.IncompleteReadError) as e:
+                results[url] = f'{type(e).__name__}: {e}'
+        if progress:
+            progress(len(results), len(urls))
+
+    try:
+        await asyncio.gather(*(check_one(url) for url in urls))
+    finally:
+        client.close()
+    return results
+
+def validate(songs, cache_path, video_url=VIDEO_URL, ttl=DEFAULT_TTL, refresh=False,
+             concurrency=DEFAULT_CONCURRENCY, per_host=DEFAULT_PER_HOST, rate=DEFAULT_RATE,
+             timeout=DEFAULT_TIMEOUT, progress=None):
+    """Check every video and link of (label, data) songs, returning a report
+
+    The report is {'dead': [...], 'errors': [...], 'checked': n, 'cached': n,
+    'requests': n}, where dead and errors hold (label, field, url, reason).
+    Dead links are ones the server says are gone; errors are timeouts,
+    network failures and 5xx/429 answers. Errors are not cached, so they
+    are retried on the next run.
+    """
+    cache = LinkCache(cache_path, ttl)
+    links = catalog_links(songs, video_url)
+
+    statuses = {}
+    for label, field, url in links:
+        if url not in statuses:
+            statuses[url] = None if refresh else cache.get(url)
+    unchecked = [url for url, status in statuses.items() if status is None]
+
+    client = HttpClient(per_host, rate, timeout)
+    results = asyncio.run(check_all(unchecked, client, concurrency, progress)) if unchecked else {}
+    for url, result in results.items():
+        statuses[url] = result
+        if isinstance(result, int) and (result < 400 or is_dead(result)):
+            cache.put(url, result)
+    cache.save()
+
+    dead = []
+    errors = []
+    for label, field, url in links:
+        result = statuses[url]
+        if isinstance(result, str):
+            errors.append((label, field, url, result))
+        elif is_dead(result):
+            dead.append((label, field, url, f'HTTP {result}'))
+        elif result >= 400:
+            errors.append((label, field, url, f'HTTP {result}'))
+    return {
+        'dead': dead,
+        'errors': errors,
+        'checked': len(unchecked),
+        'cached': len(statuses) - len(unchecked),
+        'requests': client.requests
+    }
@@ -0,0 +1,721 @@
+#!/usr/bin/env python3
+"""
+Page template - the song page compiled once into static text and typed slots
+
+Shared by add-song.py and song-manager-gui.py. Each template is compiled
+into a single generated function built around one f-string, the stylesheet
+is rendered once per color scheme and baked into that scheme's page, and
+markers are joined in one comprehension instead of repeated +=. Records
+carry their markers in playback order (normalize_record sorts them), and
+the player script binary-searches their data-time values to highlight
+the one playing.
+
+Template syntax:
+    {{name}} / {{name.key}}     value inserted as text
+    {{name:int}}                value inserted as an integer
+    {{#name}}...{{/name}}       repeated for each item of a list; slots
+                                inside refer to the item
+    {{?name}}...{{/name}}       included only when the value is truthy
+"""
+
+import os
+import re
+import hashlib
+import textwrap
+from functools import lru_cache, reduce
+from operator import getitem
+from itertools import islice
+
+from minify import minify_css, minify_js, minify_html
+
+TAG_PATTERN = re.compile(r'\{\{([#?/]?)([\w.]+)(?::(\w+))?\}\}')
+
+# Slot type -> expression used to format a value. Values are inserted as-is,
+# like the f-string this replaces, so user text may contain markup.
+SLOT_TYPES = {
+    'str': '{0}',
+    'int': 'int({0})'
+}
+
+COLOR_SCHEMES = [
+    ('#8b0000', '#2d1b2e'),
+    ('#667eea', '#764ba2'),
+    ('#f093fb', '#f5576c'),
+    ('#4facfe', '#00f2fe'),
+    ('#43e97b', '#38f9d7')
+]
+
+class Template:
+    """A template compiled into static chunks plus typed slots
+
+    Sections are hoisted into locals ahead of one f-string that joins
+    the page, so render does no per-call parsing or concatenation.
+    iter_render yields the same text in pieces, with repeated sections
+    rendered batch_size items at a time, so a page can be streamed to a
+    file without holding it in memory. Sections cannot be nested.
+    """
+
+    def __init__(self, source):
+        self.chunks = []
+        self.slots = []
+        self.sections = []
+        segments = []
+        fields = []
+        section = None
+        position = 0
+
+        for match in TAG_PATTERN.finditer(source):
+            kind, name, slot_type = match.group(1), match.group(2), match.group(3) or 'str'
+            self.add_chunk(source[position:match.start()], fields)
+            position = match.end()
+
+            if kind in ('#', '?'):
+                if section:
+                    raise ValueError(f'Section {name} is nested inside {section[1]}')
+                segments.append(('text', fields))
+                section = (kind, name)
+                fields = []
+            elif kind == '/':
+                if not section or section[1] != name:
+                    raise ValueError(f'Unexpected closing tag for {name}')
+                self.sections.append(section)
+                segments.append((section[0], name, fields))
+                section = None
+                fields = []
+            else:
+                if slot_type not in SLOT_TYPES:
+                    raise ValueError(f'Unknown slot type {slot_type!r} for {name}')
+                scope = 'item' if section and section[0] == '#' else 'values'
+                self.slots.append((name, slot_type))
+                fields.append('{' + SLOT_TYPES[slot_type].format(lookup(scope, name)) + '}')
+
+        if section:
+            raise ValueError(f'Section {section[1]} is never closed')
+        self.add_chunk(source[position:], fields)
+        segments.append(('text', fields))
+        self.static_sizes = [
+            (segment[0], segment[1] if segment[0] != 'text' else None, self.static_size(segment[-1]))
+            for segment in segments
+        ]
+
+        namespace = {f'_{i}': chunk for i, chunk in enumerate(self.chunks)}
+        namespace['islice'] = islice
+        exec(compile_render(segments) + compile_iter_render(segments), namespace)
+        self.render = namespace['render']
+        self.iter_render = namespace['iter_render']
+
+    def add_chunk(self, text, fields):
+        if text:
+            fields.append('{_%d}' % len(self.chunks))
+            self.chunks.append(text)
+
+    def static_size(self, fields):
+        return sum(len(self.chunks[int(field[2:-1])]) for field in fields if field.startswith('{_'))
+
+    def static_length(self, values):
+        """Characters of static template text that rendering values produces"""
+        total = 0
+        for kind, name, size in self.static_sizes:
+            if kind == 'text':
+                total += size
+                continue
+            value = reduce(getitem, name.split('.'), values)
+            if kind == '#':
+                total += size * len(value)
+            elif value:
+                total += size
+        return total
+
+def compile_render(segments):
+    """Source for render(values): sections become locals, then one f-string"""
+    code = 'def render(values):\n'
+    page = []
+    for index, segment in enumerate(segments):
+        if segment[0] == 'text':
+            page += segment[1]
+            continue
+        kind, name, fields = segment
+        body = 'f"' + ''.join(fields) + '"'
+        if kind == '#':
+            code += f'    _s{index} = "".join([{body} for item in {lookup("values", name)}])\n'
+        else:
+            code += f'    _s{index} = {body} if {lookup("values", name)} else ""\n'
+        page.append('{_s%d}' % index)
+    return code + '    return f"' + ''.join(page) + '"\n'
+
+def compile_iter_render(segments):
+    """Source for iter_render(values, batch_size): yields between repeated sections"""
+    code = 'def iter_render(values, batch_size=256):\n'
+    pending = []
+    for index, segment in enumerate(segments):
+        if segment[0] == 'text':
+            pending += segment[1]
+            continue
+        kind, name, fields = segment
+        body = 'f"' + ''.join(fields) + '"'
+        if kind == '?':
+            code += f'    _s{index} = {body} if {lookup("values", name)} else ""\n'
+            pending.append('{_s%d}' % index)
+            continue
+        if pending:
+            code += '    yield f"' + ''.join(pending) + '"\n'
+            pending = []
+        code += (
+            f'    items = iter({lookup("values", name)})\n'
+            f'    while batch := list(islice(items, batch_size)):\n'
+            f'        yield "".join([{body} for item in batch])\n'
+        )
+    if pending:
+        code += '    yield f"' + ''.join(pending) + '"\n'
+    return code
+
+def lookup(scope, name):
+    """Python expression for a dotted slot name"""
+    return scope + ''.join(f'[{key!r}]' for key in name.split('.'))
+
+CSS_SOURCE = '''        * {
+            margin: 0;
+            padding: 0;
+            box-sizing: border-box;
+        }
+
+        body {
+            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+            background: linear-gradient(135deg, #1a1a1a 0%, {{color2}} 100%);
+            min-height: 100vh;
+            padding: 40px 20px;
+        }
+
+        .container {
+            max-width: 1000px;
+            margin: 0 auto;
+            background: white;
+            border-radius: 20px;
+            box-shadow: 0 20px 60px rgba(0,0,0,0.5);
+            overflow: hidden;
+        }
+
+        .header {
+            background: linear-gradient(135deg, {{color1}} 0%, {{color2}} 100%);
+            color: white;
+            padding: 40px;
+            text-align: center;
+        }
+
+        .header h1 {
+            font-size: 2.8em;
+            margin-bottom: 10px;
+            text-shadow: 2px 2px 4px rgba(0,0,0,0.3);
+        }
+
+        .header p {
+            font-size: 1.3em;
+            opacity: 0.9;
+        }
+
+        .content {
+            padding: 40px;
+        }
+
+        .description {
+            font-size: 1.1em;
+            line-height: 1.8;
+            color: #333;
+            margin-bottom: 30px;
+            padding: 20px;
+            background: #f8f9fa;
+            border-radius: 10px;
+            border-left: 4px solid {{color1}};
+        }
+
+        .video-container {
+            margin: 30px 0;
+            background: #000;
+            border-radius: 10px;
+            overflow: hidden;
+            box-shadow: 0 8px 24px rgba(0,0,0,0.3);
+        }
+
+        .video-wrapper {
+            position: relative;
+            padding-bottom: 56.25%;
+            height: 0;
+            overflow: hidden;
+        }
+
+        .video-wrapper iframe {
+            position: absolute;
+            top: 0;
+            left: 0;
+            width: 100%;
+            height: 100%;
+        }
+
+        .markers-section {
+            margin: 40px 0;
+            background: #f8f9fa;
+            padding: 30px;
+            border-radius: 10px;
+        }
+
+        .markers-section h2 {
+            color: #333;
+            margin-bottom: 20px;
+            font-size: 1.4em;
+        }
+
+        .marker-item {
+            background: white;
+            padding: 18px;
+            margin-bottom: 12px;
+            border-radius: 8px;
+            border-left: 4px solid {{color1}};
+            cursor: pointer;
+            transition: all 0.3s;
+            display: flex;
+            align-items: flex-start;
+            gap: 15px;
+        }
+
+        .marker-item:hover {
+            transform: translateX(5px);
+            box-shadow: 0 4px 12px rgba(0,0,0,0.2);
+            background: #fffbfb;
+        }
+
+        .marker-item.now-playing {
+            border-left-width: 8px;
+            box-shadow: 0 4px 12px rgba(0,0,0,0.2);
+            background: #fffbfb;
+        }
+
+        .marker-time {
+            color: {{color1}};
+            font-weight: bold;
+            font-size: 1.1em;
+            min-width: 60px;
+            flex-shrink: 0;
+        }
+
+        .marker-text {
+            color: #555;
+            line-height: 1.6;
+        }
+
+        .streaming-links {
+            margin-top: 30px;
+            padding: 25px;
+            background: #f8f9fa;
+            border-radius: 10px;
+        }
+
+        .streaming-links h3 {
+            color: #333;
+            margin-bottom: 15px;
+            font-size: 1.2em;
+        }
+
+        .links-container {
+            display: flex;
+            gap: 15px;
+            flex-wrap: wrap;
+        }
+
+        .stream-link {
+            display: inline-block;
+            padding: 12px 24px;
+            background: white;
+            color: {{color1}};
+            text-decoration: none;
+            border-radius: 8px;
+            font-weight: 600;
+            transition: all 0.3s;
+            border: 2px solid {{color1}};
+        }
+
+        .stream-link:hover {
+            background: {{color1}};
+            color: white;
+            transform: translateY(-2px);
+            box-shadow: 0 4px 12px rgba(0,0,0,0.3);
+        }
+
+        @media (max-width: 768px) {
+            .header h1 {
+                font-size: 2em;
+            }
+
+            .content {
+                padding: 20px;
+            }
+        }
+'''
+
+PAGE_SOURCE = '''<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{{title}} - {{artist}}</title>
+{{styles}}
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>{{title}}</h1>
+            <p>{{artist}}</p>
+        </div>
+
+        <div class="content">
+            <div class="description">
+                {{description}}
+            </div>
+
+            <div class="video-container">
+                <div class="video-wrapper">
+{{player}}
+                </div>
+            </div>
+
+            <div class="markers-section">
+                <h2>Key Moments to Listen For:</h2>
+{{#markers}}
+                <div class="marker-item" data-time="{{seconds}}">
+                    <span class="marker-time">{{time}}</span>
+                    <span class="marker-text">{{text}}</span>
+                </div>{{/markers}}
+            </div>
+
+            <div class="streaming-links">
+                <h3>Listen On:</h3>
+                <div class="links-container">
+
+                    <a href="https://www.youtube.com/watch?v={{videoId}}" target="_blank" class="stream-link">YouTube</a>{{?links.spotify}}
+                    <a href="{{links.spotify}}" target="_blank" class="stream-link">Spotify</a>{{/links.spotify}}{{?links.appleMusic}}
+                    <a href="{{links.appleMusic}}" target="_blank" class="stream-link">Apple Music</a>{{/links.appleMusic}}{{?links.youtubeMusic}}
+                    <a href="{{links.youtubeMusic}}" target="_blank" class="stream-link">YouTube Music</a>{{/links.youtubeMusic}}
+                </div>
+            </div>
+        </div>
+    </div>
+
+{{scripts}}
+</body>
+</html>'''
+
+# Shared by both players. Markers are sorted, so their data-time values are
+# read once into markerTimes and the current marker is a binary search per
+# poll, and one listener on the section handles clicks on any marker.
+MARKERS_SOURCE = '''        const POLL_MS = 500;
+        const markerSection = document.querySelector('.markers-section');
+        const markerItems = markerSection.getElementsByClassName('marker-item');
+        const markerTimes = Array.from(markerItems, item => Number(item.dataset.time));
+        let currentMarker = -1;
+        let pollTimer = null;
+
+        function markerAt(time) {
+            let low = 0;
+            let high = markerTimes.length;
+            while (low < high) {
+                const mid = (low + high) >> 1;
+                if (markerTimes[mid] <= time) {
+                    low = mid + 1;
+                } else {
+                    high = mid;
+                }
+            }
+            return low - 1;
+        }
+
+        function highlightMarker() {
+            if (document.hidden) {
+                return;
+            }
+            const index = markerAt(player.getCurrentTime());
+            if (index === currentMarker) {
+                return;
+            }
+            if (currentMarker >= 0) {
+                markerItems[currentMarker].classList.remove('now-playing');
+            }
+            if (index >= 0) {
+                markerItems[index].classList.add('now-playing');
+            }
+            currentMarker = index;
+        }
+
+        function onPlayerStateChange(event) {
+            highlightMarker();
+            if (event.data === YT.PlayerState.PLAYING) {
+                pollTimer = pollTimer || setInterval(highlightMarker, POLL_MS);
+            } else {
+                clearInterval(pollTimer);
+                pollTimer = null;
+            }
+        }
+
+        function seekToMarker(event, play) {
+            const item = event.target.closest('.marker-item');
+            if (item) {
+                play(parseInt(item.dataset.time));
+            }
+        }
+'''
+
+PLAYER_SOURCE = MARKERS_SOURCE + '''
+        let player;
+
+        function onYouTubeIframeAPIReady() {
+            player = new YT.Player('youtube-player', {
+                events: {
+                    'onReady': onPlayerReady,
+                    'onStateChange': onPlayerStateChange
+                }
+            });
+        }
+
+        function onPlayerReady(event) {
+            markerSection.addEventListener('click', event => seekToMarker(event, time => {
+                player.seekTo(time, true);
+                player.playVideo();
+            }));
+        }
+'''
+
+IFRAME_SOURCE = '''                    <iframe id="youtube-player"
+                        src="https://www.youtube.com/embed/{{videoId}}?enablejsapi=1"
+                        frameborder="0"
+                        allow="accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture; web-share"
+                        allowfullscreen>
+                    </iframe>'''
+
+# Click-to-load player: a thumbnail and play button stand in for the embed
+# until the first click on it or on a marker, and only then is the
+# IFrame API fetched and the real player created.
+FACADE_SOURCE = '''                    <button type="button" id="youtube-player" class="video-facade" data-video-id="{{videoId}}" aria-label="Play video"
+                        style="background-image: url('https://i.ytimg.com/vi/{{videoId}}/hqdefault.jpg')">
+                        <span class="play-button"></span>
+                    </button>'''
+
+FACADE_CSS = '''
+        .video-facade {
+            position: absolute;
+            top: 0;
+            left: 0;
+            width: 100%;
+            height: 100%;
+            border: 0;
+            padding: 0;
+            cursor: pointer;
+            background-color: #000;
+            background-size: cover;
+            background-position: center;
+        }
+
+        .play-button {
+            position: absolute;
+            top: 50%;
+            left: 50%;
+            width: 68px;
+            height: 48px;
+            margin: -24px 0 0 -34px;
+            border-radius: 14px;
+            background: rgba(255,0,0,0.85);
+            transition: background 0.3s;
+        }
+
+        .play-button::after {
+            content: '';
+            position: absolute;
+            top: 50%;
+            left: 50%;
+            margin: -9px 0 0 -6px;
+            border-style: solid;
+            border-width: 9px 0 9px 16px;
+            border-color: transparent transparent transparent white;
+        }
+
+        .video-facade:hover .play-button {
+            background: #f00;
+        }
+'''
+
+FACADE_PLAYER_SOURCE = MARKERS_SOURCE + '''
+        let player;
+        let playerReady = false;
+        let pendingSeek = null;
+
+        function loadPlayer(time) {
+            if (time !== null) {
+                pendingSeek = time;
+            }
+            if (player) {
+                return;
+            }
+            player = 'loading';
+            const api = document.createElement('script');
+            api.src = 'https://www.youtube.com/iframe_api';
+            document.head.appendChild(api);
+        }
+
+        function onYouTubeIframeAPIReady() {
+            const facade = document.getElementById('youtube-player');
+            player = new YT.Player('youtube-player', {
+                videoId: facade.dataset.videoId,
+                playerVars: { autoplay: 1 },
+                events: {
+                    'onReady': onPlayerReady,
+                    'onStateChange': onPlayerStateChange
+                }
+            });
+        }
+
+        function onPlayerReady(event) {
+            playerReady = true;
+            if (pendingSeek !== null) {
+                player.seekTo(pendingSeek, true);
+            }
+            player.playVideo();
+        }
+
+        document.getElementById('youtube-player').addEventListener('click', () => loadPlayer(null));
+        markerSection.addEventListener('click', event => seekToMarker(event, time => {
+            if (playerReady) {
+                player.seekTo(time, true);
+                player.playVideo();
+            } else {
+                loadPlayer(time);
+            }
+        }));
+'''
+
+IFRAME_API_TAG = '    <script src="https://www.youtube.com/iframe_api"></script>'
+
+ASSETS_DIR = 'assets'
+
+CSS_TEMPLATE = Template(CSS_SOURCE)
+
+def color_scheme(artist):
+    """Pick the color pair for an artist"""
+    return COLOR_SCHEMES[len(artist) % len(COLOR_SCHEMES)]
+
+@lru_cache(maxsize=None)
+def render_css(color1, color2):
+    """Render the stylesheet once per color scheme"""
+    return CSS_TEMPLATE.render({'color1': color1, 'color2': color2})
+
+def hashed_name(stem, ext, content):
+    digest = hashlib.sha256(content.encode('utf-8')).hexdigest()[:10]
+    return f'{stem}.{digest}.{ext}'
+
+@lru_cache(maxsize=None)
+def site_assets(minify=False):
+    """Shared stylesheet and player scripts as {role: (hashed filename, content)}
+
+    The stylesheet reads the page colors from --color1/--color2, so one
+    file serves every color scheme, and carries the facade styles too.
+    Minified assets get their own hashed names.
+    """
+    css = textwrap.dedent(render_css('var(--color1)', 'var(--color2)') + FACADE_CSS)
+    player = textwrap.dedent(PLAYER_SOURCE)
+    facade = textwrap.dedent(FACADE_PLAYER_SOURCE)
+    if minify:
+        css = minify_css(css) + '\n'
+        player = minify_js(player) + '\n'
+        facade = minify_js(facade) + '\n'
+    return {
+        'css': (hashed_name('site', 'css', css), css),
+        'player': (hashed_name('player', 'js', player), player),
+        'facade': (hashed_name('player-facade', 'js', facade), facade)
+    }
+
+def write_assets(out_dir, facade=False, minify=False):
+    """Write the shared assets a build needs under out_dir, returning their relative paths
+
+    Existing files are left alone: a hashed name always has the same content.
+    """
+    os.makedirs(os.path.join(out_dir, ASSETS_DIR), exist_ok=True)
+    assets = site_assets(minify)
+    paths = []
+    for role in ('css', 'facade' if facade else 'player'):
+        name, content = assets[role]
+        path = f'{ASSETS_DIR}/{name}'
+        filepath = os.path.join(out_dir, path)
+        if not os.path.exists(filepath):
+            with open(filepath, 'w', encoding='utf-8') as f:
+                f.write(content)
+        paths.append(path)
+    return paths
+
+def compile_page(color1, color2, external_assets=False, facade=False, minify=False):
+    """Compile the page for one color scheme
+
+    Inline pages carry that scheme's stylesheet and the player script as
+    static text. External pages link the shared assets and only set the
+    two color variables. Facade pages show a thumbnail instead of the
+    embed and load the IFrame API on first interaction. Minified pages
+    have the formatting stripped from everything but their slots.
+    """
+    player_role = 'facade' if facade else 'player'
+    if external_assets:
+        assets = site_assets(minify)
+        styles = (
+            f'    <link rel="stylesheet" href="{ASSETS_DIR}/{assets["css"][0]}">\n'
+            f'    <style>\n        :root {{ --color1: {color1}; --color2: {color2}; }}\n    </style>'
+        )
+        scripts = f'    <script src="{ASSETS_DIR}/{assets[player_role][0]}"></script>'
+    else:
+        css = render_css(color1, color2) + (FACADE_CSS if facade else '')
+        styles = f'    <style>\n{css}    </style>'
+        scripts = f'    <script>\n{FACADE_PLAYER_SOURCE if facade else PLAYER_SOURCE}    </script>'
+    if not facade:
+        scripts = IFRAME_API_TAG + '\n' + scripts
+
+    source = (
+        PAGE_SOURCE
+        .replace('{{styles}}', styles)
+        .replace('{{player}}', FACADE_SOURCE if facade else IFRAME_SOURCE)
+        .replace('{{scripts}}', scripts)
+    )
+    return Template(minify_html(source) if minify else source)
+
+class SchemePages(dict):
+    """(external_assets, facade, minify) -> the page for every color scheme, compiled on first use"""
+
+    def __missing__(self, key):
+        pages = self[key] = [compile_page(color1, color2, *key) for color1, color2 in COLOR_SCHEMES]
+        return pages
+
+SCHEME_PAGES = SchemePages()
+
+def page_for(data, external_assets=False, facade=False, minify=False):
+    pages = SCHEME_PAGES[external_assets, facade, minify]
+    return pages[len(data['artist']) % len(pages)]
+
+def render_page(data, external_assets=False, facade=False, minify=False):
+    """Render a complete song page from a generate_html record, markers in playback order
+
+    With external_assets the page links the files from write_assets
+    instead of inlining the stylesheet and player script. With facade the
+    YouTube player is only loaded once the visitor asks for it. With
+    minify the template's formatting whitespace is left out.
+    """
+    return page_for(data, external_assets, facade, minify).render(data)
+
+def minified_savings(data, external_assets=False, facade=False):
+    """Bytes minify saves on this song's page
+
+    Only ASCII template text is removed, so this is the difference in
+    static text between the two templates, without rendering either.
+    """
+    full = page_for(data, external_assets, facade).static_length(data)
+    return full - page_for(data, external_assets, facade, True).static_length(data)
+
+def write_page(data, f, external_assets=False, facade=False, minify=False):
+    """Stream a song page into an open text file
+
+    Markers are rendered a batch at a time, so the page is never held in
+    memory however many markers a song has. data['markers'] may be any
+    iterable in playback order.
+    """
+    f.writelines(page_for(data, external_assets, facade, minify).iter_render(data))
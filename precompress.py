@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Precompress - write .gz (and .br when brotli is installed) next to site files
+
+Static hosts can serve these directly instead of compressing every page on
+every request. Files whose compressed copies are newer than the source are
+skipped, so a rebuild only recompresses the pages it rewrote.
+"""
+
+import os
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from common import pool_map, write_atomic
+
+COMPRESSIBLE = ('.html', '.css', '.js', '.json', '.svg')
+
+def is_fresh(path, compressed_path):
+    try:
+        return os.stat(compressed_path).st_mtime_ns >= os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+def compress_file(path):
+    """Compress one file at maximum level
+
+    Returns (path, raw bytes, gzip bytes, brotli bytes or None, compressed?).
+    """
+    outputs = [(path + '.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli:
+        outputs.append((path + '.br', lambda data: brotli.compress(data, quality=11)))
+
+    if all(is_fresh(path, compressed_path) for compressed_path, compress in outputs):
+        sizes = [os.path.getsize(compressed_path) for compressed_path, compress in outputs]
+        compressed = False
+    else:
+        with open(path, 'rb') as f:
+            data = f.read()
+        sizes = []
+        for compressed_path, compress in outputs:
+            packed = compress(data)
+            write_atomic(compressed_path, packed)
+            sizes.append(len(packed))
+        compressed = True
+
+    br_size = sizes[1] if brotli else None
+    return path, os.path.getsize(path), sizes[0], br_size, compressed
+
+def remove_compressed(path):
+    """Delete the .gz/.br copies of a file that no longer exists"""
+    for ext in ('.gz', '.br'):
+        if os.path.exists(path + ext):
+            os.remove(path + ext)
+
+def compress_files(paths, workers=None):
+    """Compress files across a process pool, returning compress_file results"""
+    return pool_map(compress_file, paths, workers)
+
+def find_compressible(directory):
+    """Every compressible file under a directory, skipping hidden files and directories"""
+    found = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [d for d in dirs if not d.startswith('.')]
+        for name in files:
+            if name.endswith(COMPRESSIBLE) and not name.startswith('.'):
+                found.append(os.path.join(root, name))
+    return sorted(found)
+
+def remove_orphans(directory):
+    """Delete .gz/.br files whose source file is gone, returning their paths"""
+    removed = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [d for d in dirs if not d.startswith('.')]
+        for name in files:
+            base, ext = os.path.splitext(name)
+            if ext in ('.gz', '.br') and base.endswith(COMPRESSIBLE) and base not in files:
+                os.remove(os.path.join(root, name))
+                removed.append(os.path.join(root, name))
+    return removed
+
+def format_report(results, base_dir):
+    """Per-file size table comparing raw and compressed bytes"""
+    lines = [f"{'file':<48} {'raw':>9} {'gzip':>9} {'brotli':>9}"]
+    totals = [0, 0, 0]
+    for path, raw, gz, br, compressed in results:
+        name = os.path.relpath(path, base_dir)
+        br_text = f'{br:>9}' if br is not None else f"{'-':>9}"
+        lines.append(f'{name:<48} {raw:>9} {gz:>9} {br_text}')
+        totals[0] += raw
+        totals[1] += gz
+        totals[2] += br or 0
+    lines.append(format_totals(totals, brotli is not None))
+    return '\n'.join(lines)
+
+def format_totals(totals, with_brotli):
+    raw, gz, br = totals
+    line = f"{'total':<48} {raw:>9} {gz:>9} {br if with_brotli else '-':>9}"
+    if raw:
+        line += f'   gzip {gz / raw:.0%}'
+        if with_brotli:
+            line += f', brotli {br / raw:.0%}'
+    return line
+
+def summarize(results):
+    """One-line summary of a compression run"""
+    totals = [sum(r[1] for r in results), sum(r[2] for r in results), sum(r[3] or 0 for r in results)]
+    written = sum(1 for r in results if r[4])
+    summary = f'{written} file(s) compressed, {len(results) - written} unchanged; '
+    summary += f'{totals[0]} bytes raw -> {totals[1]} gzip'
+    if brotli:
+        summary += f', {totals[2]} brotli'
+    return summary
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Publish queue - commit and push many song pages in one git operation
+
+Written pages are queued instead of being committed one by one. A flush
+stages every queued file with a single `git update-index --stdin`, makes
+one commit of just those files and does one push, so adding 50 songs
+costs one round trip and anything else already staged stays staged.
+The queue is kept in .publish-queue.json in the repository, so pages
+queued by separate add-song.py runs, or left over when the GUI closed, are
+published by the next flush.
+"""
+
+import os
+import json
+import threading
+import subprocess
+
+from common import atomic_write
+
+QUEUE_NAME = '.publish-queue.json'
+
+# Held for every git command, so flushes never race each other
+GIT_LOCK = threading.Lock()
+
+class PublishError(RuntimeError):
+    """A git command failed; queued pages stay queued"""
+
+def commit_message(messages):
+    messages = list(dict.fromkeys(messages))
+    if len(messages) == 1:
+        return messages[0]
+    if all(message.startswith('Add ') for message in messages):
+        title = f'Add {len(messages)} songs'
+    else:
+        title = f'Publish {len(messages)} changes'
+    return f'{title}\n\n' + '\n'.join(f'- {message}' for message in messages)
+
+class PublishQueue:
+    def __init__(self, repo_dir, push=True):
+        self.repo_dir = repo_dir
+        self.path = os.path.join(repo_dir, QUEUE_NAME)
+        self.push = push
+        self.lock = threading.Lock()
+
+    def load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {'pending': [], 'unpushed': False}
+
+    def save(self, state):
+        if not state['pending'] and not state['unpushed']:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        with atomic_write(self.path) as f:
+            json.dump(state, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+
+    def pending(self):
+        """Queued (path, message) pairs, oldest first"""
+        with self.lock:
+            return [(entry['path'], entry['message']) for entry in self.load()['pending']]
+
+    def add(self, path, message):
+        """Queue a written page; queuing the same path again replaces its message"""
+        path = os.path.relpath(os.path.abspath(path), self.repo_dir)
+        with self.lock:
+            state = self.load()
+            state['pending'] = [entry for entry in state['pending'] if entry['path'] != path]
+            state['pending'].append({'path': path, 'message': message})
+            return self.queued(state)
+
+    def add_all(self, paths, message):
+        """Queue written or deleted files under one message; files already queued keep theirs"""
+        with self.lock:
+            state = self.load()
+            queued = {entry['path'] for entry in state['pending']}
+            for path in paths:
+                path = os.path.relpath(os.path.abspath(path), self.repo_dir)
+                if path not in queued:
+                    queued.add(path)
+                    state['pending'].append({'path': path, 'message': message})
+            return self.queued(state)
+
+    def queued(self, state):
+        """Save state after an add, returning how many files are queued; call with the lock held"""
+        self.save(state)
+        return len(state['pending'])
+
+    def git(self, *args, input=None, check=True):
+        try:
+            return subprocess.run(
+                ['git', *args], cwd=self.repo_dir, input=input, check=check, capture_output=True, text=True
+            )
+        except subprocess.CalledProcessError as e:
+            output = (e.stderr or e.stdout or '').strip()
+            raise PublishError(f"git {args[0]} failed: {output or f'exit status {e.returncode}'}") from e
+
+    def flush(self, report=None):
+        """Commit every queued page at once and push, returning what was published
+
+        Returns {'published': [messages], 'committed': bool, 'pushed': bool}.
+        Raises PublishError if git fails; pages that were not committed
+        stay queued, and a commit whose push failed is pushed next time.
+        """
+        report = report or (lambda stage, detail=None: None)
+        with GIT_LOCK:
+            with self.lock:
+                state = self.load()
+            entries = state['pending']
+            messages = [entry['message'] for entry in entries]
+
+            committed = False
+            if entries:
+                report('committing', len(entries))
+                paths = ''.join(entry['path'] + '\0' for entry in entries)
+                self.git('update-index', '--add', '--remove', '-z', '--stdin', input=paths)
+                staged = set(self.git('diff', '--cached', '--name-only', '-z').stdout.split('\0'))
+                changed = ''.join(entry['path'] + '\0' for entry in entries if entry['path'].replace(os.sep, '/') in staged)
+                if changed:
+                    # Only the queued files; anything else the user staged stays staged
+                    self.git(
+                        'commit', '-m', commit_message(messages),
+                        '--pathspec-from-file=-', '--pathspec-file-nul', input=changed
+                    )
+                    committed = True
+
+                with self.lock:
+                    state = self.load()
+                    flushed = {entry['path']: entry['message'] for entry in entries}
+                    state['pending'] = [
+                        entry for entry in state['pending'] if flushed.get(entry['path']) != entry['message']
+                    ]
+                    state['unpushed'] = state['unpushed'] or committed
+                    self.save(state)
+
+            pushed = False
+            if self.push and state['unpushed']:
+                report('pushing')
+                self.git('push')
+                pushed = True
+                with self.lock:
+                    state = self.load()
+                    state['unpushed'] = False
+                    self.save(state)
+
+        return {'published': messages, 'committed': committed, 'pushed': pushed}
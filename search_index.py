@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Search index - a precomputed inverted index for client-side song search
+
+Titles, artists, descriptions and marker annotations are split into
+normalized tokens. Each token maps to a flat [song id, marker offset, ...]
+posting list; offset -1 means the title, artist or description matched.
+Tokens are sharded by their first two characters into search/<prefix>.json,
+so the browser only fetches the shards a query needs. Song details are
+sharded by id into search/songs-<n>.json.
+
+Song ids are stable across builds and every song's tokens are hashed, so a
+rebuild after one song changes only rewrites the shards that song touches.
+"""
+
+import os
+import re
+import html
+import json
+import hashlib
+import unicodedata
+
+from common import atomic_write
+
+INDEX_DIR = 'search'
+STATE_NAME = '.state.json'
+SONGS_PER_SHARD = 500
+PREFIX_LENGTH = 2
+
+TOKEN_PATTERN = re.compile(r'\w+')
+TAG_PATTERN = re.compile(r'<[^>]*>')
+PLAIN_PREFIX = re.compile(r'^[a-z0-9]+$')
+
+def normalize(text):
+    """Lowercase text with markup, entities and accents stripped"""
+    text = html.unescape(TAG_PATTERN.sub(' ', text))
+    text = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in text if not unicodedata.combining(c)).lower()
+
+def tokenize(text):
+    """Normalized search tokens, skipping single characters"""
+    return [token for token in TOKEN_PATTERN.findall(normalize(text)) if len(token) > 1]
+
+def shard_key(token):
+    """Shard name for a token: its prefix, hex-encoded unless plain ASCII"""
+    prefix = token[:PREFIX_LENGTH]
+    if PLAIN_PREFIX.match(prefix):
+        return prefix
+    return '_' + '-'.join(f'{ord(c):x}' for c in prefix)
+
+def song_postings(data):
+    """{token: [offsets]} for one song, -1 for song-level fields"""
+    postings = {}
+    for field in ('title', 'artist', 'description'):
+        for token in tokenize(data.get(field, '')):
+            postings.setdefault(token, [-1])
+    for offset, marker in enumerate(data['markers']):
+        for token in tokenize(marker['text']):
+            offsets = postings.setdefault(token, [])
+            if not offsets or offsets[-1] != offset:
+                offsets.append(offset)
+    return postings
+
+def song_hash(data):
+    searchable = [data['title'], data['artist'], data.get('description', ''),
+                  [[m['seconds'], m['text']] for m in data['markers']]]
+    return hashlib.sha256(json.dumps(searchable, ensure_ascii=False).encode('utf-8')).hexdigest()[:16]
+
+def song_entry(slug, data):
+    return [slug + '.html', data['title'], data['artist'], [int(m['seconds']) for m in data['markers']]]
+
+def read_json(path, default):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return default
+
+def read_text(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+def write_json(path, data):
+    with atomic_write(path) as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+
+def load_state(index_dir):
+    """Index state, or an empty one if any shard it refers to has gone missing"""
+    empty = {'next_id': 0, 'songs': {}}
+    state = read_json(os.path.join(index_dir, STATE_NAME), empty)
+    shards = {key for known in state['songs'].values() for key in known['shards']}
+    shards.update(f"songs-{known['id'] // SONGS_PER_SHARD}" for known in state['songs'].values())
+    if all(os.path.exists(os.path.join(index_dir, f'{key}.json')) for key in shards):
+        return state
+    return empty
+
+def update_index(out_dir, songs, rebuild=False):
+    """Bring search/ in line with songs, a list of (slug, data) pairs
+
+    Only songs whose searchable text changed, and songs that were removed,
+    are re-indexed, unless rebuild is set. Returns the relative paths of
+    every file in the index.
+    """
+    index_dir = os.path.join(out_dir, INDEX_DIR)
+    os.makedirs(index_dir, exist_ok=True)
+    state_path = os.path.join(index_dir, STATE_NAME)
+    state = {'next_id': 0, 'songs': {}} if rebuild else load_state(index_dir)
+    if not state['songs']:
+        # Starting over: shards left from an earlier index would mix in old ids
+        for name in os.listdir(index_dir):
+            if name.endswith('.json') and not name.startswith('.'):
+                os.remove(os.path.join(index_dir, name))
+
+    current = dict(songs)
+    changed = {}
+    for slug, data in current.items():
+        digest = song_hash(data)
+        known = state['songs'].get(slug)
+        if not known or known['hash'] != digest:
+            changed[slug] = (digest, data)
+    removed = [slug for slug in state['songs'] if slug not in current]
+
+    # Token shards: drop the old postings of every changed or removed song,
+    # then add the new postings of changed songs
+    updates = {}
+    stale_ids = set()
+    for slug in list(changed) + removed:
+        known = state['songs'].get(slug)
+        if known:
+            stale_ids.add(known['id'])
+            for key in known['shards']:
+                updates.setdefault(key, {})
+
+    song_shards = set()
+    for slug in removed:
+        song_shards.add(state['songs'].pop(slug)['id'] // SONGS_PER_SHARD)
+    for slug, (digest, data) in changed.items():
+        known = state['songs'].get(slug)
+        song_id = known['id'] if known else state['next_id']
+        if not known:
+            state['next_id'] += 1
+        keys = set()
+        for token, offsets in song_postings(data).items():
+            key = shard_key(token)
+            keys.add(key)
+            postings = updates.setdefault(key, {}).setdefault(token, [])
+            for offset in offsets:
+                postings += [song_id, offset]
+        state['songs'][slug] = {'id': song_id, 'hash': digest, 'shards': sorted(keys)}
+        song_shards.add(song_id // SONGS_PER_SHARD)
+
+    for key, additions in updates.items():
+        path = os.path.join(index_dir, f'{key}.json')
+        shard = {}
+        for token, postings in read_json(path, {}).items():
+            kept = [value for i in range(0, len(postings), 2)
+                    for value in postings[i:i + 2] if postings[i] not in stale_ids]
+            if kept:
+                shard[token] = kept
+        for token, postings in additions.items():
+            shard[token] = shard.get(token, []) + postings
+        if shard:
+            write_json(path, shard)
+        elif os.path.exists(path):
+            os.remove(path)
+
+    by_id = {known['id']: slug for slug, known in state['songs'].items()}
+    for number in song_shards:
+        entries = {}
+        for song_id in range(number * SONGS_PER_SHARD, (number + 1) * SONGS_PER_SHARD):
+            if song_id in by_id:
+                slug = by_id[song_id]
+                entries[song_id] = song_entry(slug, current[slug])
+        path = os.path.join(index_dir, f'songs-{number}.json')
+        if entries:
+            write_json(path, entries)
+        elif os.path.exists(path):
+            os.remove(path)
+
+    write_json(state_path, state)
+    script_path = os.path.join(index_dir, 'search.js')
+    if read_text(script_path) != SEARCH_JS:
+        with open(script_path, 'w', encoding='utf-8') as f:
+            f.write(SEARCH_JS)
+
+    files = sorted(name for name in os.listdir(index_dir) if name.endswith(('.json', '.js')) and not name.startswith('.'))
+    return [f'{INDEX_DIR}/{name}' for name in files]
+
+SEARCH_JS = r'''// Client for the search index written by search_index.py
+const SEARCH_DIR = 'search/';
+const SONGS_PER_SHARD = 500;
+const shardCache = new Map();
+
+function normalize(text) {
+    return text.normalize('NFKD').replace(/\p{M}/gu, '').toLowerCase();
+}
+
+function tokenize(text) {
+    return (normalize(text).match(/[\p{L}\p{N}_]+/gu) || []).filter(token => token.length > 1);
+}
+
+function shardKey(token) {
+    const prefix = [...token].slice(0, 2).join('');
+    if (/^[a-z0-9]+$/.test(prefix)) {
+        return prefix;
+    }
+    return '_' + [...prefix].map(c => c.codePointAt(0).toString(16)).join('-');
+}
+
+function fetchShard(name) {
+    if (!shardCache.has(name)) {
+        shardCache.set(name, fetch(SEARCH_DIR + name + '.json')
+            .then(response => response.ok ? response.json() : {})
+            .catch(() => ({})));
+    }
+    return shardCache.get(name);
+}
+
+// Every query token must match; the last one also matches as a prefix.
+// Resolves to [{href, title, artist, score, markers: [seconds]}], best first.
+async function searchSongs(query) {
+    const tokens = tokenize(query);
+    if (!tokens.length) {
+        return [];
+    }
+
+    let hits = null;
+    for (const [i, token] of tokens.entries()) {
+        const shard = await fetchShard(shardKey(token));
+        const matches = new Map();
+        const keys = i === tokens.length - 1 ? Object.keys(shard).filter(key => key.startsWith(token)) : [token];
+        for (const key of keys) {
+            const postings = shard[key] || [];
+            for (let p = 0; p < postings.length; p += 2) {
+                const offsets = matches.get(postings[p]) || [];
+                offsets.push(postings[p + 1]);
+                matches.set(postings[p], offsets);
+            }
+        }
+        if (hits === null) {
+            hits = matches;
+        } else {
+            for (const id of [...hits.keys()]) {
+                if (matches.has(id)) {
+                    hits.set(id, hits.get(id).concat(matches.get(id)));
+                } else {
+                    hits.delete(id);
+                }
+            }
+        }
+    }
+
+    const results = [];
+    for (const [id, offsets] of hits) {
+        const songs = await fetchShard('songs-' + Math.floor(id / SONGS_PER_SHARD));
+        const song = songs[id];
+        if (!song) {
+            continue;
+        }
+        const [href, title, artist, seconds] = song;
+        const markers = [...new Set(offsets.filter(offset => offset >= 0))].sort((a, b) => a - b);
+        results.push({href, title, artist, score: offsets.length, markers: markers.map(offset => seconds[offset])});
+    }
+    return results.sort((a, b) => b.score - a.score);
+}
+'''
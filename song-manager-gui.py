@@ -5,217 +5,44 @@ Song Manager GUI - Easy interface to add songs to your collection
 
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
-import re
 import os
-import subprocess
-
-def time_to_seconds(time_str):
-    """Convert mm:ss to seconds"""
-    parts = time_str.split(':')
-    if len(parts) == 2:
-        mins = int(parts[0]) if parts[0] else 0
-        secs = int(parts[1]) if parts[1] else 0
-        return mins * 60 + secs
-    return 0
-
-def extract_youtube_id(url):
-    """Extract YouTube video ID from URL"""
-    patterns = [
-        r'(?:youtube\.com\/watch\?v=|youtu\.be\/|youtube\.com\/embed\/)([^&\?\/]+)',
-        r'^([a-zA-Z0-9_-]{11})$'
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, url)
-        if match:
-            return match.group(1)
-    return None
-
-def generate_slug(artist, title):
-    """Generate filename slug"""
-    slug = (artist + '-' + title).lower()
-    slug = re.sub(r'[^a-z0-9]+', '-', slug)
-    slug = re.sub(r'^-+|-+$', '', slug)
-    return slug
-
-def generate_html(data):
-    """Generate complete HTML page"""
-    title = data['title']
-    artist = data['artist']
-    video_id = data['videoId']
-    description = data['description']
-    markers = data['markers']
-    links = data['links']
-
-    # Generate markers HTML
-    markers_html = ''
-    for marker in markers:
-        markers_html += f"""
-                <div class="marker-item" data-time="{marker['seconds']}">
-                    <span class="marker-time">{marker['time']}</span>
-                    <span class="marker-text">{marker['text']}</span>
-                </div>"""
-
-    # Generate streaming links HTML
-    streaming_links_html = f"""
-                    <a href="https://www.youtube.com/watch?v={video_id}" target="_blank" class="stream-link">YouTube</a>"""
-
-    if links['spotify']:
-        streaming_links_html += f"""\n                    <a href="{links['spotify']}" target="_blank" class="stream-link">Spotify</a>"""
-    if links['appleMusic']:
-        streaming_links_html += f"""\n                    <a href="{links['appleMusic']}" target="_blank" class="stream-link">Apple Music</a>"""
-    if links['youtubeMusic']:
-        streaming_links_html += f"""\n                    <a href="{links['youtubeMusic']}" target="_blank" class="stream-link">YouTube Music</a>"""
-
-    # Generate color scheme
-    colors = [
-        ['#8b0000', '#2d1b2e'],
-        ['#667eea', '#764ba2'],
-        ['#f093fb', '#f5576c'],
-        ['#4facfe', '#00f2fe'],
-        ['#43e97b', '#38f9d7']
-    ]
-    color_index = len(artist) % len(colors)
-    color1, color2 = colors[color_index]
-
-    return f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{title} - {artist}</title>
-    <style>
-        * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-        body {{
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            background: linear-gradient(135deg, #1a1a1a 0%, {color2} 100%);
-            min-height: 100vh;
-            padding: 40px 20px;
-        }}
-        .container {{
-            max-width: 1000px;
-            margin: 0 auto;
-            background: white;
-            border-radius: 20px;
-            box-shadow: 0 20px 60px rgba(0,0,0,0.5);
-            overflow: hidden;
-        }}
-        .header {{
-            background: linear-gradient(135deg, {color1} 0%, {color2} 100%);
-            color: white;
-            padding: 40px;
-            text-align: center;
-        }}
-        .header h1 {{ font-size: 2.8em; margin-bottom: 10px; text-shadow: 2px 2px 4px rgba(0,0,0,0.3); }}
-        .header p {{ font-size: 1.3em; opacity: 0.9; }}
-        .content {{ padding: 40px; }}
-        .description {{
-            font-size: 1.1em;
-            line-height: 1.8;
-            color: #333;
-            margin-bottom: 30px;
-            padding: 20px;
-            background: #f8f9fa;
-            border-radius: 10px;
-            border-left: 4px solid {color1};
-        }}
-        .video-container {{ margin: 30px 0; background: #000; border-radius: 10px; overflow: hidden; box-shadow: 0 8px 24px rgba(0,0,0,0.3); }}
-        .video-wrapper {{ position: relative; padding-bottom: 56.25%; height: 0; overflow: hidden; }}
-        .video-wrapper iframe {{ position: absolute; top: 0; left: 0; width: 100%; height: 100%; }}
-        .markers-section {{ margin: 40px 0; background: #f8f9fa; padding: 30px; border-radius: 10px; }}
-        .markers-section h2 {{ color: #333; margin-bottom: 20px; font-size: 1.4em; }}
-        .marker-item {{
-            background: white;
-            padding: 18px;
-            margin-bottom: 12px;
-            border-radius: 8px;
-            border-left: 4px solid {color1};
-            cursor: pointer;
-            transition: all 0.3s;
-            display: flex;
-            align-items: flex-start;
-            gap: 15px;
-        }}
-        .marker-item:hover {{ transform: translateX(5px); box-shadow: 0 4px 12px rgba(0,0,0,0.2); background: #fffbfb; }}
-        .marker-time {{ color: {color1}; font-weight: bold; font-size: 1.1em; min-width: 60px; flex-shrink: 0; }}
-        .marker-text {{ color: #555; line-height: 1.6; }}
-        .streaming-links {{ margin-top: 30px; padding: 25px; background: #f8f9fa; border-radius: 10px; }}
-        .streaming-links h3 {{ color: #333; margin-bottom: 15px; font-size: 1.2em; }}
-        .links-container {{ display: flex; gap: 15px; flex-wrap: wrap; }}
-        .stream-link {{
-            display: inline-block;
-            padding: 12px 24px;
-            background: white;
-            color: {color1};
-            text-decoration: none;
-            border-radius: 8px;
-            font-weight: 600;
-            transition: all 0.3s;
-            border: 2px solid {color1};
-        }}
-        .stream-link:hover {{ background: {color1}; color: white; transform: translateY(-2px); box-shadow: 0 4px 12px rgba(0,0,0,0.3); }}
-        @media (max-width: 768px) {{
-            .header h1 {{ font-size: 2em; }}
-            .content {{ padding: 20px; }}
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>{title}</h1>
-            <p>{artist}</p>
-        </div>
-        <div class="content">
-            <div class="description">{description}</div>
-            <div class="video-container">
-                <div class="video-wrapper">
-                    <iframe id="youtube-player" src="https://www.youtube.com/embed/{video_id}?enablejsapi=1"
-                        frameborder="0" allow="accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture; web-share" allowfullscreen>
-                    </iframe>
-                </div>
-            </div>
-            <div class="markers-section">
-                <h2>Key Moments to Listen For:</h2>
-{markers_html}
-            </div>
-            <div class="streaming-links">
-                <h3>Listen On:</h3>
-                <div class="links-container">
-{streaming_links_html}
-                </div>
-            </div>
-        </div>
-    </div>
-    <script src="https://www.youtube.com/iframe_api"></script>
-    <script>
-        let player;
-        function onYouTubeIframeAPIReady() {{
-            player = new YT.Player('youtube-player', {{ events: {{ 'onReady': onPlayerReady }} }});
-        }}
-        function onPlayerReady(event) {{
-            document.querySelectorAll('.marker-item').forEach(item => {{
-                item.addEventListener('click', function() {{
-                    const time = parseInt(this.dataset.time);
-                    player.seekTo(time, true);
-                    player.playVideo();
-                }});
-            }});
-        }}
-    </script>
-</body>
-</html>"""
+
+import song_catalog
+import song_worker
+import publish_queue
+from song_core import TIME_PATTERN, time_to_seconds, extract_youtube_id, generate_slug, sort_markers
+
+POLL_MS = 100
+# Queued songs are published once no new song has been added for this long
+PUBLISH_DELAY_MS = 10000
 
 class SongManagerGUI:
     def __init__(self, root):
         self.root = root
         self.root.title("🎵 Song Manager")
-        self.root.geometry("800x700")
+        self.root.geometry("800x760")
 
         # Markers list
         self.markers = []
 
+        self.catalog = song_catalog.SongCatalog()
+
+        # Writing and publishing run in the background; jobs maps job ids
+        # to what the Tk thread needs once they report back
+        self.repo_dir = os.path.dirname(os.path.abspath(__file__))
+        self.worker = song_worker.BackgroundWorker()
+        self.publisher = publish_queue.PublishQueue(self.repo_dir)
+        self.jobs = {}
+        self.next_job = 0
+        self.publish_timer = None
+        self.publishing = False
+        self.publish_again = False
+
         self.create_widgets()
 
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.after(POLL_MS, self.poll_worker)
+
     def create_widgets(self):
         # Main frame with scrollbar
         main_frame = ttk.Frame(self.root, padding="20")
@@ -255,7 +82,7 @@ class SongManagerGUI:
         marker_frame = ttk.Frame(main_frame)
         marker_frame.grid(row=6, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=5)
 
-        ttk.Label(marker_frame, text="Time (mm:ss):").grid(row=0, column=0, padx=5)
+        ttk.Label(marker_frame, text="Time (mm:ss or h:mm:ss):").grid(row=0, column=0, padx=5)
         self.marker_time_entry = ttk.Entry(marker_frame, width=10)
         self.marker_time_entry.grid(row=0, column=1, padx=5)
 
@@ -292,6 +119,19 @@ class SongManagerGUI:
 
         ttk.Button(button_frame, text="✓ Create Song Page", command=self.create_song, style='Accent.TButton').grid(row=0, column=0, padx=10)
         ttk.Button(button_frame, text="Clear Form", command=self.clear_form).grid(row=0, column=1, padx=10)
+        ttk.Button(button_frame, text="Publish Now", command=self.publish_now).grid(row=0, column=2, padx=10)
+
+        self.publish_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(button_frame, text="Commit and push to GitHub", variable=self.publish_var).grid(row=1, column=0, columnspan=3, pady=(10, 0))
+
+        # Background progress
+        status_frame = ttk.Frame(main_frame)
+        status_frame.grid(row=14, column=0, columnspan=2, sticky=(tk.W, tk.E))
+
+        self.progress = ttk.Progressbar(status_frame, mode='indeterminate', length=150)
+        self.progress.grid(row=0, column=0, padx=5)
+        self.status_label = ttk.Label(status_frame, text="Ready")
+        self.status_label.grid(row=0, column=1, sticky=tk.W, padx=5)
 
         main_frame.columnconfigure(1, weight=1)
 
@@ -304,8 +144,8 @@ class SongManagerGUI:
             return
 
         # Validate time format
-        if not re.match(r'^\d+:[0-5]\d$', time):
-            messagebox.showwarning("Invalid Time", "Time must be in mm:ss format (e.g., 3:45)")
+        if not TIME_PATTERN.match(time):
+            messagebox.showwarning("Invalid Time", "Time must be in mm:ss or h:mm:ss format (e.g., 3:45 or 1:03:45)")
             return
 
         self.markers.append({'time': time, 'text': text})
@@ -324,17 +164,20 @@ class SongManagerGUI:
 
     def clear_form(self):
         if messagebox.askyesno("Clear Form", "Are you sure you want to clear all fields?"):
-            self.title_entry.delete(0, tk.END)
-            self.artist_entry.delete(0, tk.END)
-            self.youtube_entry.delete(0, tk.END)
-            self.description_text.delete('1.0', tk.END)
-            self.spotify_entry.delete(0, tk.END)
-            self.apple_entry.delete(0, tk.END)
-            self.ytmusic_entry.delete(0, tk.END)
-            self.marker_time_entry.delete(0, tk.END)
-            self.marker_text_entry.delete(0, tk.END)
-            self.markers_listbox.delete(0, tk.END)
-            self.markers = []
+            self.reset_form()
+
+    def reset_form(self):
+        self.title_entry.delete(0, tk.END)
+        self.artist_entry.delete(0, tk.END)
+        self.youtube_entry.delete(0, tk.END)
+        self.description_text.delete('1.0', tk.END)
+        self.spotify_entry.delete(0, tk.END)
+        self.apple_entry.delete(0, tk.END)
+        self.ytmusic_entry.delete(0, tk.END)
+        self.marker_time_entry.delete(0, tk.END)
+        self.marker_text_entry.delete(0, tk.END)
+        self.markers_listbox.delete(0, tk.END)
+        self.markers = []
 
     def create_song(self):
         # Validate inputs
@@ -356,6 +199,19 @@ class SongManagerGUI:
             messagebox.showerror("Invalid URL", "Please enter a valid YouTube URL!")
             return
 
+        slug = generate_slug(artist, title)
+        if any(job['slug'] == slug for job in self.jobs.values()):
+            messagebox.showerror("Already Exists", f"{slug}.html is still being written. Wait for it to finish first.")
+            return
+
+        replace = False
+        try:
+            self.catalog.check_duplicate(slug, video_id)
+        except song_catalog.DuplicateSongError as e:
+            if not messagebox.askyesno("Already Exists", f"{e}\n\nReplace it?"):
+                return
+            replace = True
+
         # Prepare markers with seconds
         markers_data = []
         for marker in self.markers:
@@ -365,47 +221,137 @@ class SongManagerGUI:
                 'text': marker['text']
             })
 
-        # Generate HTML
-        html = generate_html({
+        record = {
             'title': title,
             'artist': artist,
             'videoId': video_id,
             'description': description,
-            'markers': markers_data,
+            'markers': sort_markers(markers_data),
             'links': {
                 'spotify': self.spotify_entry.get().strip(),
                 'appleMusic': self.apple_entry.get().strip(),
                 'youtubeMusic': self.ytmusic_entry.get().strip()
             }
-        })
-
-        # Save file
-        filename = generate_slug(artist, title) + '.html'
-        filepath = os.path.join(os.path.dirname(__file__), filename)
-
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(html)
-
-        # Show success message
-        result = messagebox.askyesno(
-            "Success!",
-            f"Song page created: {filename}\n\nWould you like to commit and push to GitHub now?"
-        )
-
-        if result:
-            try:
-                subprocess.run(['git', 'add', filename], cwd=os.path.dirname(__file__), check=True)
-                subprocess.run(['git', 'commit', '-m', f'Add {title} by {artist}'], cwd=os.path.dirname(__file__), check=True)
-                subprocess.run(['git', 'push'], cwd=os.path.dirname(__file__), check=True)
-                messagebox.showinfo("Pushed!", "Changes have been pushed to GitHub!")
-            except Exception as e:
-                messagebox.showerror("Git Error", f"Error pushing to GitHub:\n{e}\n\nPlease run git commands manually.")
-
-        # Ask if they want to clear the form
-        if messagebox.askyesno("Continue?", "Would you like to add another song?"):
-            self.clear_form()
+        }
+
+        # Write in the background; the catalog is updated on this thread
+        # once the page is on disk, then the page is queued for publishing
+        filename = slug + '.html'
+        job_id = self.next_job
+        self.next_job += 1
+        self.jobs[job_id] = {
+            'slug': slug, 'record': record, 'replace': replace, 'filename': filename,
+            'message': f'Add {title} by {artist}' if self.publish_var.get() else None
+        }
+        self.worker.submit(job_id, song_worker.write_song, os.path.join(self.repo_dir, filename), record)
+
+        self.reset_form()
+        self.set_status(f"Writing {filename}...")
+
+    def set_status(self, text):
+        waiting = len(self.publisher.pending())
+        if waiting and not self.publishing:
+            text += f"  ({waiting} song(s) waiting to publish)"
+        self.status_label.config(text=text)
+        if self.worker.pending:
+            self.progress.start(15)
         else:
-            self.root.quit()
+            self.progress.stop()
+
+    def schedule_publish(self):
+        if self.publish_timer:
+            self.root.after_cancel(self.publish_timer)
+        self.publish_timer = self.root.after(PUBLISH_DELAY_MS, self.publish_now)
+
+    def publish_now(self):
+        """Commit and push every queued song in one go"""
+        if self.publish_timer:
+            self.root.after_cancel(self.publish_timer)
+            self.publish_timer = None
+        if self.publishing:
+            self.publish_again = True
+            return
+        if not self.publisher.pending():
+            self.set_status("Nothing waiting to publish")
+            return
+        self.publishing = True
+        self.worker.submit('publish', self.publisher.flush)
+        self.set_status("Publishing...")
+
+    def poll_worker(self):
+        self.handle_messages(self.worker.poll())
+        self.root.after(POLL_MS, self.poll_worker)
+
+    def handle_messages(self, messages):
+        for job_id, stage, detail in messages:
+            if job_id == 'publish':
+                self.handle_publish(stage, detail)
+                continue
+
+            job = self.jobs[job_id]
+            filename = job['filename']
+            if stage == 'done':
+                del self.jobs[job_id]
+                try:
+                    replaced = self.catalog.add(job['slug'], job['record'], replace=job['replace'])
+                except song_catalog.DuplicateSongError as e:
+                    replaced = []
+                    messagebox.showerror("Catalog Error", f"{filename} was written but not added to the catalog:\n{e}")
+                if replaced:
+                    messagebox.showinfo(
+                        "Replaced",
+                        f"{', '.join(replaced)} replaced in the catalog by {job['slug']}.\n"
+                        "The old page is left in place."
+                    )
+                if job['message']:
+                    self.publisher.add(detail, job['message'])
+                    self.schedule_publish()
+                self.set_status(f"✅ Song page created: {filename}")
+            elif stage == 'error':
+                del self.jobs[job_id]
+                self.set_status(f"❌ {filename} failed")
+                messagebox.showerror("Write Error", f"Could not write {filename}:\n{detail}")
+
+    def handle_publish(self, stage, detail):
+        if stage == 'committing':
+            self.set_status(f"Committing {detail} song(s)...")
+        elif stage == 'pushing':
+            self.set_status("Pushing to GitHub...")
+        elif stage in ('done', 'error'):
+            self.publishing = False
+            if stage == 'done':
+                self.set_status(f"🚀 Published {len(detail['published'])} song(s)")
+            else:
+                self.set_status("❌ Publishing failed")
+                messagebox.showerror(
+                    "Git Error",
+                    f"Error pushing to GitHub:\n{detail}\n\nThe songs stay queued. Use Publish Now to retry, "
+                    "or run: python add-song.py publish"
+                )
+            if self.publish_again:
+                self.publish_again = False
+                self.publish_now()
+
+    def on_close(self):
+        if self.worker.pending and not messagebox.askyesno(
+            "Still Working",
+            f"{self.worker.pending} job(s) are still writing or publishing songs.\n\nQuit once they finish?"
+        ):
+            return
+        self.status_label.config(text="Finishing up...")
+        self.root.update_idletasks()
+        self.publish_again = False
+        self.worker.shutdown()
+        self.handle_messages(self.worker.poll())
+
+        waiting = len(self.publisher.pending())
+        if waiting and messagebox.askyesno("Publish?", f"{waiting} song(s) are waiting to publish.\n\nPublish them now?"):
+            try:
+                self.publisher.flush()
+            except publish_queue.PublishError as e:
+                messagebox.showerror("Git Error", f"{e}\n\nThe songs stay queued. Run: python add-song.py publish")
+        self.catalog.close()
+        self.root.destroy()
 
 if __name__ == '__main__':
     root = tk.Tk()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Song catalog - the embedded SQLite database both front ends write through
+
+Songs are keyed by slug, with indexes on video ID and artist, so duplicate
+and collision checks are index lookups instead of directory scans. Rows
+come back as the same records generate_html takes, in rank order.
+"""
+
+import os
+import json
+import sqlite3
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'songs.db')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS songs (
+    slug TEXT PRIMARY KEY,
+    rank INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    artist TEXT NOT NULL,
+    video_id TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    markers TEXT NOT NULL,
+    links TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS songs_rank ON songs (rank);
+CREATE INDEX IF NOT EXISTS songs_video_id ON songs (video_id);
+CREATE INDEX IF NOT EXISTS songs_artist ON songs (artist COLLATE NOCASE);
+'''
+
+COLUMNS = 'slug, rank, title, artist, video_id, description, markers, links'
+
+class DuplicateSongError(ValueError):
+    """A song with the same slug or video ID is already in the catalog"""
+
+    def __init__(self, message, existing):
+        super().__init__(message)
+        self.existing = existing
+
+def row_to_record(row):
+    return {
+        'slug': row[0],
+        'rank': row[1],
+        'title': row[2],
+        'artist': row[3],
+        'videoId': row[4],
+        'description': row[5],
+        'markers': json.loads(row[6]),
+        'links': json.loads(row[7])
+    }
+
+def record_row(slug, rank, record):
+    return (
+        slug, rank, record['title'], record['artist'], record['videoId'],
+        record.get('description', ''),
+        json.dumps(record['markers'], ensure_ascii=False),
+        json.dumps(record['links'], ensure_ascii=False)
+    )
+
+INSERT = f'INSERT OR REPLACE INTO songs ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)'
+
+class SongCatalog:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.db.execute('SELECT COUNT(*) FROM songs').fetchone()[0]
+
+    def query_one(self, where, *params):
+        row = self.db.execute(f'SELECT {COLUMNS} FROM songs WHERE {where}', params).fetchone()
+        return row_to_record(row) if row else None
+
+    def find_slug(self, slug):
+        return self.query_one('slug = ?', slug)
+
+    def find_video(self, video_id):
+        return self.query_one('video_id = ? ORDER BY rank LIMIT 1', video_id)
+
+    def by_artist(self, artist):
+        rows = self.db.execute(
+            f'SELECT {COLUMNS} FROM songs WHERE artist = ? COLLATE NOCASE ORDER BY rank', (artist,)
+        )
+        return [row_to_record(row) for row in rows]
+
+    def records(self):
+        """Every song in rank order"""
+        rows = self.db.execute(f'SELECT {COLUMNS} FROM songs ORDER BY rank, slug')
+        return [row_to_record(row) for row in rows]
+
+    def check_duplicate(self, slug, video_id):
+        """Raise DuplicateSongError if the slug or video ID is already taken"""
+        existing = self.find_slug(slug)
+        if existing:
+            raise DuplicateSongError(
+                f"{slug}.html already exists for {existing['title']} by {existing['artist']}", existing
+            )
+        existing = self.find_video(video_id)
+        if existing:
+            raise DuplicateSongError(
+                f"Video {video_id} is already used by {existing['title']} by {existing['artist']}", existing
+            )
+
+    def add(self, slug, record, replace=False):
+        """Insert a song, or replace the song it collides with when replace is set
+
+        New songs are ranked after every existing song; a replaced song
+        keeps its rank. A song under another slug with the same video ID is
+        deleted, and its rank reused, so the catalog never holds a video
+        twice. Returns the slugs deleted that way. Without replace, a slug
+        or video ID that is already in the catalog raises DuplicateSongError.
+        """
+        existing = self.find_slug(slug)
+        if not replace:
+            self.check_duplicate(slug, record['videoId'])
+        collision = self.query_one('video_id = ? AND slug != ? ORDER BY rank LIMIT 1', record['videoId'], slug)
+
+        if existing:
+            rank = existing['rank']
+        elif collision:
+            rank = collision['rank']
+        else:
+            rank = record.get('rank') or self.db.execute('SELECT COALESCE(MAX(rank), 0) + 1 FROM songs').fetchone()[0]
+
+        with self.db:
+            replaced = [
+                row[0] for row in self.db.execute('SELECT slug FROM songs WHERE video_id = ? AND slug != ?', (record['videoId'], slug))
+            ]
+            self.db.execute('DELETE FROM songs WHERE video_id = ? AND slug != ?', (record['videoId'], slug))
+            self.db.execute(INSERT, record_row(slug, rank, record))
+        return replaced
+
+    def replace_all(self, songs):
+        """Replace the whole catalog with (slug, record) pairs, ranked in order"""
+        with self.db:
+            self.db.execute('DELETE FROM songs')
+            self.db.executemany(
+                INSERT, (record_row(slug, rank, record) for rank, (slug, record) in enumerate(songs, 1))
+            )
+
+    def remove(self, slug):
+        with self.db:
+            return self.db.execute('DELETE FROM songs WHERE slug = ?', (slug,)).rowcount > 0
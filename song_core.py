@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Song core - the parsing and page helpers both front ends share
+
+Patterns are compiled once at import, and time_to_seconds sits behind a
+bounded LRU cache, since catalogs repeat the same few thousand timestamps
+across every song. URLs and slugs are nearly always unique, so caching them
+would only cost a miss per call. The batch variants take any iterable and
+return a list. Nothing here imports tkinter, so headless builds start fast.
+"""
+
+import re
+from functools import lru_cache
+from operator import itemgetter
+
+import page_template
+
+CACHE_SIZE = 4096
+
+YOUTUBE_URL_PATTERN = re.compile(r'(?:youtube\.com\/watch\?v=|youtu\.be\/|youtube\.com\/embed\/)([^&\?\/]+)')
+YOUTUBE_ID_PATTERN = re.compile(r'^([a-zA-Z0-9_-]{11})$')
+SLUG_SEPARATOR_PATTERN = re.compile(r'[^a-z0-9]+')
+TIME_PATTERN = re.compile(r'^(?:\d+:[0-5]\d:[0-5]\d|\d+:[0-5]\d)$')
+
+@lru_cache(maxsize=CACHE_SIZE)
+def time_to_seconds(time_str):
+    """Convert mm:ss or h:mm:ss to seconds"""
+    parts = time_str.split(':')
+    if len(parts) in (2, 3):
+        seconds = 0
+        for part in parts:
+            seconds = seconds * 60 + (int(part) if part else 0)
+        return seconds
+    return 0
+
+def extract_youtube_id(url):
+    """Extract YouTube video ID from URL"""
+    match = YOUTUBE_URL_PATTERN.search(url) or YOUTUBE_ID_PATTERN.search(url)
+    return match.group(1) if match else None
+
+def generate_slug(artist, title):
+    """Generate filename slug from artist and title"""
+    return SLUG_SEPARATOR_PATTERN.sub('-', (artist + '-' + title).lower()).strip('-')
+
+def parse_timestamps(times):
+    """time_to_seconds for every mm:ss or h:mm:ss string"""
+    return list(map(time_to_seconds, times))
+
+def sort_markers(markers):
+    """Markers in playback order; markers at the same second keep their order"""
+    return sorted(markers, key=itemgetter('seconds'))
+
+def extract_youtube_ids(urls):
+    """extract_youtube_id for every URL, with None for invalid ones"""
+    return list(map(extract_youtube_id, urls))
+
+def slugify_many(songs):
+    """generate_slug for every (artist, title) pair"""
+    return [generate_slug(artist, title) for artist, title in songs]
+
+def generate_html(data, external_assets=False, facade=False, minify=False):
+    """Generate complete HTML page
+
+    With external_assets the page links the shared stylesheet and player
+    script written by page_template.write_assets instead of inlining them.
+    With facade the YouTube player only loads on the first click. With
+    minify the template's formatting whitespace is left out.
+    """
+    return page_template.render_page(data, external_assets, facade, minify)
+
+def write_html(data, f, external_assets=False, facade=False, minify=False):
+    """Stream a complete HTML page into an open file without building it in memory"""
+    page_template.write_page(data, f, external_assets, facade, minify)
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Song importer - turn existing song pages back into catalog records
+
+Each page is streamed through html.parser and the title, artist, video ID,
+description, markers and streaming links are pulled out into the record
+shape generate_html takes. Every record is then rendered with the page
+template and parsed again, so pages that would not survive a rebuild are
+reported instead of silently losing content.
+"""
+
+import os
+import re
+from html.parser import HTMLParser
+
+import page_template
+from common import pool_map
+
+EMBED_PATTERN = re.compile(r'youtube\.com/embed/([^&?/"]+)')
+CARD_PATTERN = re.compile(r'<a\s+href="([^"]+)"[^>]*class="song-card')
+
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+
+LINK_LABELS = {
+    'Spotify': 'spotify',
+    'Apple Music': 'appleMusic',
+    'YouTube Music': 'youtubeMusic'
+}
+
+class SongPageParser(HTMLParser):
+    """Collect song fields from a page, keeping inner markup and entities as written"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.record = {
+            'title': '',
+            'artist': '',
+            'videoId': '',
+            'description': '',
+            'markers': [],
+            'links': {key: '' for key in LINK_LABELS.values()}
+        }
+        self.in_header = False
+        self.capture = None
+        self.buffer = []
+        self.depth = 0
+        self.link_href = None
+
+    def start_capture(self, field):
+        self.capture = field
+        self.buffer = []
+        self.depth = 0
+
+    def finish_capture(self):
+        value = ''.join(self.buffer).strip()
+        field, self.capture = self.capture, None
+
+        if field in ('title', 'artist', 'description'):
+            self.record[field] = value
+            if field == 'artist':
+                self.in_header = False
+        elif field == 'marker-time' and self.record['markers']:
+            self.record['markers'][-1]['time'] = value
+        elif field == 'marker-text' and self.record['markers']:
+            self.record['markers'][-1]['text'] = value
+        elif field == 'link' and value in LINK_LABELS:
+            self.record['links'][LINK_LABELS[value]] = self.link_href
+
+    def handle_starttag(self, tag, attrs):
+        if self.capture:
+            self.buffer.append(self.get_starttag_text())
+            if tag not in VOID_TAGS:
+                self.depth += 1
+            return
+
+        attrs = dict(attrs)
+        classes = (attrs.get('class') or '').split()
+
+        if 'header' in classes:
+            self.in_header = True
+        elif self.in_header and tag == 'h1':
+            self.start_capture('title')
+        elif self.in_header and tag == 'p':
+            self.start_capture('artist')
+        elif 'description' in classes:
+            self.start_capture('description')
+        elif attrs.get('id') == 'youtube-player':
+            match = EMBED_PATTERN.search(attrs.get('src') or '')
+            if match:
+                self.record['videoId'] = match.group(1)
+            elif attrs.get('data-video-id'):
+                self.record['videoId'] = attrs['data-video-id']
+        elif 'marker-item' in classes:
+            time = attrs.get('data-time') or '0'
+            self.record['markers'].append({
+                'time': '',
+                'seconds': int(time) if time.isdigit() else 0,
+                'text': ''
+            })
+        elif 'marker-time' in classes:
+            self.start_capture('marker-time')
+        elif 'marker-text' in classes:
+            self.start_capture('marker-text')
+        elif tag == 'a' and 'stream-link' in classes:
+            self.link_href = attrs.get('href') or ''
+            self.start_capture('link')
+
+    def handle_startendtag(self, tag, attrs):
+        if self.capture:
+            self.buffer.append(self.get_starttag_text())
+        else:
+            self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if not self.capture:
+            return
+        if self.depth == 0:
+            self.finish_capture()
+        else:
+            self.depth -= 1
+            self.buffer.append(f'</{tag}>')
+
+    def handle_data(self, data):
+        if self.capture:
+            self.buffer.append(data)
+
+    def handle_entityref(self, name):
+        if self.capture:
+            self.buffer.append(f'&{name};')
+
+    def handle_charref(self, name):
+        if self.capture:
+            self.buffer.append(f'&#{name};')
+
+def parse_page(html):
+    """Parse page HTML into a catalog record"""
+    parser = SongPageParser()
+    parser.feed(html)
+    parser.close()
+    return parser.record
+
+def parse_file(path, chunk_size=64 * 1024):
+    """Parse a page from disk, feeding the parser a chunk at a time"""
+    parser = SongPageParser()
+    with open(path, encoding='utf-8') as f:
+        while chunk := f.read(chunk_size):
+            parser.feed(chunk)
+    parser.close()
+    return parser.record
+
+def missing_fields(record):
+    missing = [key for key in ('title', 'artist', 'videoId') if not record[key]]
+    if not record['markers']:
+        missing.append('markers')
+    return missing
+
+def round_trip_differences(record):
+    """Fields that change when a record is rendered and parsed again"""
+    again = parse_page(page_template.render_page(record))
+    return [key for key in record if again[key] != record[key]]
+
+def import_page(path):
+    """Import one page, returning (path, record or None, error or None)
+
+    Pages without a YouTube player or markers are returned with neither a
+    record nor an error, since they are not song pages.
+    """
+    try:
+        record = parse_file(path)
+    except (OSError, UnicodeDecodeError) as e:
+        return path, None, f'{type(e).__name__}: {e}'
+
+    missing = missing_fields(record)
+    if 'videoId' in missing and 'markers' in missing:
+        return path, None, None
+    if missing:
+        return path, None, f"missing {', '.join(missing)}"
+
+    changed = round_trip_differences(record)
+    if changed:
+        return path, record, f"does not round-trip through generate_html: {', '.join(changed)}"
+    return path, record, None
+
+def index_order(directory):
+    """Song page filenames in the order index.html lists them, if it exists"""
+    try:
+        with open(os.path.join(directory, 'index.html'), encoding='utf-8') as f:
+            return CARD_PATTERN.findall(f.read())
+    except FileNotFoundError:
+        return []
+
+def import_directory(directory, workers=None):
+    """Import every .html page in a directory in parallel
+
+    Records come back in index.html order, then alphabetically. Returns
+    (records, [(filename, error)], [skipped filenames]). Records that do
+    not round-trip are still returned, alongside their error.
+    """
+    ranked = {name: rank for rank, name in enumerate(index_order(directory))}
+    names = sorted(
+        (name for name in os.listdir(directory) if name.endswith('.html')),
+        key=lambda name: (ranked.get(name, len(ranked)), name)
+    )
+    paths = [os.path.join(directory, name) for name in names]
+
+    results = pool_map(import_page, paths, workers)
+
+    records = []
+    failures = []
+    skipped = []
+    for path, record, error in results:
+        name = os.path.basename(path)
+        if record:
+            records.append(record)
+        if error:
+            failures.append((name, error))
+        elif not record:
+            skipped.append(name)
+    return records, failures, skipped
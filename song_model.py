@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Song model - compact song records and a memory-mapped binary catalog
+
+Song and Marker use __slots__ instead of a dict per object. A song keeps
+its marker seconds in one array and its marker times and texts in
+tuples, and only builds Marker objects when asked for them. Both are
+read-only mappings with the same keys as catalog records, so they can go
+anywhere a record dict goes.
+
+The .songs catalog format holds every song encoded back to back, behind
+an offset table and a slug index. Opening one maps the file and reads
+the 16-byte header and nothing else. Songs are decoded one at a time as
+they are indexed, and find(slug) binary-searches the slug index, so one
+song in a million costs about twenty slug reads, not a full load.
+
+Layout (little-endian):
+    header      magic, song count, reserved                 8s I I
+    offsets     file offset of every song, then the end     (count + 1) Q
+    slug index  song numbers in slug order                  count I
+    songs       per song: 8 string lengths and the marker count (9 I),
+                slug, title, artist, video ID, description, 3 links,
+                marker seconds (n I), marker time/text lengths (2n I),
+                then the marker times and texts
+"""
+
+import sys
+import mmap
+import struct
+from array import array
+from collections.abc import Mapping, Sequence
+
+from common import atomic_write
+from song_core import generate_slug, time_to_seconds
+
+MAGIC = b'SONGCAT1'
+HEADER = struct.Struct('<8sII')
+OFFSET = struct.Struct('<Q')
+INDEX = struct.Struct('<I')
+SONG_HEADER = struct.Struct('<9I')
+
+LINK_KEYS = ('spotify', 'appleMusic', 'youtubeMusic')
+
+# Record key -> Song attribute
+SONG_KEYS = {
+    'title': 'title',
+    'artist': 'artist',
+    'videoId': 'video_id',
+    'description': 'description',
+    'markers': 'markers',
+    'links': 'links'
+}
+
+def little_endian(values):
+    """An array of unsigned ints in file byte order"""
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+class Marker(Mapping):
+    """One marker, readable as marker.seconds or marker['seconds']"""
+
+    __slots__ = ('time', 'seconds', 'text')
+
+    def __init__(self, time, seconds, text):
+        self.time = time
+        self.seconds = seconds
+        self.text = text
+
+    def __getitem__(self, key):
+        if key in Marker.__slots__:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(Marker.__slots__)
+
+    def __len__(self):
+        return len(Marker.__slots__)
+
+    def __repr__(self):
+        return f'Marker({self.time!r}, {self.seconds!r}, {self.text!r})'
+
+class Song(Mapping):
+    """One song, readable as attributes or with the catalog record keys"""
+
+    __slots__ = ('title', 'artist', 'video_id', 'description', 'link_values', 'marker_times', 'marker_seconds', 'marker_texts')
+
+    def __init__(self, title, artist, video_id, description, link_values, marker_times, marker_seconds, marker_texts):
+        self.title = title
+        self.artist = artist
+        self.video_id = video_id
+        self.description = description
+        self.link_values = link_values
+        self.marker_times = marker_times
+        self.marker_seconds = marker_seconds
+        self.marker_texts = marker_texts
+
+    @classmethod
+    def from_record(cls, record):
+        """A Song from a record dict, working out marker seconds the record lacks"""
+        markers = record.get('markers') or []
+        links = record.get('links') or {}
+        return cls(
+            record['title'],
+            record['artist'],
+            record['videoId'],
+            record.get('description', ''),
+            tuple(links.get(key, '') for key in LINK_KEYS),
+            tuple(marker['time'] for marker in markers),
+            array('I', [
+                int(marker['seconds']) if 'seconds' in marker else time_to_seconds(marker['time']) for marker in markers
+            ]),
+            tuple(marker['text'] for marker in markers)
+        )
+
+    @property
+    def slug(self):
+        return generate_slug(self.artist, self.title)
+
+    @property
+    def markers(self):
+        return [Marker(*marker) for marker in zip(self.marker_times, self.marker_seconds, self.marker_texts)]
+
+    @property
+    def links(self):
+        return dict(zip(LINK_KEYS, self.link_values))
+
+    def record(self):
+        """The song as a plain record dict"""
+        return {
+            'title': self.title,
+            'artist': self.artist,
+            'videoId': self.video_id,
+            'description': self.description,
+            'markers': [
+                {'time': time, 'seconds': seconds, 'text': text}
+                for time, seconds, text in zip(self.marker_times, self.marker_seconds, self.marker_texts)
+            ],
+            'links': self.links
+        }
+
+    def __getitem__(self, key):
+        if key in SONG_KEYS:
+            return getattr(self, SONG_KEYS[key])
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(SONG_KEYS)
+
+    def __len__(self):
+        return len(SONG_KEYS)
+
+    def __repr__(self):
+        return f'Song({self.title!r}, {self.artist!r}, {self.video_id!r}, {len(self.marker_times)} markers)'
+
+def encode_song(song):
+    """The binary form of a Song"""
+    strings = [
+        s.encode('utf-8')
+        for s in (song.slug, song.title, song.artist, song.video_id, song.description, *song.link_values)
+    ]
+    times = [time.encode('utf-8') for time in song.marker_times]
+    texts = [text.encode('utf-8') for text in song.marker_texts]
+    lengths = array('I', [len(s) for s in times] + [len(s) for s in texts])
+    return b''.join([
+        SONG_HEADER.pack(*(len(s) for s in strings), len(times)),
+        *strings,
+        little_endian(song.marker_seconds).tobytes(),
+        little_endian(lengths).tobytes(),
+        *times,
+        *texts
+    ])
+
+def write_catalog(path, records):
+    """Write records (dicts or Songs) to a .songs file, keeping their order"""
+    songs = [record if isinstance(record, Song) else Song.from_record(record) for record in records]
+    count = len(songs)
+    data_start = HEADER.size + OFFSET.size * (count + 1) + INDEX.size * count
+    offsets = array('Q')
+    slugs = []
+
+    with atomic_write(path, 'wb') as f:
+        f.seek(data_start)
+        offset = data_start
+        for song in songs:
+            encoded = encode_song(song)
+            offsets.append(offset)
+            slugs.append(song.slug)
+            f.write(encoded)
+            offset += len(encoded)
+        offsets.append(offset)
+
+        order = array('I', sorted(range(count), key=slugs.__getitem__))
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, count, 0))
+        f.write(little_endian(offsets).tobytes())
+        f.write(little_endian(order).tobytes())
+
+class BinaryCatalog(Sequence):
+    """A .songs file mapped into memory, decoding songs only when indexed"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, reserved = HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            self.map.close()
+            raise ValueError(f'{path} is not a .songs catalog')
+        self.order_start = HEADER.size + OFFSET.size * (self.count + 1)
+
+    def close(self):
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def offset(self, index):
+        return OFFSET.unpack_from(self.map, HEADER.size + OFFSET.size * index)[0]
+
+    def slug_at(self, index):
+        start = self.offset(index)
+        length = INDEX.unpack_from(self.map, start)[0]
+        start += SONG_HEADER.size
+        return self.map[start:start + length].decode('utf-8')
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.count))]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError('song index out of range')
+        return self.decode(self.offset(index))
+
+    def decode(self, start):
+        *lengths, marker_count = SONG_HEADER.unpack_from(self.map, start)
+        position = start + SONG_HEADER.size
+        strings = []
+        for length in lengths:
+            strings.append(self.map[position:position + length].decode('utf-8'))
+            position += length
+
+        seconds = array('I')
+        seconds.frombytes(self.map[position:position + 4 * marker_count])
+        position += 4 * marker_count
+        marker_lengths = array('I')
+        marker_lengths.frombytes(self.map[position:position + 8 * marker_count])
+        position += 8 * marker_count
+        if sys.byteorder != 'little':
+            seconds.byteswap()
+            marker_lengths.byteswap()
+
+        marker_strings = []
+        for length in marker_lengths:
+            marker_strings.append(self.map[position:position + length].decode('utf-8'))
+            position += length
+
+        slug, title, artist, video_id, description, *links = strings
+        return Song(
+            title, artist, video_id, description, tuple(links),
+            tuple(marker_strings[:marker_count]), seconds, tuple(marker_strings[marker_count:])
+        )
+
+    def find(self, slug):
+        """The song whose slug is slug, or None"""
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            index = INDEX.unpack_from(self.map, self.order_start + INDEX.size * mid)[0]
+            found = self.slug_at(index)
+            if found == slug:
+                return self[index]
+            if found < slug:
+                low = mid + 1
+            else:
+                high = mid
+        return None
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Song worker - render, write and publish songs off the GUI thread
+
+Jobs run on a small thread pool and report their progress as
+(job id, stage, detail) messages on a queue, which the Tk thread drains
+with root.after. Publishing goes through publish_queue, whose flushes
+serialize git, so the next song can be written while earlier ones push.
+"""
+
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+import publish_queue
+from song_core import write_html
+
+def error_message(e):
+    if isinstance(e, publish_queue.PublishError):
+        return str(e)
+    return f'{type(e).__name__}: {e}'
+
+def write_song(report, filepath, record):
+    """Render a song page straight to disk"""
+    report('writing')
+    with open(filepath, 'w', encoding='utf-8') as f:
+        write_html(record, f)
+    return filepath
+
+class BackgroundWorker:
+    """A thread pool whose jobs report back through a queue
+
+    submit and poll are meant to be called from the GUI thread only. Each
+    job gets a report(stage, detail=None) callable as its first argument,
+    and finishes with a 'done' (detail is its return value) or 'error'
+    (detail is the message) stage.
+    """
+
+    def __init__(self, max_workers=2):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='song-worker')
+        self.messages = queue.Queue()
+        self.pending = 0
+
+    def submit(self, job_id, function, *args, **kwargs):
+        def report(stage, detail=None):
+            self.messages.put((job_id, stage, detail))
+
+        def run():
+            try:
+                report('done', function(report, *args, **kwargs))
+            except Exception as e:
+                report('error', error_message(e))
+
+        self.pending += 1
+        self.pool.submit(run)
+
+    def poll(self):
+        """Every message reported since the last poll, in order"""
+        messages = []
+        while True:
+            try:
+                messages.append(self.messages.get_nowait())
+            except queue.Empty:
+                break
+        self.pending -= sum(1 for job_id, stage, detail in messages if stage in ('done', 'error'))
+        return messages
+
+    def shutdown(self):
+        """Wait for every submitted job to finish"""
+        self.pool.shutdown(wait=True)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Submission queue - turn song records appended to requests.jsonl into pages
+
+Other tools queue a song by appending one JSON record per line to
+requests.jsonl. The worker tails the file, waits for a burst of appends
+to settle, and hands the whole batch to one process call, so fifty
+submissions cost one render-and-publish cycle. The byte offset after the
+last processed line is checkpointed next to the file, only once its batch
+has been processed, so a restarted worker resumes exactly where the last
+one stopped. A line still being written (no trailing newline yet) is left
+for the next read. A file that shrank or was replaced is read again from
+the start.
+"""
+
+import os
+import json
+import time
+
+from common import atomic_write
+
+REQUESTS_NAME = 'requests.jsonl'
+POLL_INTERVAL = 0.5
+BATCH_WINDOW = 1.0
+MAX_BATCH = 500
+
+def checkpoint_path(path):
+    directory, name = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, f'.{name}.offset')
+
+class SubmissionTail:
+    """Complete lines appended to a JSONL file since the last checkpoint"""
+
+    def __init__(self, path):
+        self.path = path
+        self.checkpoint = checkpoint_path(path)
+        self.offset, self.inode = self.load()
+
+    def load(self):
+        try:
+            with open(self.checkpoint, encoding='utf-8') as f:
+                state = json.load(f)
+            return state['offset'], state.get('inode')
+        except (FileNotFoundError, ValueError, KeyError):
+            return 0, None
+
+    def save(self, offset, inode):
+        with atomic_write(self.checkpoint) as f:
+            json.dump({'offset': offset, 'inode': inode}, f)
+            f.write('\n')
+        self.offset, self.inode = offset, inode
+
+    def read(self, offset, inode, limit=MAX_BATCH):
+        """Up to limit complete lines after offset as ([(line offset, text)], end offset, inode)
+
+        Nothing is checkpointed; call commit with the end offset and inode
+        once the lines have been handled.
+        """
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return [], offset, inode
+        with f:
+            stat = os.fstat(f.fileno())
+            if (inode is not None and stat.st_ino != inode) or stat.st_size < offset:
+                offset = 0
+            f.seek(offset)
+            lines = []
+            while len(lines) < limit:
+                line = f.readline()
+                if not line.endswith(b'\n'):
+                    break
+                if line.strip():
+                    lines.append((offset, line.decode('utf-8', errors='replace')))
+                offset += len(line)
+        return lines, offset, stat.st_ino
+
+    def commit(self, offset, inode):
+        if (offset, inode) != (self.offset, self.inode):
+            self.save(offset, inode)
+
+def parse_line(text):
+    """The record on one line, raising ValueError unless it is a JSON object"""
+    record = json.loads(text)
+    if not isinstance(record, dict):
+        raise ValueError('not a JSON object')
+    return record
+
+def next_batch(tail, batch_window=BATCH_WINDOW, max_batch=MAX_BATCH, poll_interval=POLL_INTERVAL):
+    """Wait for new lines, then keep reading until none arrive for batch_window
+
+    Returns (lines, end offset, inode); lines is empty when there was nothing
+    new. A batch is cut off at max_batch lines; the rest follow in the
+    next one.
+    """
+    lines, offset, inode = tail.read(tail.offset, tail.inode, max_batch)
+    if not lines:
+        return lines, offset, inode
+
+    quiet_since = time.monotonic()
+    while len(lines) < max_batch and time.monotonic() - quiet_since < batch_window:
+        time.sleep(poll_interval)
+        more, offset, inode = tail.read(offset, inode, max_batch - len(lines))
+        if more:
+            lines += more
+            quiet_since = time.monotonic()
+    return lines, offset, inode
+
+def run(path, process, follow=True, batch_window=BATCH_WINDOW, max_batch=MAX_BATCH,
+        poll_interval=POLL_INTERVAL, report=None):
+    """Hand batches of new submissions to process until interrupted
+
+    process(entries) gets [(line offset, record or None, error or None)]
+    for one batch. The checkpoint moves past the batch only after process
+    returns, so if it raises, the batch is read again on the next run.
+    Without follow, stop once everything already in the file is handled.
+    """
+    tail = SubmissionTail(path)
+    while True:
+        lines, offset, inode = next_batch(tail, batch_window if follow else 0, max_batch, poll_interval)
+        if lines:
+            entries = []
+            for line_offset, text in lines:
+                try:
+                    entries.append((line_offset, parse_line(text), None))
+                except ValueError as e:
+                    entries.append((line_offset, None, f'{type(e).__name__}: {e}'))
+            if report:
+                report(len(entries))
+            process(entries)
+        tail.commit(offset, inode)
+        if not lines:
+            if not follow:
+                return
+            time.sleep(poll_interval)
@@ -0,0 +1,16 @@
+import os
+import sys
+import importlib.util
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+@pytest.fixture(scope='session')
+def add_song():
+    """add-song.py, which cannot be imported by name"""
+    spec = importlib.util.spec_from_file_location('add_song', os.path.join(ROOT, 'add-song.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,91 @@
+import os
+import json
+
+def song(title, video_id):
+    return {
+        'title': title,
+        'artist': 'Opeth',
+        'videoId': video_id,
+        'description': '',
+        'markers': [{'time': '0:01', 'text': 'x'}],
+        'links': {}
+    }
+
+def write_catalog(path, records):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(records, f)
+
+def test_bad_entries_fail_alone(add_song, tmp_path):
+    catalog = str(tmp_path / 'songs.json')
+    bad_markers = [[{'time': 90, 'text': 'x'}], [{'time': None, 'text': 'x'}], [{'time': '0:01', 'text': None}], ['0:01 x']]
+    write_catalog(catalog, [song('A', 'aaaaaaaaaaa'), 'oops', 3, {'title': 'No video'}]
+                  + [dict(song(f'M{i}', 'bbbbbbbbbbb'), markers=markers) for i, markers in enumerate(bad_markers)]
+                  + [dict(song('L', 'ccccccccccc'), links=['x']), dict(song('S', 'ddddddddddd'), links={'spotify': 5})])
+
+    os.makedirs(tmp_path / 'site')
+    result = add_song.build(catalog, str(tmp_path / 'site'), workers=1)
+
+    assert result['built'] == ['opeth-a.html']
+    assert [label for label, error in result['failed']] == [
+        '#2', '#3', '#4 No video - ?', '#5 M0 - Opeth', '#6 M1 - Opeth', '#7 M2 - Opeth', '#8 M3 - Opeth',
+        '#9 L - Opeth', '#10 S - Opeth'
+    ]
+    assert all(error.startswith('ValueError') for label, error in result['failed'][4:])
+
+def test_check_links_reports_bad_entries(add_song, tmp_path, capsys):
+    catalog = str(tmp_path / 'songs.json')
+    write_catalog(catalog, [dict(song('A', 'aaaaaaaaaaa'), links=['x']), dict(song('B', 'bbbbbbbbbbb'), links=[])])
+
+    assert add_song.cli(['check-links', catalog, '--cache', str(tmp_path / 'cache.json')]) == 1
+    assert 'links must be an object' in capsys.readouterr().out
+
+def test_cli_exit_status(add_song, tmp_path):
+    catalog = str(tmp_path / 'songs.json')
+    write_catalog(catalog, [song('A', 'aaaaaaaaaaa')])
+    assert add_song.cli(['build', catalog, '-o', str(tmp_path / 'site'), '-j', '1']) == 0
+    assert os.path.exists(tmp_path / 'site' / 'opeth-a.html')
+
+    write_catalog(catalog, [song('A', 'aaaaaaaaaaa'), 'oops'])
+    assert add_song.cli(['build', catalog, '-o', str(tmp_path / 'site'), '-j', '1']) == 1
+
+def test_shrunk_catalog_reports_only_generated_index_pages(add_song, tmp_path):
+    catalog = str(tmp_path / 'songs.json')
+    site = str(tmp_path / 'site')
+    os.makedirs(site)
+    write_catalog(catalog, [song(f'S{i}', f'{i:011d}') for i in range(5)])
+    assert len(add_song.build(catalog, site, workers=1, shard_size=1)['index']) == 9
+
+    write_catalog(catalog, [song('S0', f'{0:011d}')])
+    result = add_song.build(catalog, site, workers=1, shard_size=1)
+
+    assert result['index'] == ['index.html']
+    assert 'index-5.html' in result['stale'] and 'grid/5.json' in result['stale']
+    assert result['removed'] == []
+
+def test_no_index_leaves_the_index_alone(add_song, tmp_path):
+    catalog = str(tmp_path / 'songs.json')
+    site = str(tmp_path / 'site')
+    os.makedirs(site)
+    write_catalog(catalog, [song(f'S{i}', f'{i:011d}') for i in range(3)])
+    index = add_song.build(catalog, site, workers=1, shard_size=1)['index']
+
+    result = add_song.build(catalog, site, workers=1, shard_size=1, index=False, prune=True)
+    assert result['stale'] == [] and result['removed'] == []
+    assert all(os.path.exists(os.path.join(site, filename)) for filename in index)
+
+    assert add_song.build(catalog, site, workers=1, shard_size=1, prune=True)['stale'] == []
+
+def test_build_outputs_cover_headers_and_compressed_copies(add_song, tmp_path):
+    catalog = str(tmp_path / 'songs.json')
+    site = str(tmp_path / 'site')
+    os.makedirs(site)
+    write_catalog(catalog, [song('A', 'aaaaaaaaaaa'), song('B', 'bbbbbbbbbbb')])
+    add_song.build(catalog, site, workers=1, compress=True, headers=True)
+
+    write_catalog(catalog, [song('A', 'aaaaaaaaaaa')])
+    result = add_song.build(catalog, site, workers=1, compress=True, headers=True, prune=True)
+    outputs = {os.path.relpath(path, site) for path in add_song.build_outputs(result, site, headers=True)}
+
+    assert {'_headers', 'asset-manifest.json', 'index.html', 'index.html.gz', 'opeth-b.html', 'opeth-b.html.gz'} <= outputs
+    assert 'opeth-a.html.gz' not in outputs
+    assert all(os.path.exists(os.path.join(site, name)) for name in outputs if not name.startswith('opeth-b.'))
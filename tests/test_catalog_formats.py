@@ -0,0 +1,56 @@
+import itertools
+
+import pytest
+
+FORMATS = ['.json', '.jsonl', '.csv', '.db', '.songs']
+
+RECORDS = [
+    {
+        'title': 'Ghost of Perdition',
+        'artist': 'Opeth',
+        'videoId': 'MDBykpSXsSE',
+        'description': 'Beauty meets brutality,\nover two lines',
+        'markers': [
+            {'time': '0:00', 'seconds': 0, 'text': 'Opening riff'},
+            {'time': '1:02:03', 'seconds': 3723, 'text': 'Über "quoted", with commas'}
+        ],
+        'links': {'spotify': 'https://open.spotify.com/track/x', 'appleMusic': '', 'youtubeMusic': ''}
+    },
+    {
+        'title': 'Dogs',
+        'artist': 'Pink Floyd',
+        'videoId': 'https://www.youtube.com/watch?v=ZtjB0cCqQxY',
+        'description': '',
+        'markers': [{'time': '17:03', 'seconds': 1023, 'text': '坂本 ✓'}],
+        'links': {'spotify': '', 'appleMusic': 'https://music.apple.com/x', 'youtubeMusic': 'https://music.youtube.com/x'}
+    }
+]
+
+@pytest.mark.parametrize('source, target', list(itertools.permutations(FORMATS, 2)))
+def test_round_trip(add_song, tmp_path, source, target):
+    source_path = str(tmp_path / f'catalog{source}')
+    target_path = str(tmp_path / f'copy{target}')
+    add_song.save_catalog(source_path, RECORDS)
+    add_song.save_catalog(target_path, add_song.load_catalog(source_path))
+
+    expected = [add_song.normalize_record(record) for record in RECORDS]
+    assert [add_song.normalize_record(record) for record in add_song.load_catalog(target_path)] == expected
+
+@pytest.mark.parametrize('ext', FORMATS)
+def test_same_format(add_song, tmp_path, ext):
+    path = str(tmp_path / f'catalog{ext}')
+    add_song.save_catalog(path, RECORDS)
+    loaded = add_song.load_catalog(path)
+    assert [add_song.normalize_record(record) for record in loaded] == [add_song.normalize_record(record) for record in RECORDS]
+
+def test_binary_catalog_find(tmp_path):
+    import song_model
+
+    path = str(tmp_path / 'catalog.songs')
+    song_model.write_catalog(path, RECORDS)
+    with song_model.BinaryCatalog(path) as catalog:
+        assert len(catalog) == 2
+        assert catalog.find('pink-floyd-dogs').title == 'Dogs'
+        assert catalog.find('opeth-ghost-of-perdition')['markers'][1]['seconds'] == 3723
+        assert catalog.find('nobody-nothing') is None
+        assert catalog[-1].artist == 'Pink Floyd'
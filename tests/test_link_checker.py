@@ -0,0 +1,111 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import link_checker
+
+class Handler(BaseHTTPRequestHandler):
+    """Canned answers: /ok, /gone, /busy, /no-head (GET only) and /moved -> /ok"""
+    protocol_version = 'HTTP/1.1'
+
+    def answer(self):
+        self.server.seen.append((self.command, self.path))
+        if self.path.startswith('/video/'):
+            status = 404 if self.path.endswith('deleted') else 200
+        elif self.path == '/no-head' and self.command == 'HEAD':
+            status = 405
+        else:
+            status = {'/ok': 200, '/no-head': 200, '/gone': 404, '/busy': 503, '/moved': 301}.get(self.path, 404)
+        body = b'' if self.command == 'HEAD' else b'body'
+        self.send_response(status)
+        if status == 301:
+            self.send_header('Location', '/ok')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_HEAD = do_GET = answer
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    httpd.seen = []
+    thread = threading.Thread(target=httpd.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+def check(server, tmp_path, songs, **options):
+    base = f'http://127.0.0.1:{server.server_port}'
+    songs = [(label, {'videoId': video_id, 'links': {field: base + path for field, path in links.items()}})
+             for label, video_id, links in songs]
+    return link_checker.validate(songs, str(tmp_path / link_checker.CACHE_NAME),
+                                 video_url=base + '/video/{id}', rate=0, timeout=5, **options)
+
+def test_dead_and_failing_links_are_reported_apart(server, tmp_path):
+    report = check(server, tmp_path, [
+        ('Fine', 'v1', {'spotify': '/ok', 'appleMusic': '/moved'}),
+        ('Broken', 'deleted', {'spotify': '/gone', 'youtubeMusic': '/busy'})
+    ])
+
+    assert [(label, field, reason) for label, field, url, reason in report['dead']] == [
+        ('Broken', 'videoId', 'HTTP 404'), ('Broken', 'spotify', 'HTTP 404')
+    ]
+    assert [(label, field, reason) for label, field, url, reason in report['errors']] == [
+        ('Broken', 'youtubeMusic', 'HTTP 503')
+    ]
+    assert report['checked'] == 6
+
+def test_get_is_tried_when_head_is_refused(server, tmp_path):
+    report = check(server, tmp_path, [('Song', 'v1', {'spotify': '/no-head'})])
+
+    assert report['dead'] == [] and report['errors'] == []
+    assert [seen for seen in server.seen if seen[1] == '/no-head'] == [('HEAD', '/no-head'), ('GET', '/no-head')]
+
+def test_redirects_are_followed(server, tmp_path):
+    check(server, tmp_path, [('Song', 'v1', {'spotify': '/moved'})])
+
+    assert ('HEAD', '/moved') in server.seen
+    assert ('HEAD', '/ok') in server.seen
+
+def test_shared_urls_are_fetched_once(server, tmp_path):
+    report = check(server, tmp_path, [
+        ('A', 'v1', {'spotify': '/ok'}),
+        ('B', 'v1', {'spotify': '/ok'})
+    ])
+
+    assert report['checked'] == 2
+    assert server.seen.count(('HEAD', '/ok')) == 1
+
+def test_rerun_uses_the_cache_except_for_errors(server, tmp_path):
+    songs = [('Song', 'deleted', {'spotify': '/ok', 'youtubeMusic': '/busy'})]
+    check(server, tmp_path, songs)
+    with open(tmp_path / link_checker.CACHE_NAME, encoding='utf-8') as f:
+        assert len(json.load(f)) == 2
+    server.seen.clear()
+
+    report = check(server, tmp_path, songs)
+
+    assert server.seen == [('HEAD', '/busy')]
+    assert (report['checked'], report['cached']) == (1, 2)
+    assert len(report['dead']) == 1 and len(report['errors']) == 1
+
+    server.seen.clear()
+    check(server, tmp_path, songs, refresh=True)
+    assert len(server.seen) == 3
+
+def test_expired_entries_are_checked_again(server, tmp_path):
+    songs = [('Song', 'v1', {})]
+    check(server, tmp_path, songs)
+    server.seen.clear()
+
+    report = check(server, tmp_path, songs, ttl=0)
+
+    assert report['checked'] == 1
+    assert server.seen == [('HEAD', '/video/v1')]
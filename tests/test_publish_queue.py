@@ -0,0 +1,96 @@
+import os
+import subprocess
+
+import pytest
+
+import publish_queue
+
+def git(cwd, *args):
+    return subprocess.run(['git', *args], cwd=cwd, check=True, capture_output=True, text=True).stdout
+
+@pytest.fixture
+def repo(tmp_path):
+    """A clone of a local bare repository, with one commit pushed"""
+    remote = tmp_path / 'remote.git'
+    work = tmp_path / 'work'
+    git(tmp_path, 'init', '-q', '--bare', str(remote))
+    git(tmp_path, 'clone', '-q', str(remote), str(work))
+    git(work, 'config', 'user.name', 'Test')
+    git(work, 'config', 'user.email', 'test@example.com')
+    (work / 'index.html').write_text('index\n')
+    git(work, 'add', 'index.html')
+    git(work, 'commit', '-q', '-m', 'Initial')
+    git(work, 'push', '-q', '-u', 'origin', 'HEAD')
+    return work
+
+def write(repo, name, text):
+    path = repo / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return str(path)
+
+def test_flush_makes_one_commit_and_pushes(repo):
+    queue = publish_queue.PublishQueue(str(repo))
+    queue.add(write(repo, 'a.html', 'a'), 'Add A by X')
+    assert queue.add(write(repo, 'b.html', 'b'), 'Add B by X') == 2
+
+    result = queue.flush()
+
+    assert result == {'published': ['Add A by X', 'Add B by X'], 'committed': True, 'pushed': True}
+    assert git(repo, 'log', '-1', '--format=%s') == 'Add 2 songs\n'
+    assert set(git(repo, 'show', '--name-only', '--format=', 'HEAD').split()) == {'a.html', 'b.html'}
+    assert git(repo, 'rev-parse', 'HEAD') == git(repo, 'rev-parse', '@{u}')
+    assert queue.pending() == []
+    assert not os.path.exists(repo / publish_queue.QUEUE_NAME)
+
+def test_flush_leaves_other_staged_files_alone(repo):
+    write(repo, 'notes.txt', 'unrelated')
+    git(repo, 'add', 'notes.txt')
+    queue = publish_queue.PublishQueue(str(repo), push=False)
+    queue.add(write(repo, 'a.html', 'a'), 'Add A by X')
+
+    queue.flush()
+
+    assert git(repo, 'show', '--name-only', '--format=', 'HEAD').split() == ['a.html']
+    assert git(repo, 'diff', '--cached', '--name-only').split() == ['notes.txt']
+
+def test_flush_commits_deleted_files(repo):
+    queue = publish_queue.PublishQueue(str(repo), push=False)
+    os.remove(repo / 'index.html')
+    queue.add_all([str(repo / 'index.html'), write(repo, 'grid/2.json', '{}')], 'Rebuild site')
+
+    assert queue.flush()['committed']
+    assert git(repo, 'ls-files').split() == ['grid/2.json']
+
+def test_add_all_keeps_queued_messages(repo):
+    queue = publish_queue.PublishQueue(str(repo), push=False)
+    page = write(repo, 'a.html', 'a')
+    queue.add(page, 'Add A by X')
+    queue.add_all([page, str(repo / 'index.html')], 'Rebuild site')
+
+    assert queue.pending() == [('a.html', 'Add A by X'), ('index.html', 'Rebuild site')]
+    assert publish_queue.commit_message(['Add A by X', 'Rebuild site', 'Rebuild site']) == (
+        'Publish 2 changes\n\n- Add A by X\n- Rebuild site'
+    )
+
+def test_unchanged_pages_make_no_commit(repo):
+    queue = publish_queue.PublishQueue(str(repo), push=False)
+    queue.add(str(repo / 'index.html'), 'Rebuild site')
+
+    assert queue.flush() == {'published': ['Rebuild site'], 'committed': False, 'pushed': False}
+    assert git(repo, 'log', '--format=%s').split('\n')[0] == 'Initial'
+
+def test_failed_push_is_retried(repo, tmp_path):
+    queue = publish_queue.PublishQueue(str(repo))
+    queue.add(write(repo, 'a.html', 'a'), 'Add A by X')
+    remote = git(repo, 'remote', 'get-url', 'origin').strip()
+    git(repo, 'remote', 'set-url', 'origin', str(tmp_path / 'missing.git'))
+
+    with pytest.raises(publish_queue.PublishError):
+        queue.flush()
+    assert queue.pending() == []
+    assert queue.load()['unpushed']
+
+    git(repo, 'remote', 'set-url', 'origin', remote)
+    assert queue.flush() == {'published': [], 'committed': False, 'pushed': True}
+    assert git(repo, 'rev-parse', 'HEAD') == git(repo, 'rev-parse', '@{u}')
@@ -0,0 +1,46 @@
+import pytest
+
+import song_catalog
+
+def record(title, video_id='MDBykpSXsSE'):
+    return {
+        'title': title,
+        'artist': 'Opeth',
+        'videoId': video_id,
+        'description': '',
+        'markers': [{'time': '0:01', 'seconds': 1, 'text': 'x'}],
+        'links': {'spotify': '', 'appleMusic': '', 'youtubeMusic': ''}
+    }
+
+@pytest.fixture
+def catalog(tmp_path):
+    with song_catalog.SongCatalog(str(tmp_path / 'songs.db')) as catalog:
+        yield catalog
+
+def test_add_ranks_in_order(catalog):
+    catalog.add('opeth-a', record('A', 'aaaaaaaaaaa'))
+    catalog.add('opeth-b', record('B', 'bbbbbbbbbbb'))
+    assert [(song['slug'], song['rank']) for song in catalog.records()] == [('opeth-a', 1), ('opeth-b', 2)]
+
+def test_duplicates_are_refused(catalog):
+    catalog.add('opeth-a', record('A'))
+    with pytest.raises(song_catalog.DuplicateSongError):
+        catalog.add('opeth-a', record('A', 'ccccccccccc'))
+    with pytest.raises(song_catalog.DuplicateSongError):
+        catalog.add('opeth-other', record('Other'))
+
+def test_replacing_a_video_collision_keeps_one_row(catalog):
+    catalog.add('opeth-a', record('A'))
+    catalog.add('opeth-b', record('B', 'bbbbbbbbbbb'))
+    assert catalog.add('opeth-renamed', record('Renamed'), replace=True) == ['opeth-a']
+
+    songs = catalog.records()
+    assert [(song['slug'], song['rank']) for song in songs] == [('opeth-renamed', 1), ('opeth-b', 2)]
+    assert [song['videoId'] for song in songs].count('MDBykpSXsSE') == 1
+
+def test_replacing_the_same_slug_keeps_its_rank(catalog):
+    catalog.add('opeth-a', record('A'))
+    catalog.add('opeth-b', record('B', 'bbbbbbbbbbb'))
+    assert catalog.add('opeth-a', record('A', 'ccccccccccc'), replace=True) == []
+    assert catalog.find_slug('opeth-a')['rank'] == 1
+    assert catalog.find_slug('opeth-a')['videoId'] == 'ccccccccccc'
@@ -0,0 +1,116 @@
+import os
+import json
+
+import pytest
+
+import song_catalog
+import publish_queue
+import submission_queue
+
+def append(path, text):
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(text)
+
+def drain(path):
+    """Records handed to process by one run over everything already in the file"""
+    seen = []
+    submission_queue.run(str(path), lambda entries: seen.extend(record for offset, record, error in entries),
+                         follow=False, poll_interval=0)
+    return seen
+
+def test_resume_after_restart(tmp_path):
+    path = tmp_path / submission_queue.REQUESTS_NAME
+    append(path, '{"n": 1}\n{"n": 2}\n')
+    assert drain(path) == [{'n': 1}, {'n': 2}]
+
+    append(path, '{"n": 3}\n')
+
+    assert drain(path) == [{'n': 3}]
+    assert drain(path) == []
+
+def test_partial_line_waits_for_its_newline(tmp_path):
+    path = tmp_path / submission_queue.REQUESTS_NAME
+    append(path, '{"n": 1}\n{"n":')
+    assert drain(path) == [{'n': 1}]
+
+    append(path, ' 2}\n')
+
+    assert drain(path) == [{'n': 2}]
+
+def test_checkpoint_moves_only_after_process_returns(tmp_path):
+    path = tmp_path / submission_queue.REQUESTS_NAME
+    append(path, '{"n": 1}\n')
+
+    def fail(entries):
+        raise RuntimeError('render failed')
+
+    with pytest.raises(RuntimeError):
+        submission_queue.run(str(path), fail, follow=False, poll_interval=0)
+
+    assert not os.path.exists(submission_queue.checkpoint_path(str(path)))
+    assert drain(path) == [{'n': 1}]
+
+def test_bad_lines_are_reported_and_skipped(tmp_path):
+    path = tmp_path / submission_queue.REQUESTS_NAME
+    append(path, 'not json\n[1]\n{"n": 1}\n')
+    entries = []
+
+    submission_queue.run(str(path), entries.extend, follow=False, poll_interval=0)
+
+    assert [(offset, record) for offset, record, error in entries] == [(0, None), (9, None), (13, {'n': 1})]
+    assert all(error for offset, record, error in entries[:2])
+    assert drain(path) == []
+
+def test_replaced_or_truncated_file_is_read_from_the_start(tmp_path):
+    path = tmp_path / submission_queue.REQUESTS_NAME
+    append(path, '{"n": 1}\n{"n": 2}\n')
+    drain(path)
+
+    replacement = tmp_path / 'new.jsonl'
+    append(replacement, '{"n": 3}\n{"n": 4}\n{"n": 5}\n')
+    os.replace(replacement, path)
+    assert drain(path) == [{'n': 3}, {'n': 4}, {'n': 5}]
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{"n":6}\n')
+    assert drain(path) == [{'n': 6}]
+
+def test_checkpoint_records_offset_and_inode(tmp_path):
+    path = tmp_path / submission_queue.REQUESTS_NAME
+    append(path, '{"n": 1}\n{"n":')
+    drain(path)
+
+    with open(submission_queue.checkpoint_path(str(path)), encoding='utf-8') as f:
+        state = json.load(f)
+
+    assert state == {'offset': len('{"n": 1}\n'), 'inode': os.stat(path).st_ino}
+
+def test_bad_submission_does_not_block_the_worker(add_song, tmp_path, monkeypatch):
+    def plan_song(record):
+        if record['title'] == 'Crash':
+            raise AttributeError('unexpected')
+        return plan(record)
+    plan = add_song.plan_song
+    monkeypatch.setattr(add_song, 'plan_song', plan_song)
+
+    path = tmp_path / submission_queue.REQUESTS_NAME
+    song = {'title': 'A', 'artist': 'Opeth', 'videoId': 'aaaaaaaaaaa', 'markers': [{'time': '0:01', 'text': 'x'}]}
+    for record in (dict(song, markers=[{'time': 90, 'text': 'x'}]), dict(song, markers=[{'time': None, 'text': 'x'}]),
+                   dict(song, links=[]), dict(song, title='Crash'), song):
+        append(path, json.dumps(record) + '\n')
+    catalog = song_catalog.SongCatalog(str(tmp_path / 'songs.db'))
+    queue = publish_queue.PublishQueue(str(tmp_path), push=False)
+    results = []
+
+    def process(entries):
+        results.append(add_song.process_submissions(entries, str(tmp_path), catalog, queue))
+
+    submission_queue.run(str(path), process, follow=False, poll_interval=0)
+    catalog.close()
+
+    [(written, failures)] = results
+    assert written == ['opeth-a.html']
+    assert [error.split(':')[0] for label, error in failures] == ['ValueError'] * 3 + ['AttributeError']
+    assert os.path.exists(tmp_path / 'opeth-a.html')
+    assert queue.pending() == [('opeth-a.html', 'Add A by Opeth')]
+    assert drain(path) == []
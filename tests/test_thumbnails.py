@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+Image = pytest.importorskip('PIL.Image')
+
+import thumbnails
+
+@pytest.fixture
+def source(tmp_path):
+    """A directory holding one 4:3 thumbnail, letterboxed like YouTube's hqdefault.jpg"""
+    directory = tmp_path / 'source'
+    directory.mkdir()
+    Image.new('RGB', (480, 360), 'red').save(directory / 'aaaaaaaaaaa.jpg', 'JPEG')
+    return str(directory)
+
+def counting(fetch):
+    def fetcher(video_id):
+        fetcher.calls.append(video_id)
+        return fetch(video_id)
+    fetcher.calls = []
+    return fetcher
+
+def test_variants_are_cropped_and_resized(source, tmp_path):
+    out_dir = str(tmp_path / 'site')
+
+    found, failures = thumbnails.build_thumbnails(['aaaaaaaaaaa', 'missing'], out_dir, thumbnails.directory_fetcher(source))
+
+    assert failures == [('missing', 'no thumbnail found')]
+    info = found['aaaaaaaaaaa']
+    assert info['widths'] == [320, 480]
+    assert info['files'] == [
+        'thumbs/aaaaaaaaaaa-320.webp', 'thumbs/aaaaaaaaaaa-320.jpg',
+        'thumbs/aaaaaaaaaaa-480.webp', 'thumbs/aaaaaaaaaaa-480.jpg'
+    ]
+    with Image.open(os.path.join(out_dir, 'thumbs/aaaaaaaaaaa-320.webp')) as image:
+        assert (image.format, image.size) == ('WEBP', (320, 180))
+    with Image.open(os.path.join(out_dir, 'thumbs/aaaaaaaaaaa-480.jpg')) as image:
+        assert (image.format, image.size) == ('JPEG', (480, 270))
+    assert info['placeholder'].startswith('data:image/webp;base64,')
+
+def test_picture_html(source, tmp_path):
+    found, failures = thumbnails.build_thumbnails(['aaaaaaaaaaa'], str(tmp_path / 'site'), thumbnails.directory_fetcher(source))
+
+    html = thumbnails.picture_html({'videoId': 'aaaaaaaaaaa', 'title': 'A'}, found['aaaaaaaaaaa'])
+
+    assert 'srcset="thumbs/aaaaaaaaaaa-320.webp 320w, thumbs/aaaaaaaaaaa-480.webp 480w"' in html
+    assert 'src="thumbs/aaaaaaaaaaa-480.jpg"' in html
+    assert 'width="480" height="270"' in html
+    assert 'alt="A"' in html and 'loading="lazy"' in html
+    assert found['aaaaaaaaaaa']['placeholder'] in html
+
+def test_rebuild_reuses_the_cache(source, tmp_path):
+    out_dir = str(tmp_path / 'site')
+    fetch = counting(thumbnails.directory_fetcher(source))
+    found, failures = thumbnails.build_thumbnails(['aaaaaaaaaaa'], out_dir, fetch)
+    variant = os.path.join(out_dir, found['aaaaaaaaaaa']['files'][0])
+    written = os.stat(variant).st_mtime_ns
+
+    again, failures = thumbnails.build_thumbnails(['aaaaaaaaaaa', 'aaaaaaaaaaa'], out_dir, fetch)
+
+    assert fetch.calls == ['aaaaaaaaaaa']
+    assert again == found
+    assert os.stat(variant).st_mtime_ns == written
+    assert os.path.exists(os.path.join(out_dir, thumbnails.CACHE_DIR, 'aaaaaaaaaaa.jpg'))
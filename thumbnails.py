@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Thumbnails - cached, resized video thumbnails for the index grid
+
+Each video's thumbnail is fetched once through a pluggable fetcher and
+cached by video ID. It is then cropped to 16:9 and written as WebP and
+JPEG variants at a few widths, plus a tiny inline placeholder that shows
+blurred while the real image loads. Cards get a <picture> with srcset and
+sizes, so browsers download a few hundred pixels instead of the 1280x720
+maxresdefault.jpg. Needs Pillow; without it the grid keeps hotlinking.
+"""
+
+import os
+import base64
+import urllib.error
+import urllib.request
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+from common import write_atomic
+
+THUMBS_DIR = 'thumbs'
+CACHE_DIR = '.thumbnail-cache'
+WIDTHS = (320, 480, 640)
+FORMATS = [
+    ('webp', 'WEBP', {'quality': 72, 'method': 6}),
+    ('jpg', 'JPEG', {'quality': 78, 'optimize': True, 'progressive': True})
+]
+PLACEHOLDER_SIZE = (16, 9)
+
+# Cards are one column on phones and at most about 400px wide otherwise
+SIZES = '(max-width: 768px) calc(100vw - 40px), 400px'
+
+YOUTUBE_URLS = [
+    'https://img.youtube.com/vi/{id}/maxresdefault.jpg',
+    'https://img.youtube.com/vi/{id}/hqdefault.jpg'
+]
+
+def url_fetcher(*templates, timeout=10):
+    """Fetcher trying each URL template ({id} is the video ID) in turn"""
+    templates = templates or YOUTUBE_URLS
+
+    def fetch(video_id):
+        for template in templates:
+            try:
+                with urllib.request.urlopen(template.format(id=video_id), timeout=timeout) as response:
+                    return response.read()
+            except urllib.error.HTTPError as e:
+                if e.code != 404:
+                    raise
+        return None
+    return fetch
+
+def directory_fetcher(directory):
+    """Fetcher reading <video id>.jpg from a local directory"""
+    def fetch(video_id):
+        try:
+            with open(os.path.join(directory, f'{video_id}.jpg'), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+    return fetch
+
+def fetcher_for(source):
+    """A fetcher for a --thumbnail-source value: a directory, a URL template or None for YouTube"""
+    if not source:
+        return url_fetcher()
+    if '://' in source:
+        return url_fetcher(source)
+    return directory_fetcher(source)
+
+def cached_original(video_id, cache_dir, fetch):
+    """Path of the cached original, fetching it on first use; None if there is none"""
+    path = os.path.join(cache_dir, f'{video_id}.jpg')
+    if not os.path.exists(path):
+        data = fetch(video_id)
+        if not data:
+            return None
+        write_atomic(path, data)
+    return path
+
+def crop_16_9(image):
+    """Center-crop to 16:9, dropping the letterbox bars of 4:3 thumbnails"""
+    width, height = image.size
+    target = width * 9 // 16
+    if height <= target:
+        return image
+    top = (height - target) // 2
+    return image.crop((0, top, width, top + target))
+
+def variant_name(video_id, width, ext):
+    return f'{THUMBS_DIR}/{video_id}-{width}.{ext}'
+
+def is_fresh(path, source):
+    try:
+        return os.stat(path).st_mtime_ns >= os.stat(source).st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+def make_variants(video_id, original, out_dir):
+    """Write the resized variants and placeholder, returning the thumbnail info
+
+    The info is {'widths': [...], 'placeholder': data URI, 'files': [...]}.
+    Variants newer than the cached original are not regenerated.
+    """
+    placeholder_path = original[:-len('.jpg')] + '.placeholder'
+    with Image.open(original) as source:
+        image = crop_16_9(source.convert('RGB'))
+        widths = [width for width in WIDTHS if width <= image.width] or [image.width]
+        files = []
+        for width in widths:
+            height = round(width * image.height / image.width)
+            resized = None
+            for ext, image_format, options in FORMATS:
+                name = variant_name(video_id, width, ext)
+                path = os.path.join(out_dir, name)
+                files.append(name)
+                if is_fresh(path, original):
+                    continue
+                resized = resized or image.resize((width, height), Image.LANCZOS)
+                buffer = BytesIO()
+                resized.save(buffer, image_format, **options)
+                write_atomic(path, buffer.getvalue())
+
+        if not is_fresh(placeholder_path, original):
+            buffer = BytesIO()
+            image.resize(PLACEHOLDER_SIZE, Image.BILINEAR).save(buffer, 'WEBP', quality=40)
+            uri = 'data:image/webp;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+            write_atomic(placeholder_path, uri.encode('ascii'))
+
+    with open(placeholder_path, encoding='ascii') as f:
+        placeholder = f.read()
+    return {'widths': widths, 'placeholder': placeholder, 'files': files}
+
+def process_video(video_id, out_dir, fetch):
+    """Fetch (or reuse) and resize one thumbnail, returning (video id, info or None, error or None)"""
+    try:
+        original = cached_original(video_id, os.path.join(out_dir, CACHE_DIR), fetch)
+        if not original:
+            return video_id, None, 'no thumbnail found'
+        return video_id, make_variants(video_id, original, out_dir), None
+    except Exception as e:
+        return video_id, None, f'{type(e).__name__}: {e}'
+
+def build_thumbnails(video_ids, out_dir, fetch=None, workers=8):
+    """Thumbnail variants for every video, fetched and resized on a thread pool
+
+    Returns ({video id: info}, [(video id, error)]). Only videos missing
+    from the cache are fetched.
+    """
+    fetch = fetch or url_fetcher()
+    os.makedirs(os.path.join(out_dir, CACHE_DIR), exist_ok=True)
+    os.makedirs(os.path.join(out_dir, THUMBS_DIR), exist_ok=True)
+
+    video_ids = list(dict.fromkeys(video_ids))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda video_id: process_video(video_id, out_dir, fetch), video_ids))
+
+    thumbnails = {}
+    failures = []
+    for video_id, info, error in results:
+        if info:
+            thumbnails[video_id] = info
+        else:
+            failures.append((video_id, error))
+    return thumbnails, failures
+
+def picture_html(card, info):
+    """<picture> markup for a card, with WebP and JPEG srcsets over the placeholder"""
+    video_id = card['videoId']
+    widths = info['widths']
+    srcsets = {
+        ext: ', '.join(f'{variant_name(video_id, width, ext)} {width}w' for width in widths)
+        for ext, image_format, options in FORMATS
+    }
+    fallback = widths[len(widths) // 2]
+    largest = widths[-1]
+    return (
+        f'<picture>\n'
+        f'                    <source type="image/webp" srcset="{srcsets["webp"]}" sizes="{SIZES}">\n'
+        f'                    <img src="{variant_name(video_id, fallback, "jpg")}" srcset="{srcsets["jpg"]}" sizes="{SIZES}" '
+        f'width="{largest}" height="{largest * 9 // 16}" alt="{card["title"]}" class="song-thumbnail" loading="lazy" decoding="async" '
+        f'style="background: url({info["placeholder"]}) center / cover">\n'
+        f'                </picture>'
+    )